@@ -1,128 +1,487 @@
-from flask import Flask, jsonify, render_template
+from flask import Flask, Response, abort, jsonify, make_response, render_template, request, send_file, url_for
 import threading
 import time
-import odoo_api
+import assets
+import delta_sync
+import record_cache
+import tenants
 import os
 import config
+import metrics
+from columnar_store import ColumnarSnapshot
+from refresh_engine import RefreshEngine
+from refresh_scheduler import AdaptiveScheduler
+from response_cache import EncodedCache, EncodedSnapshot
+from sampling_profiler import SamplingProfiler
+from event_stream import EventBroker
+from kpi_history import TIERS, KpiHistory
+from section_index import IndexCache, SectionIndex, index_fields
+from shared_cache import SharedCache, SharedSection
+from snapshot_store import SnapshotStore
+from werkzeug.wsgi import wrap_file
 
 app = Flask(__name__)
 app.config.from_object(config)
 
-# Global Data Cache
-data_cache = {
-    'invoices': [],
-    'journals': [],
-    'customers': [],
-    'overshoot': [],
-    'quotations': [],
-    'reconciliation': [],
-    'last_updated': None
-}
+# Fingerprinted copies of the static files, built once by ``python assets.py`` (workers only read the manifest)
+asset_manifest = assets.load(config.ASSET_BUILD_DIR) if config.ASSET_PIPELINE else None
+if asset_manifest is None:
+    if config.ASSET_PIPELINE:
+        print(f"WARNING: no asset build in {config.ASSET_BUILD_DIR} (run python assets.py); serving the unversioned "
+              f"/static files and full TTF fonts without preloads or long-lived caching")
+    asset_manifest = {'files': {}, 'preload': []}
+served_assets = set(asset_manifest['files'].values())
 
-CACHE_TTL_SECONDS = 5
-cache_lock = threading.Lock()
 
-def fetch_data_task():
-    """Background task to fetch data from Odoo and update cache."""
-    with cache_lock:
-        print("Starting background data fetch...")
-        uid, models = odoo_api.get_connection()
-        if not uid:
-            print("Failed to connect to Odoo.")
+def asset_url(name):
+    target = asset_manifest['files'].get(name)
+    if target is None:
+        return url_for('static', filename=name)
+    return url_for('serve_asset', filename=target)
+
+
+def preload_links():
+    return [{'href': url_for('serve_asset', filename=p['file']), 'as': p['as'], 'type': p['type']}
+            for p in asset_manifest['preload']]
+
+
+@app.context_processor
+def asset_helpers():
+    return {'asset_url': asset_url, 'preload_links': preload_links}
+
+# Sections whose endpoint wraps the rows in an object, e.g. {'data': [...]}
+SECTION_DATA_KEYS = {'quotations': 'data'}
+
+
+class Dashboard:
+    """Everything one tenant's panels are served from: cache, refresh engine, scheduler, encodings, indexes, stream.
+
+    The default tenant keeps the single-database cache and snapshot
+    directories; every other tenant gets a subdirectory named after it.
+    """
+
+    def __init__(self, tenant, leader=None):
+        self.tenant = tenant
+        self.data_cache = {
+            'invoices': [],
+            'journals': [],
+            'customers': [],
+            'overshoot': [],
+            'quotations': [],
+            'reconciliation': [],
+            'last_updated': None
+        }
+        self.cache_lock = threading.Lock()
+        # With several worker processes, one elected refresher polls Odoo and the rest read its snapshots
+        self.shared_cache = None
+        if config.SHARED_CACHE_DIR:
+            self.shared_cache = SharedCache(tenant.directory(config.SHARED_CACHE_DIR),
+                                            leader=leader.shared_cache if leader else None)
+        # Warm start: last run's sections and sync watermarks, so a restart does not begin from nothing
+        self.snapshot_store = SnapshotStore(tenant.directory(config.SNAPSHOT_DIR)) if config.SNAPSHOT_DIR else None
+        if self.snapshot_store is not None:
+            delta_sync.persistence[tenant.name] = self.snapshot_store
+        self.refresh_engine = RefreshEngine(self.data_cache, self.cache_lock, max_workers=config.REFRESH_MAX_WORKERS,
+                                            shared=self.shared_cache, snapshots=self.snapshot_store, tenant=tenant)
+        self.encoded_cache = EncodedCache()
+        self.refresh_engine.add_listener(self.publish_encoded)
+        # Per-section refresh intervals that follow each section's change rate and fetch cost
+        self.refresh_scheduler = AdaptiveScheduler(self.refresh_engine, fingerprint=self.published_digest,
+                                                   shared=self.shared_cache)
+        # Publish-time indexes answering paged/filtered/searched section queries
+        self.index_cache = IndexCache()
+        self.refresh_engine.add_listener(self.publish_index)
+        # Server-Sent Events: open screens get pushed patches instead of polling every section
+        self.event_broker = EventBroker(fingerprint=self.published_digest)
+        self.refresh_engine.add_listener(self.event_broker.publish_section)
+        # Counts and amount totals over time, recorded by the process that fetched them from Odoo
+        self.history = KpiHistory(tenant.directory(config.KPI_HISTORY_DIR) if config.KPI_HISTORY_DIR else None)
+        self.refresh_engine.add_result_listener(self.record_history)
+        self.next_follow = 0
+
+    def publish_encoded(self, name, data):
+        if self.shared_cache is not None and not self.shared_cache.is_refresher:
+            # Serve the refresher's encoded files instead of re-encoding the same rows
+            self.encoded_cache.set(name, self.shared_cache.read(name))
             return
+        # Serialize and compress once per publish instead of once per request
+        key = SECTION_DATA_KEYS.get(name)
+        rows = list(data)
+        snapshot = self.encoded_cache.put(name, {key: rows} if key else rows)
+        metrics.SERIALIZE_SECONDS.observe(snapshot.encode_seconds, section=name, kind='publish')
+        if self.shared_cache is not None:
+            columns = data if isinstance(data, ColumnarSnapshot) else ColumnarSnapshot(rows)
+            self.shared_cache.write(name, snapshot, len(rows), key, columns)
 
-        # Invoices
-        try:
-            data_cache['invoices'] = odoo_api.fetch_invoices(uid, models)
-        except Exception as e:
-            print(f"✗ Invoice fetch error: {e}")
+    def publish_index(self, name, data):
+        # A follower may never be asked to page a section: build its index on first use instead
+        follower = self.shared_cache is not None and not self.shared_cache.is_refresher
+        self.index_cache.put(name, data, lazy=follower)
 
-        # Journals
-        try:
-            data_cache['journals'] = odoo_api.fetch_journals(uid, models)
-        except Exception as e:
-            print(f"✗ Journal fetch error: {e}")
+    def record_history(self, name, ok):
+        if not ok:
+            return
+        with self.cache_lock:
+            data = self.data_cache.get(name)
+        self.history.record(name, data, self.refresh_engine.state[name].last_updated)
 
-        # Quotations
-        try:
-            data_cache['quotations'] = odoo_api.fetch_quotations(uid, models)
-        except Exception as e:
-            print(f"✗ Quotation fetch error: {e}")
+    def published_digest(self, name):
+        snapshot = self.encoded_cache.get(name)
+        return snapshot.digest if snapshot else None
 
-        # Customers
-        try:
-            data_cache['customers'] = odoo_api.fetch_customers(uid, models)
-        except Exception as e:
-            print(f"✗ Customer fetch error: {e}")
+    def fetch_all(self):
+        """Refresh every section in parallel, publishing each one as it completes."""
+        label = '' if self.tenant.default else f" for {self.tenant.name}"
+        print(f"Starting background data fetch{label}...")
+        if self.refresh_engine.refresh_all():
+            print(f"Data updated{label} at {time.strftime('%H:%M:%S')}")
+        else:
+            print(f"Data partially updated{label} at {time.strftime('%H:%M:%S')}")
 
-        # Overshoot
-        try:
-            data_cache['overshoot'] = odoo_api.fetch_overshoot(uid, models)
-        except Exception as e:
-            print(f"✗ Overshoot fetch error: {e}")
 
-        # Reconciliation
-        try:
-            data_cache['reconciliation'] = odoo_api.fetch_reconciliation(uid, models)
-        except Exception as e:
-            print(f"✗ Reconciliation fetch error: {e}")
+# One dashboard per configured tenant; the default tenant's holds the refresher election for all of them
+default_dashboard = Dashboard(tenants.default())
+dashboards = {tenants.default().name: default_dashboard}
+for _tenant in tenants.tenants.values():
+    if not _tenant.default:
+        dashboards[_tenant.name] = Dashboard(_tenant, leader=default_dashboard)
+
+# The default tenant under the single-database names
+refresh_engine = default_dashboard.refresh_engine
+refresh_scheduler = default_dashboard.refresh_scheduler
+shared_cache = default_dashboard.shared_cache
+cache_lock = default_dashboard.cache_lock
 
-        data_cache['last_updated'] = time.time()
-        print(f"Data updated at {time.strftime('%H:%M:%S')}")
+# Publish-time indexes answering paged/filtered/searched section queries
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+FACET_PARAMS = {'warehouse': 'warehouse_id', 'journal': 'journal_id', 'source': 'source'}
+QUERY_PARAMS = ('q', 'sort', 'offset', 'limit') + tuple(FACET_PARAMS)
 
+HISTORY_RESOLUTIONS = [name for name, _, _ in TIERS]
 
-def ensure_fresh_data():
-    if data_cache['last_updated'] is None:
-        fetch_data_task()
+# Server-Sent Events heartbeat
+STREAM_HEARTBEAT_SECONDS = 5
+
+def fetch_data_task():
+    """Refresh every section of every tenant, publishing each one as it completes."""
+    if len(dashboards) == 1:
+        default_dashboard.fetch_all()
         return
-    age = time.time() - data_cache['last_updated']
-    if age >= CACHE_TTL_SECONDS:
-        fetch_data_task()
+    # Tenants refresh side by side, sharing the RPC budget, rather than one after another
+    threads = [threading.Thread(target=dash.fetch_all, name=f"refresh-all-{name}") for name, dash in dashboards.items()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def dashboard_for(tenant):
+    """The dashboard a request addresses: ``/api/<tenant>/...``, or the default tenant under ``/api/...``."""
+    if tenant is None:
+        return default_dashboard
+    dash = dashboards.get(tenant)
+    if dash is None:
+        abort(make_response(jsonify({'error': f"unknown tenant {tenant!r}"}), 404))
+    return dash
+
+
+def section_response(tenant, name):
+    """Serve the last good snapshot immediately, revalidating in the background when stale.
+
+    Without query parameters the body comes pre-encoded from ``encoded_cache`` and a
+    matching If-None-Match gets a 304. With any of ``QUERY_PARAMS`` the request is
+    answered as a page from the section's publish-time index.
+    """
+    dash = dashboard_for(tenant)
+    ensure_scheduler()
+    dash.refresh_scheduler.touch(name)
+    max_age = dash.refresh_scheduler.max_age(name)
+    data, age = dash.refresh_engine.get_snapshot(name, max_age)
+    if any(param in request.args for param in QUERY_PARAMS):
+        response = section_page_response(dash, name, data)
+    else:
+        response = encoded_section_response(dash, name, data)
+    if age is not None:
+        metrics.AGE_AT_SERVE.observe(age, section=name, tenant=dash.tenant.name)
+        response.headers['X-Snapshot-Age'] = f"{age:.1f}"
+        response.headers['X-Snapshot-Stale'] = '1' if dash.refresh_engine.is_stale(name, max_age) else '0'
+    return response
+
+def encoded_section_response(dash, name, data):
+    snapshot = dash.encoded_cache.get(name)
+    encoding, body = snapshot.select(request.headers.get('Accept-Encoding')) if snapshot else (None, None)
+    if isinstance(snapshot, SharedSection) and not snapshot.matches(request.headers.get('If-None-Match')):
+        try:
+            body = open(body, 'rb')
+        except FileNotFoundError:
+            # Generation already cleaned up by the refresher; re-encode the rows this worker holds
+            snapshot = None
+    if snapshot is None:
+        key = SECTION_DATA_KEYS.get(name)
+        rows = list(data)
+        snapshot = EncodedSnapshot({key: rows} if key else rows)
+        metrics.SERIALIZE_SECONDS.observe(snapshot.encode_seconds, section=name, kind='fallback')
+        encoding, body = snapshot.select(request.headers.get('Accept-Encoding'))
+
+    if snapshot.matches(request.headers.get('If-None-Match')):
+        response = Response(status=304)
+    elif isinstance(snapshot, SharedSection):
+        # Streamed from the shared file (sendfile under servers that support wsgi.file_wrapper)
+        response = Response(wrap_file(request.environ, body), mimetype='application/json', direct_passthrough=True)
+        response.content_length = snapshot.size(encoding)
+    else:
+        response = Response(body, mimetype='application/json')
+    if encoding and response.status_code == 200:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['ETag'] = snapshot.etag(encoding)
+    response.headers['Vary'] = 'Accept-Encoding'
+    # Cacheable, but always revalidated: unchanged sections cost a 304
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def section_page_response(dash, name, data):
+    """``{'data', 'total', 'count', 'offset', 'limit'}`` for ?q=&warehouse=&journal=&source=&sort=&offset=&limit=."""
+    fields = index_fields(name)
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return make_response(jsonify({'error': 'offset and limit must be integers'}), 400)
+    sort = request.args.get('sort') or None
+    if sort is not None and sort.removeprefix('-') not in fields['sort']:
+        return make_response(jsonify({'error': f"sort must be one of {', '.join(fields['sort'])}, "
+                                               f"optionally prefixed with '-'"}), 400)
+    index = dash.index_cache.get(name)
+    if index is None:
+        index = SectionIndex(data, fields['text'], fields['facets'])
+
+    filters = {field: request.args.getlist(param) for param, field in FACET_PARAMS.items()}
+    total, rows = index.query(request.args.get('q'), filters, sort, offset, limit)
+    with metrics.SERIALIZE_SECONDS.time(section=name, kind='page'):
+        response = jsonify({'data': rows, 'total': total, 'count': len(index.rows), 'offset': offset, 'limit': limit})
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+_scheduler_pid = None
 
 def start_scheduler():
+    global _scheduler_pid
+    _scheduler_pid = os.getpid()
+
     def scheduler_loop():
-        fetch_data_task()
-        while True:
-            time.sleep(10)
+        # One loop for every tenant: their fetches share the global RPC budget, not a thread each
+        if refresh_engine.is_refresher():
             fetch_data_task()
+        while True:
+            now = time.time()
+            for dash in dashboards.values():
+                if dash.refresh_engine.is_refresher():
+                    # Only sections that are due and still being watched get fetched
+                    dash.refresh_scheduler.run_pending()
+                elif now >= dash.next_follow:
+                    # Followers only read the shared directory, so they can check it often
+                    dash.refresh_engine.refresh_all()
+                    dash.next_follow = now + config.SHARED_CACHE_POLL_SECONDS
+            time.sleep(min(config.SCHEDULER_TICK_SECONDS, config.SHARED_CACHE_POLL_SECONDS))
     
     t = threading.Thread(target=scheduler_loop, daemon=True)
     t.start()
 
-# API Endpoints
-@app.route('/')
-def index():
-    return render_template('index.html', odoo_url=app.config['ODOO_URL'])
-
-@app.route('/api/invoices')
-def get_invoices():
-    ensure_fresh_data()
-    return jsonify(data_cache['invoices'])
-
-@app.route('/api/journals')
-def get_journals():
-    ensure_fresh_data()
-    return jsonify(data_cache['journals'])
-
-@app.route('/api/quotations/pending')
-def get_quotations():
-    ensure_fresh_data()
-    return jsonify({'data': data_cache['quotations']})
-
-@app.route('/api/customers')
-def get_customers():
-    ensure_fresh_data()
-    return jsonify(data_cache['customers'])
-
-@app.route('/api/overshoot')
-def get_overshoot():
-    ensure_fresh_data()
-    return jsonify(data_cache['overshoot'])
-
-@app.route('/api/reconciliation')
-def get_reconciliation():
-    ensure_fresh_data()
-    return jsonify(data_cache['reconciliation'])
+def ensure_scheduler():
+    # Under a multi-process server nothing calls start_scheduler; each worker starts its own
+    # loop on first use (the elected one polls Odoo, the others follow the shared cache)
+    if shared_cache is not None and _scheduler_pid != os.getpid():
+        with cache_lock:
+            if _scheduler_pid != os.getpid():
+                start_scheduler()
+
+# API Endpoints: /api/... serves the default tenant, /api/<tenant>/... any configured one
+@app.route('/', defaults={'tenant': None})
+@app.route('/<tenant>/')
+def index(tenant):
+    dash = dashboard_for(tenant)
+    api_base = '/api' if tenant is None else f"/api/{tenant}"
+    response = make_response(render_template('index.html', odoo_url=dash.tenant.url, api_base=api_base))
+    # The page names the current fingerprints, so it is the one thing always revalidated
+    response.headers['Cache-Control'] = 'no-cache'
+    # Lets proxies that turn Link headers into 103 Early Hints start the font downloads before the HTML
+    for link in preload_links():
+        response.headers.add('Link', f'<{link["href"]}>; rel=preload; as={link["as"]}; type="{link["type"]}"; crossorigin')
+    return response
+
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    # Only files of the current build: no directory walking, no manifest.json
+    if filename not in served_assets:
+        abort(404)
+    encoding, path = assets.encoded_path(config.ASSET_BUILD_DIR, filename, request.headers.get('Accept-Encoding'))
+    response = send_file(path, mimetype=assets.content_type(filename), conditional=True, etag=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if filename.endswith(assets.COMPRESSIBLE):
+        response.headers['Vary'] = 'Accept-Encoding'
+    # The name changes with the content, so browsers never need to ask again
+    response.headers['Cache-Control'] = assets.IMMUTABLE
+    return response
+
+@app.route('/api/invoices', defaults={'tenant': None})
+@app.route('/api/<tenant>/invoices')
+def get_invoices(tenant):
+    return section_response(tenant, 'invoices')
+
+@app.route('/api/journals', defaults={'tenant': None})
+@app.route('/api/<tenant>/journals')
+def get_journals(tenant):
+    return section_response(tenant, 'journals')
+
+@app.route('/api/quotations/pending', defaults={'tenant': None})
+@app.route('/api/<tenant>/quotations/pending')
+def get_quotations(tenant):
+    return section_response(tenant, 'quotations')
+
+@app.route('/api/customers', defaults={'tenant': None})
+@app.route('/api/<tenant>/customers')
+def get_customers(tenant):
+    return section_response(tenant, 'customers')
+
+@app.route('/api/overshoot', defaults={'tenant': None})
+@app.route('/api/<tenant>/overshoot')
+def get_overshoot(tenant):
+    return section_response(tenant, 'overshoot')
+
+@app.route('/api/reconciliation', defaults={'tenant': None})
+@app.route('/api/<tenant>/reconciliation')
+def get_reconciliation(tenant):
+    return section_response(tenant, 'reconciliation')
+
+@app.route('/api/stream', defaults={'tenant': None})
+@app.route('/api/<tenant>/stream')
+def stream(tenant):
+    """Full snapshot on connect, then only the sections/rows that change on each publish.
+
+    ``?paged=quotations,journals`` names sections the client pages itself; those only get
+    ``changed`` notifications.
+    """
+    dash = dashboard_for(tenant)
+    ensure_scheduler()
+    # Only real section names: the broker caches a snapshot per distinct set
+    paged = [name for name in request.args.get('paged', '').split(',') if name in dash.refresh_engine.sections]
+    subscriber, snapshot = dash.event_broker.subscribe(paged)
+    dash.refresh_scheduler.touch()
+    dash.refresh_engine.revalidate_stale(dash.refresh_scheduler.max_age)
+
+    def generate():
+        try:
+            yield b"retry: 5000\n\n"
+            yield snapshot
+            while not subscriber.closed:
+                event = subscriber.next(timeout=STREAM_HEARTBEAT_SECONDS)
+                if event is None:
+                    # Idle tick: keep the connection alive; an open screen counts as watching every section
+                    dash.refresh_scheduler.touch()
+                    dash.refresh_engine.revalidate_stale(dash.refresh_scheduler.max_age)
+                    yield b": ping\n\n"
+                else:
+                    yield event
+        finally:
+            dash.event_broker.unsubscribe(subscriber)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/refresh/status', defaults={'tenant': None})
+@app.route('/api/<tenant>/refresh/status')
+def get_refresh_status(tenant):
+    dash = dashboard_for(tenant)
+    status = dash.refresh_engine.status()
+    for name in status:
+        status[name]['schedule'] = dash.refresh_scheduler.status(name)
+    return jsonify(status)
+
+@app.route('/api/history/<section>', defaults={'tenant': None})
+@app.route('/api/<tenant>/history/<section>')
+def get_history(tenant, section):
+    """Sparkline of a section's row count and amount total: ?resolution=10s|1m|1h&points=N, never asks Odoo."""
+    dash = dashboard_for(tenant)
+    if section not in dash.refresh_engine.sections:
+        return make_response(jsonify({'error': f"unknown section {section!r}"}), 404)
+    resolution = request.args.get('resolution', '1m')
+    if resolution not in HISTORY_RESOLUTIONS:
+        return make_response(jsonify({'error': f"resolution must be one of {', '.join(HISTORY_RESOLUTIONS)}"}), 400)
+    try:
+        points = int(request.args['points']) if 'points' in request.args else None
+    except ValueError:
+        points = 0
+    if points is not None and points <= 0:
+        return make_response(jsonify({'error': 'points must be a positive integer'}), 400)
+    try:
+        history = dash.history.query(section, resolution, points)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    response = jsonify(history)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/cache/memory', defaults={'tenant': None})
+@app.route('/api/<tenant>/cache/memory')
+def get_cache_memory(tenant):
+    return jsonify(dashboard_for(tenant).refresh_engine.memory())
+
+@app.route('/api/cache/records')
+def get_record_cache():
+    return jsonify(record_cache.cache.stats())
+
+@app.route('/api/connection/status', defaults={'tenant': None})
+@app.route('/api/<tenant>/connection/status')
+def get_connection_status(tenant):
+    dash = dashboard_for(tenant)
+    pool = dash.tenant.async_pool if dash.refresh_engine.event_loop is not None else dash.tenant.pool
+    return jsonify(pool.stats())
+
+@app.route('/api/schema', defaults={'tenant': None})
+@app.route('/api/<tenant>/schema')
+def get_schema_status(tenant):
+    schema = dashboard_for(tenant).tenant.schema.current()
+    return jsonify(schema.as_dict() if schema else {})
+
+@app.route('/api/tenants')
+def get_tenants():
+    """Configured tenants and how the shared RPC budget is currently split between them."""
+    return jsonify({
+        'tenants': [{'name': dash.tenant.name, 'db': dash.tenant.db, 'company_ids': dash.tenant.company_ids,
+                     'default': dash.tenant.default} for dash in dashboards.values()],
+        'budget': tenants.budget.stats(),
+    })
+
+@app.route('/metrics')
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+_profile_lock = threading.Lock()
+
+@app.route('/api/profile/refresh', methods=['POST'], defaults={'tenant': None})
+@app.route('/api/<tenant>/profile/refresh', methods=['POST'])
+def profile_refresh(tenant):
+    """Run one full refresh cycle under the sampling profiler and return its collapsed stacks."""
+    dash = dashboard_for(tenant)
+    if not config.PROFILER_ENABLED:
+        return make_response(jsonify({'error': 'profiler disabled, set PROFILER_ENABLED=1'}), 404)
+    if not dash.refresh_engine.is_refresher():
+        return make_response(jsonify({'error': 'this worker does not refresh from Odoo'}), 409)
+    if not _profile_lock.acquire(blocking=False):
+        return make_response(jsonify({'error': 'a profiled refresh is already running'}), 409)
+    try:
+        with SamplingProfiler(interval=config.PROFILER_INTERVAL_MS / 1000) as profiler:
+            dash.fetch_all()
+    finally:
+        _profile_lock.release()
+    response = Response(profiler.collapsed(), mimetype='text/plain')
+    response.headers['X-Profile-Samples'] = str(profiler.samples)
+    response.headers['X-Profile-Seconds'] = f"{profiler.seconds:.2f}"
+    return response
 
 if __name__ == '__main__':
     start_scheduler()
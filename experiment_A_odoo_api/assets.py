@@ -0,0 +1,230 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+
+import config
+from response_cache import accepted_encodings
+
+# Required by build() (WOFF2 needs brotli); the app itself only serves what was built
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+    from fontTools.varLib import instancer
+except ImportError:
+    subset = None
+
+# Source font -> wght range the stylesheet actually uses; every other axis is pinned to its default
+FONTS = {
+    'fonts/Roboto/Roboto-VariableFont_wdth,wght.ttf': {'wght': (300, 700)},
+    'fonts/Google_Sans_Flex (2)/GoogleSansFlex-VariableFont_GRAD,ROND,opsz,slnt,wdth,wght.ttf': {'wght': (500, 800)},
+    'fonts/Google_Sans_Code (2)/GoogleSansCode-VariableFont_wght.ttf': {'wght': (400, 700)},
+}
+# Fingerprinted as they are; style.css is rewritten first since it points at the fonts
+FILES = ('dashboard.js', 'asset/Group 199.svg', 'asset/filter.svg', 'asset/search-glass.svg')
+STYLESHEET = 'style.css'
+TEMPLATES = ('templates/index.html',)
+# Served pre-compressed next to the original
+COMPRESSIBLE = ('.css', '.js', '.svg')
+BROTLI_QUALITY = 11
+IMMUTABLE = 'public, max-age=31536000, immutable'
+CONTENT_TYPES = {
+    '.css': 'text/css',
+    '.js': 'text/javascript',
+    '.svg': 'image/svg+xml',
+    '.woff2': 'font/woff2',
+}
+
+FONT_FACE = re.compile(r'@font-face\s*\{[^}]*\}')
+# Non-greedy up to the closing quote, since font paths contain parentheses
+CSS_URL = re.compile(r"url\((['\"]?)(.*?)\1\)")
+
+
+def _digest(*parts):
+    h = hashlib.blake2b(digest_size=6)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else repr(part).encode())
+    return h.hexdigest()
+
+
+def _fingerprinted(path, digest, ext=None):
+    stem, original_ext = os.path.splitext(os.path.basename(path))
+    # Spaces, commas and parentheses in the source names would need escaping in CSS and HTML
+    stem = re.sub(r'[^A-Za-z0-9_-]+', '-', stem).strip('-')
+    return f"{stem}.{digest}{ext or original_ext}"
+
+
+def _write(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def parse_unicodes(spec):
+    """``U+0020-007E,U+00A0`` -> set of code points."""
+    points = set()
+    for part in spec.split(','):
+        part = part.strip().upper().replace('U+', '')
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        points.update(range(int(start, 16), int(end or start, 16) + 1))
+    return points
+
+
+def page_unicodes(static_dir):
+    """Code points of the configured ranges plus any literal text in the page, script and stylesheet."""
+    points = parse_unicodes(config.ASSET_FONT_UNICODES)
+    root = os.path.dirname(static_dir)
+    for path in [os.path.join(root, t) for t in TEMPLATES] + [os.path.join(static_dir, n) for n in
+                                                              ('dashboard.js', STYLESHEET)]:
+        with open(path, encoding='utf-8') as f:
+            points.update(ord(c) for c in f.read() if ord(c) > 0x7f)
+    return points
+
+
+def subset_font(data, weights, unicodes):
+    """``data`` cut down to ``unicodes`` and the ``weights`` axis ranges, as WOFF2 bytes."""
+    font = TTFont(io.BytesIO(data))
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.notdef_outline = True
+    # Glyphs first: instancing then only has the kept outlines to rewrite
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    if 'fvar' in font:
+        # None pins an axis (width, grade, optical size...) to its default
+        limits = {axis.axisTag: weights.get(axis.axisTag) for axis in font['fvar'].axes}
+        font = instancer.instantiateVariableFont(font, limits)
+    font.flavor = options.flavor
+    out = io.BytesIO()
+    font.save(out)
+    return out.getvalue()
+
+
+def _build_font(static_dir, out_dir, name, weights, unicodes):
+    with open(os.path.join(static_dir, name), 'rb') as f:
+        data = f.read()
+    # Named after its inputs so a rebuild with the same sources skips the (slow) subsetting
+    target = _fingerprinted(name, _digest(data, weights, sorted(unicodes)), '.woff2')
+    path = os.path.join(out_dir, target)
+    if not os.path.exists(path):
+        built = subset_font(data, weights, unicodes)
+        _write(path, built)
+        print(f"Subset {name}: {len(data) // 1024} KB -> {len(built) // 1024} KB woff2")
+    return target
+
+
+def _rewrite_font_faces(css, fonts):
+    """Point each @font-face at its built font, with the format and weight range it now has."""
+
+    def face(match):
+        block = match.group(0)
+        url = CSS_URL.search(block)
+        built = fonts.get(url.group(2)) if url else None
+        if built is None:
+            return block
+        target, weights = built
+        block = CSS_URL.sub(f"url('{target}')", block, count=1)
+        block = re.sub(r"format\([^)]*\)", "format('woff2-variations')", block, count=1)
+        if 'wght' in weights:
+            low, high = weights['wght']
+            block = re.sub(r'font-weight:[^;]*;', f'font-weight: {low} {high};', block, count=1)
+        return block
+
+    return FONT_FACE.sub(face, css)
+
+
+def _add(out_dir, manifest, name, data):
+    target = _fingerprinted(name, _digest(data))
+    path = os.path.join(out_dir, target)
+    if not os.path.exists(path):
+        _write(path, data)
+        if name.endswith(COMPRESSIBLE):
+            _write(path + '.gz', gzip.compress(data, compresslevel=9))
+            _write(path + '.br', brotli.compress(data, quality=BROTLI_QUALITY))
+    manifest['files'][name] = target
+
+
+def build(static_dir, out_dir):
+    """Subset the fonts, fingerprint every asset into ``out_dir`` and return the manifest.
+
+    The manifest maps each source name (as passed to ``url_for('static')``)
+    to its fingerprinted file and lists the fonts the page should preload.
+    It is also saved as ``manifest.json``; outputs already on disk are
+    reused, so only changed sources cost a rebuild.
+    """
+    missing = [name for name, module in (('fonttools', subset), ('brotli', brotli)) if module is None]
+    if missing:
+        # Shipping the full TTFs instead would put megabytes back in front of first paint
+        raise RuntimeError(f"Asset build needs {' and '.join(missing)}: pip install fonttools brotli")
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {'files': {}, 'preload': []}
+    unicodes = page_unicodes(static_dir)
+    fonts = {}
+    for name, weights in FONTS.items():
+        target = _build_font(static_dir, out_dir, name, weights, unicodes)
+        fonts[name] = (target, weights)
+        manifest['files'][name] = target
+        manifest['preload'].append({'file': target, 'as': 'font', 'type': content_type(target)})
+    with open(os.path.join(static_dir, STYLESHEET), encoding='utf-8') as f:
+        css = f.read()
+    _add(out_dir, manifest, STYLESHEET, _rewrite_font_faces(css, fonts).encode('utf-8'))
+    for name in FILES:
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            _add(out_dir, manifest, name, f.read())
+    _write(os.path.join(out_dir, 'manifest.json'), json.dumps(manifest, indent=1).encode('utf-8'))
+    return manifest
+
+
+def load(out_dir):
+    """The manifest ``python assets.py`` last wrote to ``out_dir``, or None if there is no build."""
+    try:
+        with open(os.path.join(out_dir, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def content_type(target):
+    return CONTENT_TYPES.get(os.path.splitext(target)[1], 'application/octet-stream')
+
+
+def encoded_path(out_dir, target, accept_encoding):
+    """``(encoding, path)`` of the best pre-compressed copy of ``target`` the client accepts."""
+    path = os.path.join(out_dir, target)
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in accepted and os.path.exists(path + suffix):
+            return encoding, path + suffix
+    return None, path
+
+
+def clean(out_dir, manifest):
+    """Remove fingerprinted files the manifest no longer references."""
+    keep = set(manifest['files'].values()) | {'manifest.json'}
+    for name in os.listdir(out_dir):
+        if name.removesuffix('.gz').removesuffix('.br') not in keep and not name.endswith('.tmp'):
+            os.remove(os.path.join(out_dir, name))
+
+
+if __name__ == '__main__':
+    here = os.path.dirname(os.path.abspath(__file__))
+    out = sys.argv[1] if len(sys.argv) > 1 else config.ASSET_BUILD_DIR
+    try:
+        built = build(os.path.join(here, 'static'), out)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    clean(out, built)
+    for source, target in built['files'].items():
+        print(f"{source} -> {target} ({os.path.getsize(os.path.join(out, target)) // 1024} KB)")
@@ -0,0 +1,187 @@
+import asyncio
+
+import config
+import delta_sync
+import odoo_api
+import odoo_schema
+import record_cache
+import record_stream
+import tenants
+import verdict_rules
+
+# asyncio versions of the odoo_api fetchers. Queries and row shaping come from odoo_api, so the two
+# backends return identical rows; here only the RPCs are awaited, and the CPU-heavy steps (verdict
+# classification, journal merge) run in a worker thread so they do not stall other sections' I/O.
+# Connections and schema belong to the tenant the running refresh was started for.
+
+# Tenant name -> asyncio.Lock, so one probe per tenant runs at a time
+_schema_locks = {}
+
+
+async def get_connection():
+    pool = tenants.current().async_pool
+    return await pool.get_uid(), pool.models
+
+
+async def execute_call(uid, models, call):
+    tenant = tenants.current()
+    return await models.execute_kw(tenant.db, uid, tenant.password, call.model, call.method, call.args, call.kwargs)
+
+
+async def get_schema(uid, models):
+    tenant = tenants.current()
+    schema = tenant.schema.fresh()
+    if schema is not None:
+        return schema
+    lock = _schema_locks.setdefault(tenant.name, asyncio.Lock())
+    async with lock:
+        # Another section may have probed while we waited
+        schema = tenant.schema.fresh()
+        if schema is not None:
+            return schema
+        version = None
+        try:
+            version = (await tenant.async_pool.version()).get('server_version')
+        except Exception as e:
+            print(f"Odoo version lookup error: {e}")
+        results = await models.execute_many(odoo_schema.probe_calls())
+        return tenant.schema.remember(odoo_schema.schema_from(version, *results))
+
+
+def search_read_pages(uid, models, model, domain, fields, stages=()):
+    # Id-keyset pages, like odoo_api.iter_search_read
+    return record_stream.RecordStream(uid, models, model, domain, fields, stages).apages()
+
+
+async def fetch_invoices(uid, models):
+    try:
+        schema = await get_schema(uid, models)
+        key, model, domain, fields = odoo_api.ORDER_WINDOW
+        orders = odoo_api.newest_first(await delta_sync.fetch_window_async(key, uid, models, model, domain, fields,
+                                                                           **odoo_api.order_window_kwargs()))
+
+        calls = odoo_api.invoice_state_calls(schema, orders)
+        inv_map = odoo_api.invoice_state_map(calls[0].model, await models.execute_many(calls)) if calls else {}
+        return await asyncio.to_thread(verdict_rules.incomplete_orders, orders, inv_map)
+    except Exception as e:
+        print(f"Fetch Incomplete Orders Error: {e}")
+        raise
+
+
+async def fetch_journals(uid, models):
+    try:
+        schema = await get_schema(uid, models)
+        deposit_batch = odoo_api.deposit_calls(schema)
+        journal_ids = schema.bank_journal_ids
+
+        moves = []
+        deposit_results = []
+        if journal_ids:
+            try:
+                moves, deposit_results = await delta_sync.fetch_window_with_async('journals.moves', uid, models,
+                    'account.move', odoo_api.journal_move_domain(journal_ids), odoo_api.JOURNAL_MOVE_FIELDS,
+                    order='date desc', also=deposit_batch
+                )
+                print(f"Found {len(moves)} account.move entries from these matched journals.")
+            except Exception as e:
+                print(f"Account move fetch error: {e}")
+                # No partial panel: the engine keeps the last good snapshot
+                raise
+        if deposit_batch and not deposit_results:
+            deposit_results = await models.execute_many(deposit_batch, return_exceptions=True)
+        deposits = odoo_api.deposits_from_results(deposit_results)
+
+        line_partners, unresolved = odoo_api.cached_move_partners(odoo_api.moves_missing_partner(moves))
+        if unresolved:
+            try:
+                lines = await execute_call(uid, models, odoo_api.partner_lines_call(unresolved))
+                fetched = odoo_api.partners_from_lines(lines)
+                odoo_api.remember_move_partners(unresolved, fetched)
+                line_partners.update(fetched)
+            except Exception as e:
+                print(f"Error fetching partners from lines: {e}")
+                raise
+
+        return await asyncio.to_thread(odoo_api.merge_journals, deposits, moves, line_partners,
+                                       schema.bank_journal_names)
+    except Exception as e:
+        print(f"Fetch Unposted Journals Error: {e}")
+        raise
+
+
+async def fetch_quotations(uid, models):
+    try:
+        return await delta_sync.fetch_window_async('quotations', uid, models, 'sale.order',
+            odoo_api.QUOTATION_DOMAIN, odoo_api.QUOTATION_FIELDS, order='date_order desc'
+        )
+    except Exception as e:
+        print(f"Fetch Quotations Error: {e}")
+        raise
+
+
+async def aggregate_by_partner(uid, models, model, domain, aggregates=None, partner_field='partner_id'):
+    aggregates = aggregates or {}
+    try:
+        rows = await execute_call(uid, models, odoo_api.read_group_call(model, domain, aggregates, partner_field))
+        return odoo_api.groups_from_read_group(rows, aggregates, partner_field)
+    except Exception as e:
+        print(f"read_group on {model} unavailable, aggregating locally: {e}")
+
+    groups = {}
+    fields = ['id', partner_field] + list(aggregates)
+    async for page in search_read_pages(uid, models, model, domain, fields):
+        odoo_api.fold_by_partner(page, aggregates, partner_field, groups)
+    return groups
+
+
+async def count_by_partner(uid, models, model, domain, partner_ids, partner_field='partner_id'):
+    if not partner_ids:
+        return {}
+    groups = await aggregate_by_partner(uid, models, model, odoo_api.count_domain(domain, partner_ids, partner_field),
+                                        partner_field=partner_field)
+    return odoo_api.counts_from_groups(partner_ids, groups)
+
+
+async def fetch_customers(uid, models):
+    try:
+        schema = await get_schema(uid, models)
+        call, has_code = odoo_api.customers_call(schema)
+        customers = odoo_api.keep_customers(await execute_call(uid, models, call), has_code)
+        order_counts = await count_by_partner(uid, models, 'sale.order', odoo_api.CUSTOMER_ORDER_DOMAIN,
+                                              [c['id'] for c in customers])
+        return odoo_api.customer_rows(customers, order_counts)
+    except Exception as e:
+        print(f"Fetch Customers Error: {e}")
+        raise
+
+
+async def fetch_overshoot(uid, models):
+    try:
+        totals_by_partner = await aggregate_by_partner(uid, models, 'sale.order', odoo_api.OVERSHOOT_DOMAIN,
+                                                       odoo_api.OVERSHOOT_AGGREGATES)
+        partner_ids = odoo_api.overshoot_partner_ids(totals_by_partner)
+        partners = await record_cache.cache.aresolve(uid, models, 'res.partner', partner_ids,
+                                                     odoo_api.OVERSHOOT_PARTNER_FIELDS,
+                                                     max_age=config.PARTNER_BALANCE_MAX_AGE) if partner_ids else []
+        return odoo_api.overshoot_rows(totals_by_partner, partners)
+    except Exception as e:
+        print(f"Fetch Overshoot Error: {e}")
+        raise
+
+
+async def fetch_reconciliation(uid, models):
+    try:
+        return await execute_call(uid, models, odoo_api.RECONCILIATION_CALL)
+    except Exception as e:
+        print(f"Fetch Reconciliation Error: {e}")
+        raise
+
+
+SECTIONS = [
+    ('invoices', fetch_invoices),
+    ('journals', fetch_journals),
+    ('quotations', fetch_quotations),
+    ('customers', fetch_customers),
+    ('overshoot', fetch_overshoot),
+    ('reconciliation', fetch_reconciliation),
+]
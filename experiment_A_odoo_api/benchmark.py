@@ -0,0 +1,215 @@
+"""End-to-end refresh benchmark against the local mock Odoo server.
+
+Reports refresh-cycle time, RPC count per cycle, peak Python memory and
+p50/p99 latency of the ``/api/*`` endpoints under concurrent dashboard
+clients, so fetcher regressions show up as numbers.
+
+    python benchmark.py --orders 100000 --latency 0.02 --clients 20
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import logging
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ENDPOINTS = [
+    '/api/invoices',
+    '/api/journals',
+    '/api/quotations/pending',
+    '/api/customers',
+    '/api/overshoot',
+    '/api/reconciliation',
+]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_cycle(app, mock, quiet=True):
+    mock.reset_counters()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        app.fetch_data_task()
+    duration = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': duration, 'rpc_count': mock.rpc_count, 'http_requests': mock.http_count, 'peak_bytes': peak,
+            'rpc_by_method': dict(mock.rpc_by_method)}
+
+
+def load_endpoints(port, clients, rounds):
+    latencies = {path: [] for path in ENDPOINTS}
+    errors = []
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        for _ in range(rounds):
+            for path in ENDPOINTS:
+                started = time.perf_counter()
+                try:
+                    conn.request('GET', path)
+                    response = conn.getresponse()
+                    response.read()
+                    ok = response.status == 200
+                except Exception as e:
+                    ok = False
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+                    errors.append(str(e))
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if ok:
+                        latencies[path].append(elapsed)
+                    else:
+                        errors.append(path)
+        conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    every = [v for values in latencies.values() for v in values]
+    return {
+        'requests': len(every),
+        'errors': len(errors),
+        'seconds': wall,
+        'p50': percentile(every, 50),
+        'p99': percentile(every, 99),
+        'by_endpoint': {path: {'p50': percentile(v, 50), 'p99': percentile(v, 99)} for path, v in latencies.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard refresh path against mock_odoo")
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--partners', type=int, default=2000)
+    parser.add_argument('--moves', type=int, default=15000)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every Odoo HTTP request")
+    parser.add_argument('--multicall', action='store_true', help="let the mock accept batched calls")
+    parser.add_argument('--protocol', choices=['xmlrpc', 'jsonrpc'], default=None)
+    parser.add_argument('--async', dest='use_async', action='store_true', help="refresh on the asyncio client")
+    parser.add_argument('--cycles', type=int, default=5, help="warm refresh cycles after the cold one")
+    parser.add_argument('--churn', type=int, default=50, help="records rewritten between warm cycles")
+    parser.add_argument('--clients', type=int, default=10, help="concurrent dashboard clients")
+    parser.add_argument('--rounds', type=int, default=5, help="six-endpoint rounds per client")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--verbose', action='store_true', help="keep fetcher log output")
+    parser.add_argument('--profile', metavar='FILE', help="sample the cold cycle and write collapsed stacks to FILE")
+    args = parser.parse_args()
+
+    # config reads the environment at import time, so point it at the mock first
+    odoo_port = _free_port()
+    os.environ['ODOO_URL'] = f"http://127.0.0.1:{odoo_port}"
+    if args.protocol:
+        os.environ['ODOO_PROTOCOL'] = args.protocol
+    if args.use_async:
+        os.environ['ODOO_ASYNC'] = '1'
+    # A cold cycle has to be cold: never warm-start from a previous run's snapshots
+    os.environ['SNAPSHOT_DIR'] = tempfile.mkdtemp(prefix='dashboard-bench-')
+
+    import mock_odoo
+    started = time.perf_counter()
+    mock = mock_odoo.MockOdoo(args.orders, args.partners, args.moves, latency=args.latency,
+                              multicall=args.multicall)
+    generated = time.perf_counter() - started
+    server = mock_odoo.serve(mock, port=odoo_port)
+
+    import app
+    from werkzeug.serving import make_server
+
+    profiler = None
+    if args.profile:
+        from sampling_profiler import SamplingProfiler
+        profiler = SamplingProfiler().start()
+    cold = run_cycle(app, mock, quiet=not args.verbose)
+    if profiler is not None:
+        profiler.stop()
+        with open(args.profile, 'w') as f:
+            f.write(profiler.collapsed())
+    warm = []
+    for _ in range(args.cycles):
+        mock.touch('sale.order', args.churn)
+        mock.touch('account.move', args.churn)
+        warm.append(run_cycle(app, mock, quiet=not args.verbose))
+
+    if not args.verbose:
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    memory = app.refresh_engine.memory()
+    http_server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    with contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext():
+        endpoints = load_endpoints(http_server.server_port, args.clients, args.rounds)
+    http_server.shutdown()
+    server.shutdown()
+
+    results = {
+        'dataset': {'orders': args.orders, 'partners': args.partners, 'moves': args.moves,
+                    'latency': args.latency, 'generate_seconds': generated},
+        'cold_cycle': cold,
+        'warm_cycles': {
+            'count': len(warm),
+            'median_seconds': statistics.median(c['seconds'] for c in warm) if warm else None,
+            'median_rpc_count': statistics.median(c['rpc_count'] for c in warm) if warm else None,
+            'median_http_requests': statistics.median(c['http_requests'] for c in warm) if warm else None,
+            'max_peak_bytes': max(c['peak_bytes'] for c in warm) if warm else None,
+        },
+        'endpoints': endpoints,
+        'cache_memory': memory,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    ms = lambda s: f"{s * 1000:.1f} ms" if s is not None else '-'
+    mib = lambda b: f"{b / 1048576:.1f} MiB" if b is not None else '-'
+    print(f"Dataset: {args.orders} orders, {args.partners} partners, {args.moves} bank moves, "
+          f"{args.latency * 1000:.0f} ms RPC latency (generated in {generated:.1f}s)")
+    print(f"Cold cycle:  {ms(cold['seconds'])}, {cold['rpc_count']} RPCs in {cold['http_requests']} HTTP requests, "
+          f"peak {mib(cold['peak_bytes'])}")
+    w = results['warm_cycles']
+    if warm:
+        print(f"Warm cycles: median {ms(w['median_seconds'])}, {w['median_rpc_count']} RPCs in "
+              f"{w['median_http_requests']} HTTP requests, "
+              f"peak {mib(w['max_peak_bytes'])} ({args.churn} rows churned per model)")
+    print(f"RPCs by method (cold): " + ', '.join(f"{k}={v}" for k, v in sorted(cold['rpc_by_method'].items())))
+    if memory:
+        columnar = sum(m['columnar_bytes'] for m in memory.values())
+        as_rows = sum(m['row_dict_bytes'] for m in memory.values())
+        per_section = ', '.join(f"{name}={mib(m['columnar_bytes'])}" for name, m in memory.items())
+        print(f"Cache:       {mib(columnar)} columnar vs ~{mib(as_rows)} as row dicts ({per_section})")
+    print(f"Endpoints:   {endpoints['requests']} requests from {args.clients} clients in {endpoints['seconds']:.2f}s, "
+          f"p50 {ms(endpoints['p50'])}, p99 {ms(endpoints['p99'])}, {endpoints['errors']} errors")
+    for path, stats in endpoints['by_endpoint'].items():
+        print(f"  {path:<26} p50 {ms(stats['p50']):>10}  p99 {ms(stats['p99']):>10}")
+    if profiler is not None:
+        print(f"Profile:     {profiler.samples} samples of the cold cycle written to {args.profile}; hottest leaves:")
+        for frame, count in profiler.top(8):
+            print(f"  {frame:<50} {count}")
+
+
+if __name__ == '__main__':
+    main()
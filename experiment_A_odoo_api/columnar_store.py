@@ -0,0 +1,405 @@
+import hashlib
+import json
+import struct
+import sys
+import zlib
+from array import array
+
+# Per-row null markers; a column only stores real values where the marker is PRESENT
+PRESENT, FALSE, NONE, ABSENT = 0, 1, 2, 3
+_NULLS = {FALSE: False, NONE: None}
+# Stands in for a field the row does not have at all
+MISSING = object()
+
+# Rows sampled to estimate what the same section costs as a list of dicts
+SIZE_SAMPLE_ROWS = 200
+# Binary snapshot format: magic, then zlib(header length, JSON header, raw column buffers)
+MAGIC = b'CSNAP1'
+# Uncompressed variant for mapping: the same header, then every buffer at an ALIGN-byte offset
+MAPPED_MAGIC = b'CSNAPM1\0'
+ALIGN = 8
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate retained size of plain JSON-like data (dicts, lists, scalars)."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+def _kind(values):
+    types = {type(v) for v in values}
+    if not types:
+        return 'null'
+    if types == {bool}:
+        return 'bool'
+    if types == {int}:
+        return 'int'
+    if types == {float}:
+        return 'float'
+    if types == {str}:
+        return 'str'
+    if types == {list} and all(len(v) == 2 and type(v[0]) is int and type(v[1]) is str for v in values):
+        return 'm2o'
+    return 'object'
+
+
+class _Dictionary:
+    """Interned values with a compact code per row."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+        self.codes = array('i')
+
+    def add(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def finish(self):
+        # The reverse lookup is only needed while building
+        self._codes = None
+        return self
+
+    def nbytes(self):
+        return (self.codes.itemsize * len(self.codes) + sys.getsizeof(self.values)
+                + sum(sys.getsizeof(v) for v in self.values))
+
+
+class Column:
+    """One field of a section: a null-marker byte per row plus a typed store of the present values.
+
+    ``int``/``float`` use ``array`` buffers, ``bool`` a bytearray, ``str`` a
+    dictionary of interned strings, ``m2o`` an id array plus a dictionary of
+    display names, and anything else falls back to a plain list.
+    """
+
+    def __init__(self, name, raw):
+        self.name = name
+        self.nulls = bytearray(len(raw))
+        present = []
+        for i, value in enumerate(raw):
+            if value is MISSING:
+                self.nulls[i] = ABSENT
+            elif value is None:
+                self.nulls[i] = NONE
+            else:
+                present.append(value)
+        self.kind = _kind(present)
+        if self.kind != 'bool':
+            # Odoo sends False for empty fields; only a real bool column keeps it as a value
+            for i, value in enumerate(raw):
+                if value is False and self.nulls[i] == PRESENT:
+                    self.nulls[i] = FALSE
+            kept = [v for v in present if v is not False]
+            self.kind = _kind(kept)
+            present = kept
+        # Position of each row's value in the store; only needed when nulls exist
+        self.positions = None
+        if any(self.nulls):
+            self.positions = array('i')
+            n = 0
+            for marker in self.nulls:
+                self.positions.append(n)
+                if marker == PRESENT:
+                    n += 1
+        self.store = self._build(present)
+
+    def _build(self, present):
+        if self.kind == 'int':
+            return array('q', present)
+        if self.kind == 'float':
+            return array('d', present)
+        if self.kind == 'bool':
+            return bytearray(present)
+        if self.kind == 'str':
+            store = _Dictionary()
+            for value in present:
+                store.add(value)
+            return store.finish()
+        if self.kind == 'm2o':
+            ids = array('q')
+            names = _Dictionary()
+            for rec_id, name in present:
+                ids.append(rec_id)
+                names.add(name)
+            return ids, names.finish()
+        return list(present)
+
+    def dump(self):
+        """``(descriptor, buffers)`` for the binary snapshot format."""
+        desc = {'name': self.name, 'kind': self.kind, 'positions': self.positions is not None}
+        buffers = [bytes(self.nulls)]
+        if self.positions is not None:
+            buffers.append(self.positions.tobytes())
+        if self.kind in ('int', 'float'):
+            buffers.append(self.store.tobytes())
+        elif self.kind == 'bool':
+            buffers.append(bytes(self.store))
+        elif self.kind == 'str':
+            buffers.append(self.store.codes.tobytes())
+            desc['values'] = self.store.values
+        elif self.kind == 'm2o':
+            ids, names = self.store
+            buffers += [ids.tobytes(), names.codes.tobytes()]
+            desc['values'] = names.values
+        else:
+            desc['values'] = self.store
+        desc['sizes'] = [len(b) for b in buffers]
+        return desc, buffers
+
+    @classmethod
+    def load(cls, desc, buffers, copy=True):
+        """Inverse of ``dump``; without ``copy`` the column reads the ``buffers`` memoryviews in place."""
+        column = cls.__new__(cls)
+        column.name = desc['name']
+        column.kind = desc['kind']
+        buffers = iter(buffers)
+
+        def raw(data):
+            return bytearray(data) if copy else data
+
+        def typed(typecode, data):
+            if not copy:
+                return data.cast(typecode)
+            values = array(typecode)
+            values.frombytes(data)
+            return values
+
+        column.nulls = raw(next(buffers))
+        column.positions = None
+        if desc['positions']:
+            column.positions = typed('i', next(buffers))
+
+        if column.kind == 'int':
+            column.store = typed('q', next(buffers))
+        elif column.kind == 'float':
+            column.store = typed('d', next(buffers))
+        elif column.kind == 'bool':
+            column.store = raw(next(buffers))
+        elif column.kind == 'str':
+            column.store = _Dictionary()
+            column.store.codes = typed('i', next(buffers))
+            column.store.values = desc['values']
+            column.store.finish()
+        elif column.kind == 'm2o':
+            names = _Dictionary()
+            ids = typed('q', next(buffers))
+            names.codes = typed('i', next(buffers))
+            names.values = desc['values']
+            column.store = ids, names.finish()
+        else:
+            column.store = desc['values']
+        return column
+
+    def get(self, i):
+        """Value for row ``i``; ``MISSING`` when the row never had this field."""
+        marker = self.nulls[i]
+        if marker != PRESENT:
+            return _NULLS.get(marker, MISSING)
+        n = self.positions[i] if self.positions is not None else i
+        if self.kind == 'bool':
+            return bool(self.store[n])
+        if self.kind == 'str':
+            return self.store.values[self.store.codes[n]]
+        if self.kind == 'm2o':
+            ids, names = self.store
+            return [ids[n], names.values[names.codes[n]]]
+        return self.store[n]
+
+    def nbytes(self):
+        size = len(self.nulls)
+        if self.positions is not None:
+            size += self.positions.itemsize * len(self.positions)
+        if self.kind in ('int', 'float'):
+            size += self.store.itemsize * len(self.store)
+        elif self.kind == 'bool':
+            size += len(self.store)
+        elif self.kind == 'str':
+            size += self.store.nbytes()
+        elif self.kind == 'm2o':
+            ids, names = self.store
+            size += ids.itemsize * len(ids) + names.nbytes()
+        elif self.kind == 'object':
+            size += deep_sizeof(self.store)
+        return size
+
+
+class ColumnarSnapshot:
+    """A published section held as columns instead of one dict per row.
+
+    It behaves like a read-only list of row dicts (``len``, indexing,
+    iteration), materializing rows on demand. While ``source`` is attached,
+    right after a fetch, iteration hands out the original rows so publish
+    listeners do not pay for a rebuild; ``release()`` drops them.
+    """
+
+    def __init__(self, rows):
+        rows = list(rows)
+        fields = {}
+        for row in rows:
+            for key in row:
+                fields.setdefault(key, None)
+        self.columns = [Column(field, [row.get(field, MISSING) for row in rows]) for field in fields]
+        self._by_name = {column.name: column for column in self.columns}
+        self._len = len(rows)
+        self._row_bytes = None
+        self.source = rows
+
+    def release(self):
+        if self.source is not None and self._row_bytes is None:
+            self._row_bytes = self._estimate_row_bytes(self.source)
+        self.source = None
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._len))]
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError(i)
+        if self.source is not None:
+            return self.source[i]
+        row = {}
+        for column in self.columns:
+            value = column.get(i)
+            if value is not MISSING:
+                row[column.name] = value
+        return row
+
+    def __iter__(self):
+        if self.source is not None:
+            return iter(self.source)
+        return (self[i] for i in range(self._len))
+
+    def column(self, field):
+        """All values of one field without building rows (``None`` where absent)."""
+        column = self._by_name.get(field)
+        if column is None:
+            return [None] * self._len
+        return [None if v is MISSING else v for v in map(column.get, range(self._len))]
+
+    def to_list(self):
+        return list(self)
+
+    def to_json(self):
+        return json.dumps(self.to_list(), separators=(',', ':'))
+
+    def _dump_columns(self, meta):
+        descriptors, chunks = [], []
+        for column in self.columns:
+            desc, buffers = column.dump()
+            descriptors.append(desc)
+            chunks += buffers
+        header = json.dumps({'rows': self._len, 'byteorder': sys.byteorder, 'meta': meta or {},
+                             'columns': descriptors}, separators=(',', ':')).encode('utf-8')
+        return header, chunks
+
+    def digest(self):
+        """Hex digest of the rows' columns, equal for snapshots of equal rows."""
+        header, chunks = self._dump_columns(None)
+        h = hashlib.blake2b(header, digest_size=12)
+        for chunk in chunks:
+            h.update(chunk)
+        return h.hexdigest()
+
+    def dumps(self, meta=None):
+        """Compact binary form: the column buffers as-is plus a small JSON header."""
+        header, chunks = self._dump_columns(meta)
+        return MAGIC + zlib.compress(struct.pack('<I', len(header)) + header + b''.join(chunks), 1)
+
+    def dumps_mapped(self, meta=None):
+        """Uncompressed form of ``dumps`` whose buffers ``mapped()`` can use without copying them."""
+        header, chunks = self._dump_columns(meta)
+        parts = [MAPPED_MAGIC, struct.pack('<I', len(header)), header]
+        offset = sum(map(len, parts))
+        for chunk in chunks:
+            # Typed views need their items aligned
+            padding = -offset % ALIGN
+            parts += [bytes(padding), chunk]
+            offset += padding + len(chunk)
+        return b''.join(parts)
+
+    @classmethod
+    def loads(cls, data):
+        """Inverse of ``dumps``: returns ``(snapshot, meta)``; raises ValueError on foreign data."""
+        if not data.startswith(MAGIC):
+            raise ValueError("not a columnar snapshot")
+        raw = zlib.decompress(data[len(MAGIC):])
+        (header_len,) = struct.unpack_from('<I', raw)
+        return cls._load_columns(raw, 4, header_len, align=1, copy=True)
+
+    @classmethod
+    def mapped(cls, buffer):
+        """Inverse of ``dumps_mapped`` over ``buffer`` (e.g. a read-only ``mmap``), reading it in place.
+
+        Only the header is parsed; the columns are views into ``buffer``, so
+        processes mapping the same file share one copy of it in the page cache.
+        """
+        view = memoryview(buffer)
+        if view[:len(MAPPED_MAGIC)] != MAPPED_MAGIC:
+            raise ValueError("not a mapped columnar snapshot")
+        (header_len,) = struct.unpack_from('<I', view, len(MAPPED_MAGIC))
+        return cls._load_columns(view, len(MAPPED_MAGIC) + 4, header_len, align=ALIGN, copy=False)
+
+    @classmethod
+    def _load_columns(cls, raw, start, header_len, align, copy):
+        header = json.loads(bytes(raw[start:start + header_len]))
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError("snapshot written on a machine with a different byte order")
+        offset = start + header_len
+        columns = []
+        for desc in header['columns']:
+            buffers = []
+            for size in desc['sizes']:
+                offset += -offset % align
+                if offset + size > len(raw):
+                    raise ValueError("truncated columnar snapshot")
+                buffers.append(raw[offset:offset + size])
+                offset += size
+            columns.append(Column.load(desc, buffers, copy))
+        snapshot = cls.__new__(cls)
+        snapshot.columns = columns
+        snapshot._by_name = {column.name: column for column in columns}
+        snapshot._len = header['rows']
+        snapshot._row_bytes = None
+        snapshot.source = None
+        return snapshot, header['meta']
+
+    def nbytes(self):
+        return sum(column.nbytes() for column in self.columns)
+
+    def _estimate_row_bytes(self, rows):
+        if not rows:
+            return sys.getsizeof(rows)
+        step = max(1, len(rows) // SIZE_SAMPLE_ROWS)
+        sample = rows[::step]
+        per_row = sum(deep_sizeof(row) for row in sample) / len(sample)
+        return int(sys.getsizeof(rows) + per_row * len(rows))
+
+    def memory(self):
+        """Footprint of this snapshot next to an estimate for the same rows as dicts."""
+        if self._row_bytes is None:
+            self._row_bytes = self._estimate_row_bytes(self.source if self.source is not None else self[:])
+        columnar = self.nbytes()
+        return {
+            'rows': self._len,
+            'columnar_bytes': columnar,
+            'row_dict_bytes': self._row_bytes,
+            'ratio': round(columnar / self._row_bytes, 3) if self._row_bytes else None,
+            'columns': {column.name: column.kind for column in self.columns},
+        }
@@ -6,6 +6,105 @@ ODOO_DB = os.getenv("ODOO_DB", "Testbed_restore")
 ODOO_USERNAME = os.getenv("ODOO_USERNAME", "admin")
 ODOO_PASSWORD = os.getenv("ODOO_PASSWORD", "n!md4")
 
+# Number of keep-alive XML-RPC connections shared by the refresh workers
+ODOO_POOL_SIZE = int(os.getenv("ODOO_POOL_SIZE", "4"))
+# "xmlrpc" or "jsonrpc" (JSON decoding is cheaper than XML for large search_read results)
+ODOO_PROTOCOL = os.getenv("ODOO_PROTOCOL", "xmlrpc")
+# Send independent calls together (system.multicall / JSON-RPC batch), falling back to concurrent calls
+ODOO_BATCH_CALLS = os.getenv("ODOO_BATCH_CALLS", "1") == "1"
+# Run the refresher as coroutines on one asyncio event loop instead of a thread per section
+ODOO_ASYNC = os.getenv("ODOO_ASYNC", "0") == "1"
+# Concurrent HTTP requests (each on its own keep-alive connection) allowed by the asyncio client
+ODOO_ASYNC_CONNECTIONS = int(os.getenv("ODOO_ASYNC_CONNECTIONS", "16"))
+# Rows per request when a search_read is streamed in id-keyset pages
+ODOO_PAGE_SIZE = int(os.getenv("ODOO_PAGE_SIZE", "2000"))
+# Request the next page in the background while the current one is being processed
+ODOO_PREFETCH = os.getenv("ODOO_PREFETCH", "1") == "1"
+
+# Several databases/companies: JSON object (or path to a JSON file) of tenant name ->
+# {"url", "db", "username", "password", "company_ids"}; missing keys fall back to the ODOO_* settings.
+# Empty: a single tenant built from the ODOO_* settings.
+ODOO_TENANTS = os.getenv("ODOO_TENANTS", "")
+# Tenant served under the unprefixed /api/... routes (default: the first one listed)
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "")
+# Odoo requests in flight at once across all tenants, split fairly between them (0: no global cap)
+ODOO_RPC_BUDGET = int(os.getenv("ODOO_RPC_BUDGET", "16"))
+
+# Refresh Engine Settings
+REFRESH_MAX_WORKERS = int(os.getenv("REFRESH_MAX_WORKERS", "4"))
+# Re-probe the Odoo version, models, fields and bank journal ids this often (also after a fault that may
+# mean the schema moved)
+SCHEMA_REFRESH_SECONDS = int(os.getenv("SCHEMA_REFRESH_SECONDS", "3600"))
+# Keep a local record store per model and only pull rows changed since the last write_date
+INCREMENTAL_SYNC = os.getenv("INCREMENTAL_SYNC", "1") == "1"
+# Each incremental sync re-reads rows written this many seconds before the watermark: write_date is stamped
+# when a transaction starts, so one that commits late can carry an older write_date than rows already synced
+SYNC_WATERMARK_LAG_SECONDS = int(os.getenv("SYNC_WATERMARK_LAG_SECONDS", "60"))
+# Adaptive refresh scheduling: per-section (min, max) seconds between refreshes; the interval moves
+# toward min while a section keeps changing and toward max while it stays the same
+SECTION_REFRESH_INTERVALS = {
+    'reconciliation': (10, 120),
+    'quotations': (10, 300),
+    'invoices': (30, 600),
+    'journals': (30, 600),
+    'customers': (60, 900),
+    'overshoot': (60, 900),
+}
+REFRESH_MIN_SECONDS = float(os.getenv("REFRESH_MIN_SECONDS", "10"))
+REFRESH_MAX_SECONDS = float(os.getenv("REFRESH_MAX_SECONDS", "300"))
+# Never refresh a section sooner than this many times its last fetch duration
+REFRESH_COST_FACTOR = float(os.getenv("REFRESH_COST_FACTOR", "10"))
+# Jittered exponential backoff after a failed fetch
+REFRESH_BACKOFF_BASE_SECONDS = float(os.getenv("REFRESH_BACKOFF_BASE_SECONDS", "5"))
+REFRESH_BACKOFF_MAX_SECONDS = float(os.getenv("REFRESH_BACKOFF_MAX_SECONDS", "300"))
+# Stop scheduled refreshes of a section nobody has requested for this long (0 = always refresh)
+REFRESH_IDLE_SECONDS = float(os.getenv("REFRESH_IDLE_SECONDS", "300"))
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "1"))
+# Orders classified for the incomplete-orders panel, newest first; 0 means every open order
+VERDICT_ORDER_LIMIT = int(os.getenv("VERDICT_ORDER_LIMIT", "0"))
+# Hold published sections as typed, dictionary-encoded columns instead of a dict per row
+COLUMNAR_CACHE = os.getenv("COLUMNAR_CACHE", "1") == "1"
+# Sections and sync watermarks saved here are served (as stale) right after a restart; empty disables
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"))
+# Memory-mapped KPI history rings (row counts and amount totals per section); empty keeps them in memory only
+KPI_HISTORY_DIR = os.getenv("KPI_HISTORY_DIR", os.path.join(SNAPSHOT_DIR, "history") if SNAPSHOT_DIR else "")
+
+# Static assets: serve the fingerprinted files `python assets.py` built under /assets/ with immutable caching
+ASSET_PIPELINE = os.getenv("ASSET_PIPELINE", "1") == "1"
+ASSET_BUILD_DIR = os.getenv("ASSET_BUILD_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "build"))
+# Code points kept in the subset fonts (Latin, Latin-1, Latin Extended-A, punctuation, currency, arrows)
+ASSET_FONT_UNICODES = os.getenv("ASSET_FONT_UNICODES",
+                                "U+0020-007E,U+00A0-017F,U+2000-206F,U+20A0-20BF,U+2122,U+2190-2193,U+2212,U+FFFD")
+
+# Record Cache Settings
+# Records read by id (partners, journals, ...) are cached process-wide: at most this many, least recently used out
+RECORD_CACHE_MAX_ENTRIES = int(os.getenv("RECORD_CACHE_MAX_ENTRIES", "50000"))
+# Per-model seconds before a cached record is revalidated against its write_date
+RECORD_CACHE_TTLS = {
+    'res.partner': 60,
+    'account.move': 300,
+    # Line partners of unposted moves (odoo_api.MOVE_PARTNER_NAMESPACE), not real account.move records
+    'account.move#line_partner': 300,
+    'account.journal': 3600,
+    'stock.warehouse': 3600,
+}
+RECORD_CACHE_DEFAULT_TTL = float(os.getenv("RECORD_CACHE_DEFAULT_TTL", "300"))
+# Partner balances are computed and do not bump write_date: re-read them at least this often
+PARTNER_BALANCE_MAX_AGE = float(os.getenv("PARTNER_BALANCE_MAX_AGE", "120"))
+
+# Shared Cache Settings (several worker processes, one Odoo poller)
+# Directory the elected refresher writes snapshots to; empty keeps the per-process cache
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR", "")
+# How often non-refresher workers check for new snapshots (and try to take over a dead refresher)
+SHARED_CACHE_POLL_SECONDS = float(os.getenv("SHARED_CACHE_POLL_SECONDS", "1"))
+# How long a cold worker waits for the refresher's first publish of a section
+SHARED_CACHE_WAIT_SECONDS = float(os.getenv("SHARED_CACHE_WAIT_SECONDS", "60"))
+
+# Diagnostics
+# Allow POST /api/profile/refresh to run one refresh cycle under the sampling profiler
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+
 # Flask App Settings
 DEBUG = True
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-key-change-in-prod")
@@ -0,0 +1,263 @@
+import asyncio
+import datetime
+import threading
+
+import config
+import odoo_transport
+import record_stream
+import tenants
+from odoo_transport import Call
+
+
+class RecordStore:
+    """Local mirror of one ``search_read`` window kept current with write_date deltas.
+
+    The first sync loads the whole window: an id-only ``search`` fixes its
+    membership and order, and the rows follow as a ``record_stream`` of
+    id-keyset pages (restricted to the window's ids when ``limit`` is set),
+    so no single response carries the whole window. After that each sync costs one
+    id-only ``search`` (membership, order and deletions) and one
+    ``search_read`` for rows written since the watermark, sent as a single
+    batch, plus a ``read`` for any ids that entered the window without being
+    written. The delta query starts ``SYNC_WATERMARK_LAG_SECONDS`` before the
+    watermark, so rows from transactions that committed late are still seen;
+    re-read rows that did not change leave the store as it was.
+    """
+
+    def __init__(self, model, domain, fields, order=None, limit=None):
+        self.model = model
+        self.domain = domain
+        self.fields = [f for f in fields if f != 'write_date']
+        self.order = order
+        self.limit = limit
+        self.records = {}
+        self.window_ids = []
+        self.watermark = None
+        # Bumped whenever the mirrored rows change, so persistence can skip no-op syncs
+        self.version = 0
+        self.lock = threading.Lock()
+        # Held by sync_async instead; one process runs either the threaded or the asyncio refresher
+        self.async_lock = asyncio.Lock()
+
+    def matches(self, model, domain, fields, order, limit):
+        return (self.model, self.domain, self.fields, self.order, self.limit) == \
+            (model, domain, [f for f in fields if f != 'write_date'], order, limit)
+
+    def sync(self, uid, models, also=()):
+        """Bring the store up to date and return ``(rows, also_results)``.
+
+        ``also`` holds independent calls the caller wants sent in the same
+        batch as the store's own; their results (or exceptions) come back in
+        order as ``also_results``.
+        """
+        tenant = tenants.current()
+        with self.lock:
+            calls = self._plan()
+            results = odoo_transport.execute_batch(models, tenant.db, uid, tenant.password,
+                                                   calls + list(also), return_exceptions=True)
+            own, also_results = _split(calls, results)
+            if self.watermark is None:
+                window_ids, first_page = own[0], own[1] if len(own) > 1 else None
+                stream = self._stream(uid, models, window_ids, first_page)
+                self._apply_full(window_ids, [r for page in stream.pages() for r in page])
+            else:
+                window_ids, changed = own
+                missing = self._missing(window_ids, changed)
+                entered = []
+                if missing:
+                    call = self._read_call(missing)
+                    entered = models.execute_kw(tenant.db, uid, tenant.password, call.model, call.method, call.args,
+                                                call.kwargs)
+                self._apply_delta(window_ids, changed, entered)
+            return self._rows(), also_results
+
+    async def sync_async(self, uid, models, also=()):
+        """``sync`` for the asyncio fetchers: ``models`` is an ``odoo_async.AsyncPooledModels``."""
+        tenant = tenants.current()
+        async with self.async_lock:
+            calls = self._plan()
+            results = await models.execute_many(calls + list(also), return_exceptions=True)
+            own, also_results = _split(calls, results)
+            if self.watermark is None:
+                window_ids, first_page = own[0], own[1] if len(own) > 1 else None
+                stream = self._stream(uid, models, window_ids, first_page)
+                self._apply_full(window_ids, [r async for page in stream.apages() for r in page])
+            else:
+                window_ids, changed = own
+                missing = self._missing(window_ids, changed)
+                entered = []
+                if missing:
+                    call = self._read_call(missing)
+                    entered = await models.execute_kw(tenant.db, uid, tenant.password, call.model, call.method,
+                                                      call.args, call.kwargs)
+                self._apply_delta(window_ids, changed, entered)
+            return self._rows(), also_results
+
+    def _rows(self):
+        return [self.records[i] for i in self.window_ids if i in self.records]
+
+    def _window_kwargs(self):
+        kwargs = {}
+        if self.order:
+            kwargs['order'] = self.order
+        if self.limit:
+            kwargs['limit'] = self.limit
+        return kwargs
+
+    def _plan(self):
+        fields = self.fields + ['write_date']
+        if self.watermark is None:
+            calls = [Call(self.model, 'search', [self.domain], self._window_kwargs())]
+            if not self.limit:
+                # Unlimited, the window is the whole domain: its first page can ride in the same batch
+                calls.append(record_stream.page_call(self.model, self.domain, fields, 0, config.ODOO_PAGE_SIZE))
+            return calls
+        since = _lagged(self.watermark, config.SYNC_WATERMARK_LAG_SECONDS)
+        return [
+            Call(self.model, 'search', [self.domain], self._window_kwargs()),
+            # '>=' so rows written in the same second as the watermark are not missed
+            Call(self.model, 'search_read', [self.domain + [['write_date', '>=', since]]], {'fields': fields}),
+        ]
+
+    def _stream(self, uid, models, window_ids, first_page):
+        # A limited window pages over its own ids rather than the whole domain; the stage drops
+        # records that joined the domain between the search and their page
+        window = set(window_ids)
+        domain = self.domain + [['id', 'in', sorted(window)]] if self.limit else self.domain
+        return record_stream.RecordStream(uid, models, self.model, domain, self.fields + ['write_date'],
+                                          stages=[lambda r: r if r['id'] in window else None],
+                                          page_size=config.ODOO_PAGE_SIZE, first_page=first_page)
+
+    def _apply_full(self, window_ids, rows):
+        watermark = _max_write_date(rows, None)
+        self.records = {r['id']: r for r in rows}
+        # Records deleted between the search and their page drop out
+        self.window_ids = [i for i in window_ids if i in self.records]
+        self.watermark = watermark
+        self.version += 1
+
+    def _missing(self, window_ids, changed):
+        # Ids that entered the window without being written since the watermark
+        window = set(window_ids)
+        known = set(self.records).union(r['id'] for r in changed if r['id'] in window)
+        return [i for i in window_ids if i not in known]
+
+    def _read_call(self, ids):
+        return Call(self.model, 'read', [ids], {'fields': self.fields + ['write_date']})
+
+    def _apply_delta(self, window_ids, changed, entered):
+        window = set(window_ids)
+        changed = [r for r in changed if r['id'] in window]
+        # Only mutate the store once every RPC has succeeded
+        watermark = _max_write_date(changed + entered, self.watermark)
+        # The lag overlap hands back rows already mirrored; only real changes count
+        updated = [r for r in changed + entered if self.records.get(r['id']) != r]
+        records = {i: r for i, r in self.records.items() if i in window}
+        for r in updated:
+            records[r['id']] = r
+        if updated or window_ids != self.window_ids:
+            self.version += 1
+        self.records = records
+        self.window_ids = window_ids
+        self.watermark = watermark
+
+
+def _split(calls, results):
+    own, also_results = results[:len(calls)], results[len(calls):]
+    for r in own:
+        if isinstance(r, Exception):
+            raise r
+    return own, also_results
+
+
+def _lagged(watermark, seconds):
+    """``watermark`` (an Odoo ``write_date`` string) moved ``seconds`` earlier."""
+    if not seconds:
+        return watermark
+    try:
+        moment = datetime.datetime.fromisoformat(watermark)
+    except (TypeError, ValueError):
+        return watermark
+    return (moment - datetime.timedelta(seconds=seconds)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _max_write_date(rows, current):
+    watermark = current
+    for r in rows:
+        wd = r.pop('write_date', None)
+        if wd and (watermark is None or wd > watermark):
+            watermark = wd
+    return watermark
+
+
+# (tenant name, key) -> RecordStore
+_stores = {}
+_stores_lock = threading.Lock()
+# Tenant name -> ``snapshot_store.SnapshotStore``: stores resume from their saved watermark after a restart
+persistence = {}
+
+
+def fetch_window(key, uid, models, model, domain, fields, order=None, limit=None):
+    """``search_read`` replacement that syncs incrementally when enabled in config."""
+    rows, _ = fetch_window_with(key, uid, models, model, domain, fields, order, limit)
+    return rows
+
+
+def fetch_window_with(key, uid, models, model, domain, fields, order=None, limit=None, also=()):
+    """Like ``fetch_window`` but batches the independent ``also`` calls with the window's own."""
+    if not config.INCREMENTAL_SYNC:
+        # A throwaway store: the same search plus paged load, nothing kept for the next call
+        return RecordStore(model, domain, fields, order, limit).sync(uid, models, also)
+    tenant = tenants.current()
+    store = _store(tenant, key, model, domain, fields, order, limit)
+    rows, also_results = store.sync(uid, models, also)
+    _save(tenant, key, store)
+    return rows, also_results
+
+
+async def fetch_window_async(key, uid, models, model, domain, fields, order=None, limit=None):
+    rows, _ = await fetch_window_with_async(key, uid, models, model, domain, fields, order, limit)
+    return rows
+
+
+async def fetch_window_with_async(key, uid, models, model, domain, fields, order=None, limit=None, also=()):
+    """``fetch_window_with`` over ``odoo_async`` models; the same stores back both."""
+    if not config.INCREMENTAL_SYNC:
+        return await RecordStore(model, domain, fields, order, limit).sync_async(uid, models, also)
+    tenant = tenants.current()
+    store = _store(tenant, key, model, domain, fields, order, limit)
+    rows, also_results = await store.sync_async(uid, models, also)
+    # Compressing the saved window is CPU work; keep it off the event loop
+    await asyncio.to_thread(_save, tenant, key, store)
+    return rows, also_results
+
+
+def _store(tenant, key, model, domain, fields, order, limit):
+    with _stores_lock:
+        store = _stores.get((tenant.name, key))
+        if store is None or not store.matches(model, domain, fields, order, limit):
+            store = RecordStore(model, domain, fields, order, limit)
+            saved = persistence.get(tenant.name)
+            if saved is not None and saved.load_store(key, store):
+                print(f"Resuming {tenant.qualify(key)} sync from saved watermark {store.watermark}")
+            _stores[(tenant.name, key)] = store
+    return store
+
+
+def _save(tenant, key, store):
+    saved = persistence.get(tenant.name)
+    if saved is not None:
+        try:
+            saved.save_store(key, store)
+        except OSError as e:
+            print(f"Could not save {tenant.qualify(key)} sync state: {e}")
+
+
+def reset(key=None, tenant=None):
+    with _stores_lock:
+        if key is None and tenant is None:
+            _stores.clear()
+        else:
+            for name, k in list(_stores):
+                if (key is None or k == key) and (tenant is None or name == tenant):
+                    del _stores[(name, k)]
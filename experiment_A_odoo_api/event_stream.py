@@ -0,0 +1,135 @@
+import json
+import queue
+import threading
+
+# A patch touching more than this share of a section's rows is sent as a full section instead
+FULL_SECTION_RATIO = 0.5
+SUBSCRIBER_QUEUE_SIZE = 64
+
+
+def sse_event(event, payload):
+    data = json.dumps(payload, separators=(',', ':'))
+    return f"event: {event}\ndata: {data}\n\n".encode('utf-8')
+
+
+def diff_rows(old_rows, new_rows):
+    """Row-level patch between two snapshots of a section, keyed by each row's ``id``.
+
+    Returns ``None`` when the rows cannot be keyed, ``{}`` when nothing changed.
+    """
+    old_rows, new_rows = list(old_rows), list(new_rows)
+    if any('id' not in r for r in new_rows):
+        return None
+    old_index = {r['id']: r for r in old_rows}
+    new_ids = [r['id'] for r in new_rows]
+    upsert = [r for r in new_rows if old_index.get(r['id']) != r]
+    new_set = set(new_ids)
+    remove = [rid for rid in old_index if rid not in new_set]
+    patch = {}
+    if upsert:
+        patch['upsert'] = upsert
+    if remove:
+        patch['remove'] = remove
+    if new_ids != [r['id'] for r in old_rows]:
+        patch['order'] = new_ids
+    return patch
+
+
+class Subscriber:
+    def __init__(self, paged=()):
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+        # Sections this client pages from the server: it only needs to hear that they changed
+        self.paged = frozenset(paged)
+
+    def next(self, timeout):
+        """Next encoded event, or ``None`` if nothing arrived within ``timeout``."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """Fans published section changes out to SSE subscribers.
+
+    Every change is diffed and encoded once, then the same bytes are queued
+    for each subscriber, so the cost of a publish does not grow with the
+    number of open screens. A subscriber that falls too far behind is closed
+    and resynchronises from a fresh snapshot when its EventSource reconnects.
+
+    ``fingerprint(name)``, when given, returns a digest of what was just
+    published; a publish with the same digest as the last one sends nothing.
+    Rows are only diffed and encoded while some subscriber receives them.
+    """
+
+    def __init__(self, fingerprint=None):
+        self.sections = {}
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._snapshot_bytes = {}
+        self._fingerprint = fingerprint
+        self._digests = {}
+
+    def subscribe(self, paged=()):
+        """Register a subscriber and return it with the full snapshot it should start from.
+
+        Sections listed in ``paged`` are left out of the snapshot and announced
+        with a small ``changed`` event instead of rows.
+        """
+        subscriber = Subscriber(paged)
+        with self._lock:
+            snapshot = self._snapshot_bytes.get(subscriber.paged)
+            if snapshot is None:
+                sections = {name: list(rows) for name, rows in self.sections.items() if name not in subscriber.paged}
+                snapshot = self._snapshot_bytes[subscriber.paged] = sse_event('snapshot', {'sections': sections})
+            self._subscribers.add(subscriber)
+            return subscriber, snapshot
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _rows_event(self, name, old_rows, rows):
+        """The ``section`` or ``patch`` event taking ``old_rows`` to ``rows``; ``None`` if nothing changed."""
+        if old_rows is None:
+            return sse_event('section', {'section': name, 'rows': list(rows)})
+        patch = diff_rows(old_rows, rows)
+        if patch == {}:
+            return None
+        changed = len(patch.get('upsert', ())) + len(patch.get('remove', ())) if patch else None
+        if patch is None or changed > FULL_SECTION_RATIO * max(len(rows), 1):
+            return sse_event('section', {'section': name, 'rows': list(rows)})
+        patch['section'] = name
+        return sse_event('patch', patch)
+
+    def publish_section(self, name, rows):
+        digest = self._fingerprint(name) if self._fingerprint else None
+        with self._lock:
+            old_rows = self.sections.get(name)
+            unchanged = digest is not None and self._digests.get(name) == digest
+            self._digests[name] = digest
+            self.sections[name] = rows
+            if unchanged:
+                return
+            self._snapshot_bytes = {}
+            if not self._subscribers:
+                # Nobody to tell: the rows wait for the next subscriber's snapshot
+                return
+            event = None
+            if any(name not in subscriber.paged for subscriber in self._subscribers):
+                event = self._rows_event(name, old_rows, rows)
+                if event is None:
+                    return
+            # Subscribers paging this section only hear that it changed
+            notice = sse_event('changed', {'section': name, 'count': len(rows)})
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.queue.put_nowait(notice if name in subscriber.paged else event)
+                except queue.Full:
+                    subscriber.closed = True
+                    self._subscribers.discard(subscriber)
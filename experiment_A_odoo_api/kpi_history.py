@@ -0,0 +1,214 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): one process per history directory
+    fcntl = None
+
+# (name, seconds per bucket, buckets kept): an hour of 10 s points, a day of minutes, a month of hours
+TIERS = (('10s', 10, 360), ('1m', 60, 1440), ('1h', 3600, 720))
+# Summed row field per section, recorded next to the row count (sections without one record 0)
+AMOUNT_FIELDS = {
+    'invoices': 'amount_total',
+    'journals': 'amount',
+    'quotations': 'amount_total',
+    'overshoot': 'delta',
+    'reconciliation': 'amount',
+}
+
+MAGIC = b'KPIRING1'
+HEADER = struct.Struct('<8sI')
+# Next slot to write, slots filled so far
+TIER_HEADER = struct.Struct('<qq')
+# Bucket start, samples, rows sum, rows last, amount sum, amount last
+SLOT = struct.Struct('<dddddd')
+
+
+def _layout():
+    offsets, offset = [], HEADER.size
+    for _, _, capacity in TIERS:
+        offsets.append(offset)
+        offset += TIER_HEADER.size + capacity * SLOT.size
+    return offsets, offset
+
+
+TIER_OFFSETS, FILE_SIZE = _layout()
+
+
+def _blank():
+    buf = bytearray(FILE_SIZE)
+    HEADER.pack_into(buf, 0, MAGIC, len(TIERS))
+    return buf
+
+
+@contextmanager
+def _flocked(f, mode):
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(f, getattr(fcntl, mode))
+    try:
+        yield
+    finally:
+        # Explicitly: the mmap holds a dup of the descriptor, so closing the file would not release it
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _valid(f):
+    f.seek(0)
+    return f.read(HEADER.size) == HEADER.pack(MAGIC, len(TIERS)) and os.fstat(f.fileno()).st_size == FILE_SIZE
+
+
+def _open_writable(path):
+    """Map ``path`` read/write, first creating or repairing it in place under an exclusive flock.
+
+    In place rather than tmp + rename, so every process mapping the file keeps
+    sharing one inode; the lock keeps two writers from initializing it at once.
+    """
+    with open(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b') as f, _flocked(f, 'LOCK_EX'):
+        if not _valid(f):
+            # Overwrite before truncating: readers only ever map valid, full-size files
+            f.seek(0)
+            f.write(_blank())
+            f.truncate()
+            f.flush()
+        return mmap.mmap(f.fileno(), FILE_SIZE)
+
+
+def _open_readonly(path):
+    """Map an existing valid ring read-only, or ``None`` while no writer has created it."""
+    try:
+        with open(path, 'rb') as f, _flocked(f, 'LOCK_SH'):
+            if not _valid(f):
+                return None
+            return mmap.mmap(f.fileno(), FILE_SIZE, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+
+
+class RingSeries:
+    """Row count and amount total of one section over time, in fixed-size ring buffers.
+
+    Every sample lands in all tiers at once; each tier folds the samples of
+    one bucket (10 s, 1 min, 1 h) into a single slot and overwrites its
+    oldest slot when a new bucket starts, so downsampling costs nothing
+    extra and the memory never grows. With a ``path`` the buffers live in
+    a memory-mapped file: they survive restarts, and processes mapping the
+    same file see the refresher's writes without copying anything.
+    """
+
+    def __init__(self, path=None, writable=True):
+        self.path = path
+        if not path:
+            self.buf = mmap.mmap(-1, FILE_SIZE)
+            self.buf[:] = _blank()
+        else:
+            # Only the process recording samples (the refresher) creates or repairs the file
+            self.buf = _open_writable(path) if writable else _open_readonly(path)
+        self._lock = threading.Lock()
+
+    def record(self, rows, amount, at=None):
+        at = time.time() if at is None else at
+        with self._lock:
+            for (_, seconds, capacity), offset in zip(TIERS, TIER_OFFSETS):
+                self._record_tier(offset, seconds, capacity, rows, amount, at)
+
+    def _record_tier(self, offset, seconds, capacity, rows, amount, at):
+        head, filled = TIER_HEADER.unpack_from(self.buf, offset)
+        bucket = at - at % seconds
+        if filled:
+            last = offset + TIER_HEADER.size + (head - 1) % capacity * SLOT.size
+            start, n, rows_sum, _, amount_sum, _ = SLOT.unpack_from(self.buf, last)
+            if start == bucket:
+                SLOT.pack_into(self.buf, last, start, n + 1, rows_sum + rows, rows, amount_sum + amount, amount)
+                return
+            if bucket < start:
+                # Clock went backwards: keep the series monotonic
+                return
+        slot = offset + TIER_HEADER.size + head % capacity * SLOT.size
+        SLOT.pack_into(self.buf, slot, bucket, 1, rows, rows, amount, amount)
+        TIER_HEADER.pack_into(self.buf, offset, (head + 1) % capacity, min(filled + 1, capacity))
+
+    def points(self, tier, limit=None):
+        """Oldest-first ``(bucket start, mean rows, mean amount, last rows, last amount)`` of one tier."""
+        names = [name for name, _, _ in TIERS]
+        if tier not in names:
+            raise ValueError(f"unknown tier {tier!r}, expected one of {', '.join(names)}")
+        if limit is not None and limit <= 0:
+            raise ValueError(f"limit must be positive, got {limit}")
+        index = names.index(tier)
+        _, _, capacity = TIERS[index]
+        offset = TIER_OFFSETS[index]
+        if self.buf is None:
+            return []
+        with self._lock:
+            head, filled = TIER_HEADER.unpack_from(self.buf, offset)
+            count = filled if limit is None else min(filled, limit)
+            out = []
+            for k in range(count, 0, -1):
+                slot = offset + TIER_HEADER.size + (head - k) % capacity * SLOT.size
+                start, n, rows_sum, rows_last, amount_sum, amount_last = SLOT.unpack_from(self.buf, slot)
+                out.append((start, rows_sum / n, amount_sum / n, rows_last, amount_last))
+        return out
+
+    def close(self):
+        if self.buf is not None:
+            self.buf.close()
+
+
+class KpiHistory:
+    """Per-section ``RingSeries`` of one dashboard, fed after every Odoo refresh of a section."""
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._series = {}
+        # Read-only maps of rings another process (the refresher) writes
+        self._readers = {}
+        self._lock = threading.Lock()
+
+    def series(self, name, writable=True):
+        """The section's ring; read-only (and left unopened until a writer creates it) for ``query`` alone."""
+        with self._lock:
+            series = self._series.get(name)
+            if series is None and not writable and self.directory:
+                series = self._readers.get(name)
+                if series is None:
+                    series = RingSeries(os.path.join(self.directory, f"{name}.ring"), writable=False)
+                    if series.buf is not None:
+                        self._readers[name] = series
+                return series
+            if series is None:
+                path = os.path.join(self.directory, f"{name}.ring") if self.directory else None
+                series = self._series[name] = RingSeries(path)
+            return series
+
+    def record(self, name, rows, at=None):
+        field = AMOUNT_FIELDS.get(name)
+        amount = 0.0
+        if field:
+            values = rows.column(field) if hasattr(rows, 'column') else (r.get(field) for r in rows)
+            amount = float(sum(v for v in values if isinstance(v, (int, float))))
+        self.series(name).record(len(rows), amount, at)
+
+    def query(self, name, tier='1m', limit=None):
+        """Sparkline columns plus the change over the window, read straight from the ring."""
+        points = self.series(name, writable=False).points(tier, limit)
+        result = {
+            'section': name,
+            'resolution': tier,
+            't': [p[0] for p in points],
+            'rows': [round(p[1], 2) for p in points],
+            'amount': [round(p[2], 2) for p in points],
+        }
+        if points:
+            result['latest'] = {'rows': points[-1][3], 'amount': points[-1][4]}
+            result['change'] = {'rows': points[-1][3] - points[0][3],
+                                'amount': round(points[-1][4] - points[0][4], 2)}
+        return result
@@ -0,0 +1,149 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) shared by every latency histogram: 1 ms .. 60 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Snapshot age at serve time lives on the refresh-interval scale
+AGE_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 900, 1800, 3600)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named family of time series, one per combination of label values."""
+
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(n, '') for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            lines += [line for key, value in series for line in self._render_series(key, value)]
+        return lines
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram in the Prometheus text format."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_series(self, key, value):
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = 'le="' + _number(bound) + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [le])} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+REGISTRY = []
+
+RPC_SECONDS = Histogram('odoo_rpc_duration_seconds', "Odoo execute_kw round trip, by model and method",
+                        ('tenant', 'model', 'method'))
+RPC_ERRORS = Counter('odoo_rpc_errors_total', "Odoo calls that raised or came back as a fault",
+                     ('tenant', 'model', 'method'))
+RPC_ROWS = Counter('odoo_rpc_rows_total', "Records returned by Odoo calls", ('tenant', 'model', 'method'))
+RPC_BYTES = Counter('odoo_rpc_response_bytes_total', "Response body bytes received from Odoo",
+                    ('tenant', 'model', 'method'))
+REFRESH_SECONDS = Histogram('section_refresh_duration_seconds', "Fetch and publish time of one section",
+                            ('tenant', 'section', 'result'))
+SECTION_ROWS = Gauge('section_rows', "Rows in the last published snapshot of a section", ('tenant', 'section'))
+AGE_AT_SERVE = Histogram('section_age_at_serve_seconds', "Age of the snapshot a section request was answered with",
+                         ('tenant', 'section'), buckets=AGE_BUCKETS)
+LOCK_WAIT = Histogram('lock_wait_seconds', "Time spent waiting to acquire a lock", ('lock',))
+SERIALIZE_SECONDS = Histogram('response_serialize_seconds', "Time to serialize and compress a response body",
+                              ('section', 'kind'))
+
+
+@contextmanager
+def timed_lock(lock, name):
+    """``with lock`` that records how long the acquire waited under ``lock_wait_seconds{lock=name}``."""
+    started = time.perf_counter()
+    with lock:
+        LOCK_WAIT.observe(time.perf_counter() - started, lock=name)
+        yield
+
+
+def row_count(result):
+    return len(result) if isinstance(result, list) else 0
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,433 @@
+"""Stand-in Odoo server for local benchmarking.
+
+Serves synthetic ``sale.order``, ``account.move``, ``res.partner``,
+``bank.deposit`` and ``account.bank.statement.line`` data (plus the
+supporting journal/line/ir.model records the fetchers touch) over
+``/xmlrpc/2/common``, ``/xmlrpc/2/object`` and ``/jsonrpc``, with a
+configurable per-request latency.
+
+    python mock_odoo.py --orders 100000 --latency 20 --port 8069
+"""
+import argparse
+import datetime
+import json
+import random
+import threading
+import time
+import xmlrpc.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from odoo_schema import BANK_JOURNAL_NAMES_RAW
+
+BASE_DATE = datetime.datetime(2024, 1, 1)
+WAREHOUSES = ['TOP 1 Warehouse', 'TOP 2 Warehouse', 'Main Warehouse']
+UID = 2
+
+# model -> {field: ttype} for ir.model / ir.model.fields and read_group aggregation
+MODEL_FIELDS = {
+    'res.partner': {'name': 'char', 'create_date': 'datetime', 'partner_code': 'char', 'vat': 'char',
+                    'customer': 'boolean', 'customer_rank': 'integer', 'credit_limit': 'float',
+                    'current_balance': 'float'},
+    'sale.order': {'name': 'char', 'partner_id': 'many2one', 'date_order': 'datetime', 'create_date': 'datetime',
+                   'state': 'selection', 'amount_tax': 'float', 'amount_total': 'float',
+                   'client_order_ref': 'char', 'invoice_ids': 'many2many', 'warehouse_id': 'many2one'},
+    'account.move': {'name': 'char', 'ref': 'char', 'partner': 'many2one', 'partner_id': 'many2one',
+                     'amount': 'float', 'date': 'date', 'state': 'selection', 'journal_id': 'many2one',
+                     'move_type': 'selection', 'payment_state': 'selection'},
+    'account.move.line': {'move_id': 'many2one', 'partner_id': 'many2one'},
+    'account.journal': {'name': 'char', 'type': 'selection'},
+    'bank.deposit': {'name': 'char', 'partner': 'many2one', 'date': 'date', 'amount': 'float',
+                     'amount_total': 'float', 'state': 'selection', 'journal_id': 'many2one'},
+    'account.bank.statement.line': {'name': 'char', 'date': 'date', 'amount': 'float',
+                                    'partner_id': 'many2one', 'is_reconciled': 'boolean'},
+}
+
+
+def _ts(rng, days=365):
+    return (BASE_DATE + datetime.timedelta(seconds=rng.randrange(days * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _m2o_id(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _sort_key(value):
+    value = _m2o_id(value)
+    return (0, 0) if value is False or value is None else (1, value)
+
+
+class MockOdoo:
+    """In-memory dataset plus an ``execute_kw`` that understands the subset of ORM calls the dashboard makes."""
+
+    def __init__(self, orders=10000, partners=2000, moves=15000, deposits=200, statement_lines=500,
+                 latency=0.0, multicall=False, seed=42, batch_http_status=None):
+        self.latency = latency
+        self.multicall = multicall
+        # Answer batch requests with this HTTP error, as a proxy that refuses them would
+        self.batch_http_status = batch_http_status
+        self.lock = threading.Lock()
+        self.rpc_count = 0
+        self.http_count = 0
+        self.rpc_by_method = {}
+        self._clock = BASE_DATE + datetime.timedelta(days=400)
+        rng = random.Random(seed)
+        self.tables = {model: {} for model in MODEL_FIELDS}
+        self.tables['ir.model'] = {}
+        self.tables['ir.model.fields'] = {}
+        self._generate(rng, orders, partners, moves, deposits, statement_lines)
+
+    # -- data -------------------------------------------------------------
+
+    def _add(self, model, rec):
+        if 'write_date' not in rec:
+            rec['write_date'] = rec.get('create_date') or (f"{rec['date']} 08:00:00" if rec.get('date')
+                                                            else BASE_DATE.strftime('%Y-%m-%d %H:%M:%S'))
+        self.tables[model][rec['id']] = rec
+        return rec
+
+    def _generate(self, rng, n_orders, n_partners, n_moves, n_deposits, n_lines):
+        partners = []
+        for i in range(1, n_partners + 1):
+            coded = rng.random() < 0.8
+            partners.append(self._add('res.partner', {
+                'id': i, 'name': f"Customer {i:05d}", 'create_date': _ts(rng),
+                'partner_code': f"P{i:05d}" if coded else False, 'vat': f"VAT{i:06d}" if coded else False,
+                'customer': True, 'customer_rank': 1,
+                'credit_limit': float(rng.randrange(0, 500000)), 'current_balance': float(rng.randrange(-20000, 400000)),
+            }))
+        warehouses = [[i + 1, name] for i, name in enumerate(WAREHOUSES)]
+
+        journals = []
+        for i, name in enumerate(BANK_JOURNAL_NAMES_RAW, start=1):
+            journals.append(self._add('account.journal', {'id': i, 'name': f"{name} (ETB)", 'type': 'bank'}))
+        self._add('account.journal', {'id': len(journals) + 1, 'name': 'Customer Invoices', 'type': 'sale'})
+        sales_journal = [len(journals) + 1, 'Customer Invoices']
+
+        move_id = 0
+        for i in range(1, n_orders + 1):
+            p = rng.choice(partners)
+            state = rng.choices(['draft', 'sent', 'sale', 'done', 'cancel'], [30, 10, 40, 15, 5])[0]
+            created = _ts(rng)
+            invoice_ids = []
+            if state in ('sale', 'done') or rng.random() < 0.2:
+                for _ in range(rng.choices([1, 2], [85, 15])[0]):
+                    move_id += 1
+                    self._add('account.move', {
+                        'id': move_id, 'name': f"INV/{move_id:06d}", 'ref': False, 'partner': [p['id'], p['name']],
+                        'partner_id': [p['id'], p['name']], 'amount': 0.0, 'date': created[:10],
+                        'state': rng.choice(['draft', 'posted', 'cancel']), 'journal_id': sales_journal,
+                        'move_type': rng.choices(['out_invoice', 'out_refund'], [90, 10])[0],
+                        'payment_state': rng.choice(['not_paid', 'paid', 'partial']),
+                    })
+                    invoice_ids.append(move_id)
+            amount = float(rng.randrange(1000, 200000))
+            self._add('sale.order', {
+                'id': i, 'name': f"SO{i:06d}", 'partner_id': [p['id'], p['name']], 'date_order': created,
+                'create_date': created, 'state': state, 'amount_tax': amount * 0.15 if rng.random() < 0.7 else 0.0,
+                'amount_total': amount, 'client_order_ref': f"REF{i}" if rng.random() < 0.6 else False,
+                'invoice_ids': invoice_ids, 'warehouse_id': rng.choice(warehouses),
+            })
+
+        line_id = 0
+        for _ in range(n_moves):
+            move_id += 1
+            j = rng.choice(journals)
+            p = rng.choice(partners) if rng.random() < 0.7 else None
+            rec = self._add('account.move', {
+                'id': move_id, 'name': f"BNK/{move_id:06d}", 'ref': f"Deposit {move_id}" if rng.random() < 0.5 else False,
+                'partner': [p['id'], p['name']] if p else False, 'partner_id': [p['id'], p['name']] if p else False,
+                'amount': float(rng.randrange(100, 500000)), 'date': _ts(rng)[:10],
+                'state': rng.choices(['draft', 'posted'], [60, 40])[0], 'journal_id': [j['id'], j['name']],
+                'move_type': 'entry', 'payment_state': 'not_paid',
+            })
+            if not p and rng.random() < 0.5:
+                lp = rng.choice(partners)
+                line_id += 1
+                self._add('account.move.line', {'id': line_id, 'move_id': [rec['id'], rec['name']],
+                                                'partner_id': [lp['id'], lp['name']]})
+
+        for i in range(1, n_deposits + 1):
+            p = rng.choice(partners)
+            j = rng.choice(journals)
+            amount = float(rng.randrange(100, 300000))
+            self._add('bank.deposit', {
+                'id': i, 'name': f"DEP/{i:05d}", 'partner': [p['id'], p['name']], 'date': _ts(rng)[:10],
+                'amount': amount, 'amount_total': amount, 'state': rng.choice(['draft', 'approved', 'done']),
+                'journal_id': [j['id'], j['name']],
+            })
+
+        for i in range(1, n_lines + 1):
+            p = rng.choice(partners)
+            self._add('account.bank.statement.line', {
+                'id': i, 'name': f"STMT/{i:05d}", 'date': _ts(rng)[:10], 'amount': float(rng.randrange(-50000, 50000)),
+                'partner_id': [p['id'], p['name']], 'is_reconciled': rng.random() < 0.7,
+            })
+
+        field_id = 0
+        for model_id, (model, fields) in enumerate(MODEL_FIELDS.items(), start=1):
+            self._add('ir.model', {'id': model_id, 'model': model, 'name': model})
+            for name, ttype in fields.items():
+                field_id += 1
+                self._add('ir.model.fields', {'id': field_id, 'model': model, 'name': name, 'ttype': ttype})
+
+    def touch(self, model, count, rng=None):
+        """Rewrite ``count`` random records so incremental syncs have something to pick up."""
+        rng = rng or random.Random()
+        with self.lock:
+            self._clock += datetime.timedelta(seconds=1)
+            stamp = self._clock.strftime('%Y-%m-%d %H:%M:%S')
+            ids = rng.sample(list(self.tables[model]), min(count, len(self.tables[model])))
+            for i in ids:
+                rec = self.tables[model][i]
+                if 'amount_total' in rec:
+                    rec['amount_total'] += 1.0
+                rec['write_date'] = stamp
+        return ids
+
+    # -- ORM --------------------------------------------------------------
+
+    def _match(self, model, rec, domain):
+        types = MODEL_FIELDS.get(model, {})
+        for leaf in domain:
+            # Only implicit AND is supported, which is all the dashboard sends
+            if leaf in ('&', '|', '!'):
+                continue
+            field, op, value = leaf
+            actual = rec['id'] if field == 'id' else rec.get(field, False)
+            if types.get(field) == 'many2one' and op not in ('ilike', 'not ilike'):
+                actual = _m2o_id(actual)
+            if op == '=':
+                ok = actual == value
+            elif op == '!=':
+                ok = actual != value
+            elif op == 'in':
+                ok = any(a in value for a in actual) if isinstance(actual, list) else actual in value
+            elif op == 'not in':
+                ok = actual not in value
+            elif op in ('>', '>=', '<', '<='):
+                if actual is False:
+                    ok = False
+                else:
+                    ok = {'>': actual > value, '>=': actual >= value, '<': actual < value, '<=': actual <= value}[op]
+            elif op in ('ilike', 'not ilike'):
+                text = actual[1] if isinstance(actual, list) and actual else (actual or '')
+                ok = str(value).lower() in str(text).lower()
+                ok = ok if op == 'ilike' else not ok
+            else:
+                raise xmlrpc.client.Fault(1, f"Unsupported domain operator {op!r}")
+            if not ok:
+                return False
+        return True
+
+    def _search(self, model, domain, order=None, limit=None, offset=0):
+        if model not in self.tables:
+            raise xmlrpc.client.Fault(2, f"Object {model} doesn't exist")
+        rows = [r for r in self.tables[model].values() if self._match(model, r, domain)]
+        for part in reversed([p.strip() for p in (order or 'id asc').split(',')]):
+            name, _, direction = part.partition(' ')
+            rows.sort(key=lambda r: _sort_key(r.get(name)), reverse=direction.lower() == 'desc')
+        rows = rows[offset:]
+        if limit:
+            rows = rows[:limit]
+        return rows
+
+    def _project(self, model, rows, fields):
+        known = MODEL_FIELDS.get(model)
+        if not fields:
+            fields = ['id'] + list(known or ())
+        for f in fields:
+            if known is not None and f not in ('id', 'write_date') and f not in known:
+                raise xmlrpc.client.Fault(2, f"Invalid field {f!r} on model {model!r}")
+        return [{f: r.get(f, False) if f != 'id' else r['id'] for f in fields} for r in rows]
+
+    def _read_group(self, model, domain, specs, groupby, lazy=True):
+        group_field = groupby[0] if isinstance(groupby, list) else groupby
+        aggs = []
+        for spec in specs:
+            name, _, op = spec.partition(':')
+            if name == group_field:
+                continue
+            ttype = MODEL_FIELDS.get(model, {}).get(name)
+            if not op:
+                if ttype not in ('float', 'integer', 'monetary'):
+                    continue
+                op = 'sum'
+            aggs.append((name, op))
+        groups = {}
+        for r in self._search(model, domain):
+            key = r.get(group_field) or False
+            gk = _m2o_id(key) if isinstance(key, list) else key
+            g = groups.get(gk)
+            if g is None:
+                g = groups[gk] = {group_field: key, '__count': 0}
+                for name, _ in aggs:
+                    g[name] = None
+            g['__count'] += 1
+            for name, op in aggs:
+                val = r.get(name)
+                if op == 'sum':
+                    g[name] = (g[name] or 0) + (val or 0)
+                elif op == 'max':
+                    g[name] = val if g[name] is None or (val and val > g[name]) else g[name]
+                elif op == 'min':
+                    g[name] = val if g[name] is None or (val and val < g[name]) else g[name]
+                elif op == 'count':
+                    g[name] = (g[name] or 0) + 1
+        result = list(groups.values())
+        if lazy:
+            for g in result:
+                g[f"{group_field}_count"] = g.pop('__count')
+        return result
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        kwargs = kwargs or {}
+        if uid != UID:
+            raise xmlrpc.client.Fault(3, 'Access Denied')
+        with self.lock:
+            self.rpc_count += 1
+            self.rpc_by_method[f"{model}.{method}"] = self.rpc_by_method.get(f"{model}.{method}", 0) + 1
+            if method == 'search_read':
+                rows = self._search(model, args[0] if args else kwargs.get('domain', []), kwargs.get('order'),
+                                    kwargs.get('limit'), kwargs.get('offset', 0))
+                return self._project(model, rows, kwargs.get('fields'))
+            if method == 'search':
+                return [r['id'] for r in self._search(model, args[0], kwargs.get('order'), kwargs.get('limit'),
+                                                      kwargs.get('offset', 0))]
+            if method == 'search_count':
+                return len(self._search(model, args[0]))
+            if method == 'read':
+                table = self.tables.get(model, {})
+                rows = [table[i] for i in args[0] if i in table]
+                return self._project(model, rows, kwargs.get('fields') or (args[1] if len(args) > 1 else None))
+            if method == 'read_group':
+                domain, specs, groupby = (list(args) + [None, None, None])[:3]
+                specs = specs or kwargs.get('fields', [])
+                groupby = groupby or kwargs.get('groupby')
+                return self._read_group(model, domain, specs, groupby, kwargs.get('lazy', True))
+            raise xmlrpc.client.Fault(1, f"Method {method!r} not supported by mock")
+
+    def dispatch(self, service, method, params):
+        if service == 'common':
+            if method == 'authenticate':
+                return UID
+            if method == 'version':
+                return {'server_version': '16.0', 'server_serie': '16.0', 'protocol_version': 1}
+        if service == 'object':
+            if method == 'execute_kw':
+                return self.execute_kw(*params)
+            if method == 'system.multicall' and self.multicall:
+                out = []
+                for call in params[0]:
+                    try:
+                        out.append([self.dispatch('object', call['methodName'], call['params'])])
+                    except xmlrpc.client.Fault as e:
+                        out.append({'faultCode': e.faultCode, 'faultString': e.faultString})
+                return out
+        raise xmlrpc.client.Fault(1, f'Method "{method}" is not supported')
+
+    def reset_counters(self):
+        with self.lock:
+            self.rpc_count = 0
+            self.http_count = 0
+            self.rpc_by_method = {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        mock = self.server.mock
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with mock.lock:
+            mock.http_count += 1
+        if mock.latency:
+            time.sleep(mock.latency)
+        if self.path == '/jsonrpc':
+            request = json.loads(body)
+            if isinstance(request, list) and mock.batch_http_status:
+                self.send_error(mock.batch_http_status)
+                return
+            self._reply(self._jsonrpc(mock, request), 'application/json')
+        elif self.path in ('/xmlrpc/2/common', '/xmlrpc/2/object'):
+            service = self.path.rsplit('/', 1)[-1]
+            params, method = xmlrpc.client.loads(body, use_builtin_types=True)
+            if method == 'system.multicall' and mock.batch_http_status:
+                self.send_error(mock.batch_http_status)
+                return
+            try:
+                payload = xmlrpc.client.dumps((mock.dispatch(service, method, params),), methodresponse=True,
+                                              allow_none=True)
+            except xmlrpc.client.Fault as fault:
+                payload = xmlrpc.client.dumps(fault, allow_none=True)
+            self._reply(payload.encode('utf-8'), 'text/xml')
+        else:
+            self.send_error(404)
+
+    def _jsonrpc(self, mock, request):
+        def one(req):
+            params = req.get('params', {})
+            try:
+                result = mock.dispatch(params.get('service'), params.get('method'), params.get('args', []))
+                return {'jsonrpc': '2.0', 'id': req.get('id'), 'result': result}
+            except xmlrpc.client.Fault as e:
+                name = 'odoo.exceptions.AccessDenied' if e.faultCode == 3 else 'odoo.exceptions.UserError'
+                return {'jsonrpc': '2.0', 'id': req.get('id'),
+                        'error': {'code': 200, 'message': 'Odoo Server Error',
+                                  'data': {'name': name, 'message': e.faultString}}}
+        if isinstance(request, list):
+            if not mock.multicall:
+                return json.dumps({'jsonrpc': '2.0', 'id': None, 'error': {
+                    'code': 200, 'message': 'Odoo Server Error',
+                    'data': {'name': 'werkzeug.exceptions.BadRequest', 'message': 'Batch requests not supported'}}
+                }).encode('utf-8')
+            return json.dumps([one(r) for r in request]).encode('utf-8')
+        return json.dumps(one(request)).encode('utf-8')
+
+    def _reply(self, payload, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def serve(mock, host='127.0.0.1', port=0):
+    """Start ``mock`` on a background thread and return the running server (``server.server_address``)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.mock = mock
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic Odoo XML-RPC/JSON-RPC server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8069)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--partners', type=int, default=2000)
+    parser.add_argument('--moves', type=int, default=15000)
+    parser.add_argument('--deposits', type=int, default=200)
+    parser.add_argument('--statement-lines', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every HTTP request")
+    parser.add_argument('--multicall', action='store_true', help="accept system.multicall / JSON-RPC batches")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    mock = MockOdoo(args.orders, args.partners, args.moves, args.deposits, args.statement_lines,
+                    latency=args.latency, multicall=args.multicall)
+    print(f"Generated data in {time.perf_counter() - started:.1f}s")
+    server = serve(mock, args.host, args.port)
+    print(f"Mock Odoo listening on http://{args.host}:{server.server_address[1]} (any db/login, password ignored)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,431 +2,434 @@ import xmlrpc.client
 import datetime
 import os
 import config
+import delta_sync
+import odoo_transport
+import record_cache
+import record_stream
+import tenants
+import verdict_rules
+from odoo_transport import Call
 
-# Configuration
-ODOO_URL = config.ODOO_URL
-ODOO_DB = config.ODOO_DB
-ODOO_USERNAME = config.ODOO_USERNAME
-ODOO_PASSWORD = config.ODOO_PASSWORD
-
+# Each tenant owns its keep-alive proxies and cached login; fetchers talk to the tenant they run under
 def get_connection():
     try:
-        common = xmlrpc.client.ServerProxy(f"{ODOO_URL}/xmlrpc/2/common")
-        uid = common.authenticate(ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD, {})
-        models = xmlrpc.client.ServerProxy(f"{ODOO_URL}/xmlrpc/2/object")
-        return uid, models
+        pool = tenants.current().pool
+        return pool.uid, pool.models
     except Exception as e:
         print(f"Odoo Connection Error: {e}")
         return None, None
 
+def get_models_proxy():
+    # Pooled models object: safe to share between worker threads
+    return tenants.current().pool.models
+
+def execute_batch(uid, models, calls, return_exceptions=False):
+    # Independent execute_kw calls in one HTTP request when the transport supports it
+    tenant = tenants.current()
+    return odoo_transport.execute_batch(models, tenant.db, uid, tenant.password, calls, return_exceptions)
+
+def get_schema(uid, models):
+    # Probed once and cached, so fetchers only send queries the server can answer
+    tenant = tenants.current()
+    return tenant.schema.get(uid, models, tenant.pool.version)
+
+
+def execute_call(uid, models, call):
+    tenant = tenants.current()
+    return models.execute_kw(tenant.db, uid, tenant.password, call.model, call.method, call.args, call.kwargs)
+
+# The queries and row shaping below are shared with the asyncio fetchers in async_fetchers;
+# only the fetch_* functions themselves decide how the calls are sent.
+
+# Incomplete orders: every open order (cancelled ones are never shown), or the newest VERDICT_ORDER_LIMIT,
+# mirrored incrementally so a cycle only transfers the orders written since the last one
+ORDER_DOMAIN = [['state', 'in', list(verdict_rules.ORDER_STATE_GROUPS)]]
+ORDER_FIELDS = ['id', 'name', 'partner_id', 'date_order', 'state', 'amount_tax', 'client_order_ref', 'invoice_ids', 'amount_total']
+ORDER_WINDOW = ('invoices.orders', 'sale.order', ORDER_DOMAIN, ORDER_FIELDS)
+
+def order_window_kwargs():
+    return {'order': 'date_order desc', 'limit': config.VERDICT_ORDER_LIMIT or None}
+
+def newest_first(orders):
+    orders.sort(key=lambda o: (o.get('date_order') or '', o['id']), reverse=True)
+    return orders
+
 def fetch_invoices(uid, models):
-    # INCOMPLETE ORDERS Logic (Sale Orders + Verdict check)
+    # INCOMPLETE ORDERS Logic (Sale Orders + Verdict check, see verdict_rules for the rule table)
     try:
-        # Fetch relevant Sale Orders
-        orders = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'sale.order', 'search_read',
-            [[['state', 'in', ['draft', 'sent', 'cancel', 'sale', 'done']]]],
-            {'fields': ['id', 'name', 'partner_id', 'date_order', 'state', 'amount_tax', 'client_order_ref', 'invoice_ids', 'amount_total'], 
-             'limit': 100, 'order': 'date_order desc'}
-        )
-        
-        # Collect all invoice IDs to fetch in bulk
-        all_inv_ids = []
-        for o in orders:
-            if o.get('invoice_ids'):
-                all_inv_ids.extend(o['invoice_ids'])
-        
-        inv_map = {}
-        if all_inv_ids:
-            all_inv_ids = list(set(all_inv_ids))
-            # Try Account Invoice (Odoo 12) handling first
-            try:
-                inv_data = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'account.invoice', 'search_read',
-                    [[['id', 'in', all_inv_ids]]],
-                    {'fields': ['id', 'state', 'type']}
-                )
-                for inv in inv_data:
-                    inv_map[inv['id']] = {'state': inv['state'], 'type': inv['type']}
-            except:
-                # Fallback to Account Move (Odoo 14+)
-                try:
-                    inv_data = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'account.move', 'search_read',
-                        [[['id', 'in', all_inv_ids]]],
-                        {'fields': ['id', 'state', 'move_type', 'payment_state']}
-                    )
-                    for inv in inv_data:
-                        # Normalize state for logic
-                        st = inv.get('payment_state', inv['state'])
-                        if st == 'not_paid': st = 'open' 
-                        inv_map[inv['id']] = {'state': st, 'type': inv['move_type']}
-                except Exception as e:
-                    print(f"Error fetching invoices details: {e}")
-
-        incomplete_orders = []
-        for o in orders:
-            # "Verdict" Logic Refined
-            # Default to "Invalid" (Incomplete) -> Show in dashboard
-            verdict = "Invalid"
-            
-            # Map States
-            # D/C = Draft/Cancel? Or Draft/Created? Usage suggests Draft/Sent => D/C.
-            # SO = Sale Order (Confirmed/Done).
-            # If state is cancel, we usually ignore
-            if o['state'] == 'cancel':
-                continue # Skip cancelled entirely
-                
-            q_state = 'D/C' if o['state'] in ['draft', 'sent'] else 'SO'
-            
-            # Taxable (Assumption: amount_tax > 0)
-            is_taxable = o.get('amount_tax', 0) > 0
-            taxable_str = 'Y' if is_taxable else 'N'
-            
-            # Reference
-            ref_str = 'Y' if o.get('client_order_ref') else 'N'
-            
-            # Invoices
-            o_inv_ids = o.get('invoice_ids', [])
-            inv_count = len(o_inv_ids)
-            inv_state = '-'
-            paid_count = 0
-            canceled_count = 0
-            refund_draft = False
-            for iid in o_inv_ids:
-                inv = inv_map.get(iid)
-                if not inv:
-                    continue
-                if inv.get('state') == 'paid':
-                    paid_count += 1
-                if inv.get('state') == 'cancel':
-                    canceled_count += 1
-                if inv.get('type') == 'out_refund' and inv.get('state') == 'draft':
-                    refund_draft = True
-            if inv_count == 1 and o_inv_ids[0] in inv_map:
-                inv_state = inv_map[o_inv_ids[0]]['state']
-
-            # Apply "Valid" (Hide) logic
-            if q_state == 'D/C':
-                # Draft/Confirmed with no invoice must be shown
-                if inv_count == 0:
-                    verdict = "Invalid"
-                # Row 5: D/C, Tax N -> Ignore when invoices exist
-                elif taxable_str == 'N':
-                    verdict = "Valid"
-                else:
-                    # If at least one invoice is fully paid, consider it complete
-                    if paid_count >= 1:
-                        verdict = "Valid"
-
-            if q_state == 'SO':
-                if taxable_str == 'Y':
-                    # Row 2: SO, Tax Y, Ref Y, Inv Count 1, Inv State paid -> Valid
-                    if ref_str == 'Y' and inv_count == 1 and inv_state == 'paid':
-                        verdict = "Valid"
-                    # Taxable Multiple Invoices: valid if one paid and rest canceled
-                    elif ref_str == 'Y' and inv_count > 1 and paid_count == 1 and canceled_count == inv_count - 1:
-                        verdict = "Valid"
-                else:
-                    # Non-Taxable: no ref/invoice needed
-                    if inv_count == 0:
-                        verdict = "Valid"
-                    else:
-                        # Row 6: SO, Tax N -> Valid if Inv >= 1, out_invoice=paid, out_refund!=draft
-                        if paid_count >= 1 and not refund_draft:
-                            verdict = "Valid"
-
-            # Determine Issue Label for UI
-            issue_label = "Action Required" # Default
-
-            if verdict == "Invalid":
-                if q_state == 'D/C':
-                    if inv_count == 0:
-                        issue_label = "Not Invoiced"
-                    elif taxable_str == 'Y' and ref_str == 'Y':
-                        issue_label = "Draft with Reference"
-                    else:
-                        issue_label = "Open Invoice"
-                elif q_state == 'SO':
-                    if taxable_str == 'Y':
-                        if ref_str == 'N':
-                            issue_label = "No Ref"
-                        elif inv_count > 1:
-                            issue_label = "Multiple Invoices"
-                        elif inv_count == 0:
-                            issue_label = "Not Invoiced"
-                        elif inv_state != 'draft':
-                            issue_label = "Invoice Not Paid"
-                    else:
-                        # Non-Taxable Issues (should be rare with new rules)
-                        if inv_count == 0:
-                            issue_label = "Not Invoiced"
-                        else:
-                            issue_label = "Invoice Issue"
-
-            # If Verdict is Invalid, it's an Incomplete Order -> Show it
-            if verdict == "Invalid":
-                incomplete_orders.append({
-                    'id': o['id'],
-                    'name': o['name'], 
-                    'ref': o.get('client_order_ref', 'N/A'),
-                    'partner_id': o['partner_id'],
-                    'date_invoice': o['date_order'],
-                    'amount_total': o['amount_total'],
-                    'state': o['state'],
-                    'issue': issue_label
-                })
-        
-        return incomplete_orders
+        schema = get_schema(uid, models)
+        key, model, domain, fields = ORDER_WINDOW
+        orders = newest_first(delta_sync.fetch_window(key, uid, models, model, domain, fields, **order_window_kwargs()))
+
+        inv_map = fetch_invoice_states(uid, models, schema, orders)
+        return verdict_rules.incomplete_orders(orders, inv_map)
     except Exception as e:
         print(f"Fetch Incomplete Orders Error: {e}")
+        raise
+
+def invoice_state_calls(schema, orders, chunk_size=5000):
+    # One search_read per id chunk of the invoices linked to ``orders``, meant to be sent as one batch
+    all_inv_ids = sorted({iid for o in orders for iid in (o.get('invoice_ids') or [])})
+    chunks = [all_inv_ids[i:i + chunk_size] for i in range(0, len(all_inv_ids), chunk_size)]
+    if schema.has_model('account.invoice'):
+        # Account Invoice (Odoo 12)
+        model, fields = 'account.invoice', ['id', 'state', 'type']
+    else:
+        # Account Move (Odoo 14+)
+        model = 'account.move'
+        fields = ['id', 'state'] + [f for f in ('move_type', 'payment_state') if schema.has_field('account.move', f)]
+    return [Call(model, 'search_read', [[['id', 'in', chunk]]], {'fields': fields}) for chunk in chunks]
+
+def invoice_state_map(model, results):
+    # {invoice id: {'state', 'type'}} from the replies to ``invoice_state_calls``
+    inv_map = {}
+    for inv_data in results:
+        for inv in inv_data:
+            if model == 'account.invoice':
+                inv_map[inv['id']] = {'state': inv['state'], 'type': inv['type']}
+                continue
+            # Normalize state for logic
+            st = inv.get('payment_state', inv['state'])
+            if st == 'not_paid': st = 'open'
+            inv_map[inv['id']] = {'state': st, 'type': inv.get('move_type')}
+    return inv_map
+
+def fetch_invoice_states(uid, models, schema, orders, chunk_size=5000):
+    calls = invoice_state_calls(schema, orders, chunk_size)
+    if not calls:
+        return {}
+    return invoice_state_map(calls[0].model, execute_batch(uid, models, calls))
+
+# Unposted journals: draft/unposted account.move rows of the bank journals, mirrored incrementally
+JOURNAL_MOVE_FIELDS = ['id', 'partner', 'amount', 'date', 'state', 'journal_id', 'name', 'ref']
+
+def journal_move_domain(journal_ids):
+    return [['state', '=', 'draft'], ['journal_id', 'in', sorted(journal_ids)]]
+
+def deposit_calls(schema):
+    # bank.deposit (draft/approved), independent of the moves so it rides in the same batch
+    if not schema.has_model('bank.deposit'):
+        return []
+    return [Call('bank.deposit', 'search_read',
+        [[['state', 'in', ['draft', 'approved']]]],
+        {'fields': ['id', 'name', 'partner', 'date', 'amount', 'amount_total', 'state', 'journal_id'], 'limit': 50, 'order': 'date desc'}
+    )]
+
+def deposits_from_results(deposit_results):
+    if not deposit_results:
+        return []
+    if isinstance(deposit_results[0], Exception):
+        print(f"Bank deposit fetch error: {deposit_results[0]}")
         return []
+    return deposit_results[0]
+
+def moves_missing_partner(moves):
+    return [m['id'] for m in moves if not m.get('partner')]
+
+def partner_lines_call(missing_partner_ids):
+    # Fallback: fetch partner from account.move.line when missing
+    return Call('account.move.line', 'search_read',
+        [[['move_id', 'in', missing_partner_ids], ['partner_id', '!=', False]]],
+        {'fields': ['move_id', 'partner_id'], 'limit': len(missing_partner_ids) * 5}
+    )
+
+def partners_from_lines(lines):
+    partners = {}
+    for line in lines:
+        m_id = line['move_id'][0]
+        if m_id not in partners:
+            partners[m_id] = line['partner_id']
+    return partners
+
+# Partners found on a move's lines, cached per move (False: none found) so each move is looked up once per TTL.
+# Not an account.move field, so it lives in its own cache namespace rather than among real account.move records
+MOVE_PARTNER_NAMESPACE = 'account.move#line_partner'
+MOVE_PARTNER_FIELDS = ['line_partner']
+
+def cached_move_partners(move_ids):
+    found, missing = record_cache.cache.lookup(MOVE_PARTNER_NAMESPACE, move_ids, MOVE_PARTNER_FIELDS)
+    return {i: r['line_partner'] for i, r in found.items() if r['line_partner']}, missing
+
+def remember_move_partners(move_ids, line_partners):
+    record_cache.cache.put(MOVE_PARTNER_NAMESPACE,
+                           [{'id': i, 'line_partner': line_partners.get(i, False)} for i in move_ids],
+                           MOVE_PARTNER_FIELDS)
+
+def merge_journals(deposits, moves, line_partners, bank_journal_names):
+    # Normalize and merge
+    merged = []
+    for d in deposits:
+        if d.get('journal_id') and d['journal_id'][1] not in bank_journal_names:
+            continue
+        partner_val = d.get('partner') or d.get('partner_id')
+        merged.append({
+            'id': d.get('id'),
+            'name': d.get('name'),
+            'partner': partner_val,
+            'date': d.get('date'),
+            'amount': d.get('amount_total', d.get('amount', 0)),
+            'state': d.get('state', 'draft'),
+            'journal_id': d.get('journal_id'),
+            'source': 'deposit',
+            'model': 'bank.deposit',
+            'record_id': d.get('id')
+        })
+
+    for m in moves:
+        partner_val = m.get('partner')
+        ref_val = m.get('ref')
+
+        is_unknown = False
+        if not partner_val:
+            is_unknown = True
+        elif isinstance(partner_val, list) and 'unknown' in partner_val[1].lower():
+            is_unknown = True
+
+        if is_unknown:
+            if m.get('id') in line_partners:
+                partner_val = line_partners[m['id']]
+            elif ref_val and ref_val != m.get('name'):
+                partner_val = [0, ref_val]
+            elif not partner_val:
+                partner_val = [0, 'Unknown']
+
+        merged.append({
+            'id': f"move_{m.get('id')}",
+            'name': m.get('name'),
+            'partner': partner_val,
+            'date': m.get('date'),
+            'amount': m.get('amount', 0),
+            'state': m.get('state', 'draft'),
+            'journal_id': m.get('journal_id'),
+            'source': 'journal',
+            'model': 'account.move',
+            'record_id': m.get('id')
+        })
+    return merged
 
 def fetch_journals(uid, models):
     # Unposted Journals (bank.deposit + account.move)
     try:
-        bank_journal_names_raw = [
-            'Awash Bank Kazanchis 01304108544700',
-            'Oromia International Bank Sal.798577',
-            'Oromia International Bank 2010301',
-            'OBI GOFA 1100477900005',
-            'Awash Bank 01320108544700',
-            'Commercial Bank of Ethiopia 1000178884787',
-            'Debub Global Bank',
-            'Commercial Bank of Ethiopia 1000155628077',
-            'Oromia International Bank 1070202/1',
-            'Cooperative Bank Oromia 24634028',
-            'Oromia International Bank 743829',
-            'Wegagen Bank-07614268',
-            'Nib International Bank 10468286',
-            'United Bank 16350315018',
-            'Cooperative Bank Oromia 1000081172947',
-            'Oromia International Bank 2010308'
-        ]
-        bank_journal_names = set()
-        for name in bank_journal_names_raw:
-            bank_journal_names.add(name)
-            bank_journal_names.add(f"{name} (ETB)")
-
-        # Method 1: bank.deposit (draft/approved)
-        deposits = []
-        try:
-            deposits = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'bank.deposit', 'search_read',
-                [[['state', 'in', ['draft', 'approved']]]],
-                {'fields': ['id', 'name', 'partner', 'date', 'amount', 'amount_total', 'state', 'journal_id'], 'limit': 50, 'order': 'date desc'}
-            )
-        except Exception as e:
-            print(f"Bank deposit fetch error: {e}")
-
-        # Method 2: account.move (draft/unposted, bank journals only)
-        journal_ids = []
-        try:
-            journals = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'account.journal', 'search_read',
-                [[['type', '=', 'bank'], ['name', 'in', list(bank_journal_names)]]],
-                {'fields': ['id', 'name']}
-            )
-            journal_ids = [j['id'] for j in journals]
-        except Exception as e:
-            print(f"Bank journal lookup error: {e}")
+        schema = get_schema(uid, models)
+        deposit_batch = deposit_calls(schema)
+
+        # account.move (draft/unposted, bank journals only)
+        journal_ids = schema.bank_journal_ids
 
         moves = []
+        deposit_results = []
         if journal_ids:
             try:
-                moves = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'account.move', 'search_read',
-                    [[['state', '=', 'draft'], ['journal_id', 'in', journal_ids]]],
-                    {
-                        'fields': ['id', 'partner', 'amount', 'date', 'state', 'journal_id', 'name', 'ref'],
-                        'limit': 15500,
-                        'order': 'date desc'
-                    }
+                moves, deposit_results = delta_sync.fetch_window_with('journals.moves', uid, models, 'account.move',
+                    journal_move_domain(journal_ids), JOURNAL_MOVE_FIELDS,
+                    order='date desc', also=deposit_batch
                 )
                 print(f"Found {len(moves)} account.move entries from these matched journals.")
             except Exception as e:
                 print(f"Account move fetch error: {e}")
+                # No partial panel: the engine keeps the last good snapshot
+                raise
+        if deposit_batch and not deposit_results:
+            deposit_results = execute_batch(uid, models, deposit_batch, return_exceptions=True)
+        deposits = deposits_from_results(deposit_results)
 
-        # Fallback: fetch partner from account.move.line when missing
-        partners_from_lines = {}
-        if moves:
-            missing_partner_ids = [m['id'] for m in moves if not m.get('partner')]
-            if missing_partner_ids:
-                try:
-                    lines = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'account.move.line', 'search_read',
-                        [[['move_id', 'in', missing_partner_ids], ['partner_id', '!=', False]]],
-                        {'fields': ['move_id', 'partner_id'], 'limit': len(missing_partner_ids) * 5}
-                    )
-                    for line in lines:
-                        m_id = line['move_id'][0]
-                        if m_id not in partners_from_lines:
-                            partners_from_lines[m_id] = line['partner_id']
-                except Exception as e:
-                    print(f"Error fetching partners from lines: {e}")
-
-        # Normalize and merge
-        merged = []
-        for d in deposits:
-            if d.get('journal_id') and d['journal_id'][1] not in bank_journal_names:
-                continue
-            partner_val = d.get('partner') or d.get('partner_id')
-            merged.append({
-                'id': d.get('id'),
-                'name': d.get('name'),
-                'partner': partner_val,
-                'date': d.get('date'),
-                'amount': d.get('amount_total', d.get('amount', 0)),
-                'state': d.get('state', 'draft'),
-                'journal_id': d.get('journal_id'),
-                'source': 'deposit',
-                'model': 'bank.deposit',
-                'record_id': d.get('id')
-            })
-
-        for m in moves:
-            partner_val = m.get('partner')
-            ref_val = m.get('ref')
-
-            is_unknown = False
-            if not partner_val:
-                is_unknown = True
-            elif isinstance(partner_val, list) and 'unknown' in partner_val[1].lower():
-                is_unknown = True
-
-            if is_unknown:
-                if m.get('id') in partners_from_lines:
-                    partner_val = partners_from_lines[m['id']]
-                elif ref_val and ref_val != m.get('name'):
-                    partner_val = [0, ref_val]
-                elif not partner_val:
-                    partner_val = [0, 'Unknown']
-
-            merged.append({
-                'id': f"move_{m.get('id')}",
-                'name': m.get('name'),
-                'partner': partner_val,
-                'date': m.get('date'),
-                'amount': m.get('amount', 0),
-                'state': m.get('state', 'draft'),
-                'journal_id': m.get('journal_id'),
-                'source': 'journal',
-                'model': 'account.move',
-                'record_id': m.get('id')
-            })
-
-        return merged
+        line_partners, unresolved = cached_move_partners(moves_missing_partner(moves))
+        if unresolved:
+            try:
+                fetched = partners_from_lines(execute_call(uid, models, partner_lines_call(unresolved)))
+                remember_move_partners(unresolved, fetched)
+                line_partners.update(fetched)
+            except Exception as e:
+                print(f"Error fetching partners from lines: {e}")
+                raise
+
+        return merge_journals(deposits, moves, line_partners, schema.bank_journal_names)
     except Exception as e:
         print(f"Fetch Unposted Journals Error: {e}")
-        return []
+        raise
+
+# Quotations with Warehouse info
+QUOTATION_DOMAIN = [['state', 'in', ['draft', 'sent']]]
+QUOTATION_FIELDS = ['id', 'name', 'partner_id', 'date_order', 'warehouse_id', 'amount_total']
 
 def fetch_quotations(uid, models):
-    # Quotations with Warehouse info
     try:
-        return models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'sale.order', 'search_read',
-           [[['state', 'in', ['draft', 'sent']]]],
-           {'fields': ['id', 'name', 'partner_id', 'date_order', 'warehouse_id', 'amount_total'], 'limit': 11050, 'order': 'date_order desc'}
+        return delta_sync.fetch_window('quotations', uid, models, 'sale.order',
+           QUOTATION_DOMAIN, QUOTATION_FIELDS, order='date_order desc'
         )
-    except: return []
+    except Exception as e:
+        print(f"Fetch Quotations Error: {e}")
+        raise
+
+def iter_search_read(uid, models, model, domain, fields, stages=()):
+    # Stream a search_read in id-keyset pages so no single response holds the whole table
+    return iter(record_stream.RecordStream(uid, models, model, domain, fields, stages))
+
+def read_group_call(model, domain, aggregates, partner_field='partner_id'):
+    specs = [partner_field] + [f"{field}:{op}" for field, op in aggregates.items()]
+    return Call(model, 'read_group', [domain, specs, [partner_field]], {'lazy': False})
+
+def groups_from_read_group(rows, aggregates, partner_field='partner_id'):
+    groups = {}
+    for g in rows:
+        if not g.get(partner_field):
+            continue
+        agg = {partner_field: g[partner_field], 'count': g.get('__count', g.get(f'{partner_field}_count', 0))}
+        for field in aggregates:
+            agg[field] = g.get(field)
+        groups[g[partner_field][0]] = agg
+    return groups
+
+def fold_by_partner(rows, aggregates, partner_field='partner_id', groups=None):
+    # Local equivalent of read_group over id/partner/aggregate rows
+    groups = {} if groups is None else groups
+    for r in rows:
+        if not r.get(partner_field):
+            continue
+        pid = r[partner_field][0]
+        agg = groups.get(pid)
+        if agg is None:
+            agg = {partner_field: r[partner_field], 'count': 0}
+            agg.update({field: None for field in aggregates})
+            groups[pid] = agg
+        agg['count'] += 1
+        for field, op in aggregates.items():
+            val = r.get(field)
+            if op == 'sum':
+                agg[field] = (agg[field] or 0) + (val or 0)
+            elif op == 'max' and val and (agg[field] is None or val > agg[field]):
+                agg[field] = val
+    return groups
+
+def aggregate_by_partner(uid, models, model, domain, aggregates=None, partner_field='partner_id'):
+    # Group ``model`` rows per partner on the server with read_group.
+    # ``aggregates`` maps field -> 'sum' | 'max'; every group also gets a 'count'.
+    # Falls back to streaming id/partner/aggregate columns in pages and folding locally.
+    aggregates = aggregates or {}
+    try:
+        rows = execute_call(uid, models, read_group_call(model, domain, aggregates, partner_field))
+        return groups_from_read_group(rows, aggregates, partner_field)
+    except Exception as e:
+        print(f"read_group on {model} unavailable, aggregating locally: {e}")
+
+    fields = ['id', partner_field] + list(aggregates)
+    return fold_by_partner(iter_search_read(uid, models, model, domain, fields), aggregates, partner_field)
+
+def count_domain(domain, partner_ids, partner_field='partner_id'):
+    return domain + [[partner_field, 'in', list(partner_ids)]]
+
+def counts_from_groups(partner_ids, groups):
+    counts = {pid: 0 for pid in partner_ids}
+    for pid, agg in groups.items():
+        counts[pid] = agg['count']
+    return counts
+
+def count_by_partner(uid, models, model, domain, partner_ids, partner_field='partner_id'):
+    # Per-partner record counts in a single round trip instead of one search_count each
+    if not partner_ids:
+        return {}
+    groups = aggregate_by_partner(uid, models, model, count_domain(domain, partner_ids, partner_field),
+                                  partner_field=partner_field)
+    return counts_from_groups(partner_ids, groups)
+
+# "status draft and confirm" -> draft, sent, sale, done
+CUSTOMER_ORDER_DOMAIN = [['state', 'in', ['draft', 'sent', 'sale', 'done']]]
+
+def customers_call(schema):
+    # Recently created customers; returns the call and whether partner_code exists on this database
+    if schema.has_field('res.partner', 'customer_rank') and not schema.has_field('res.partner', 'customer'):
+        customer_domain = [['customer_rank', '>', 0]]
+    else:
+        customer_domain = [['customer', '=', True]]
+    has_code = schema.has_field('res.partner', 'partner_code')
+    fields = ['id', 'name', 'create_date', 'vat'] + (['partner_code'] if has_code else [])
+    call = Call('res.partner', 'search_read', [customer_domain],
+                {'fields': fields, 'limit': 50, 'order': 'create_date desc'})
+    return call, has_code
+
+def keep_customers(customers, has_code):
+    return [c for c in customers if c.get('vat') and (c.get('partner_code') or not has_code)]
+
+def customer_rows(customers, order_counts):
+    processed = []
+    for c in customers:
+        processed.append({
+            'id': c['id'],
+            'name': c['name'],
+            'create_date': c['create_date'],
+            'partner_code': c.get('partner_code') or '',
+            'order_count': order_counts.get(c['id'], 0),
+        })
+    return processed
 
 def fetch_customers(uid, models):
     # New Customers with Order Counts
     try:
-        # 1. Fetch recently created customers
-        customers = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'res.partner', 'search_read',
-            [[['customer', '=', True]]],
-            {'fields': ['id', 'name', 'create_date', 'partner_code', 'vat'], 'limit': 50, 'order': 'create_date desc'}
-        )
-        
-        processed = []
-        for c in customers:
-            # 2. Count Quotations/Orders (Draft and Confirmed) for each customer
-            # "status draft and confirm" -> draft, sent, sale, done
-            count_domain = [['partner_id', '=', c['id']], ['state', 'in', ['draft', 'sent', 'sale', 'done']]]
-            order_count = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'sale.order', 'search_count', [count_domain])
-
-            # 3. Get latest activity date (optional, or just use create_date)
-            # Staying fast, we'll use create_date or if needed fetch one order.
-            # User wants "Number of Orders" displayed.
-            
-            partner_code = c.get('partner_code') or ''
-            vat = c.get('vat') or ''
-            if not partner_code or not vat:
-                continue
+        schema = get_schema(uid, models)
+        call, has_code = customers_call(schema)
+        customers = keep_customers(execute_call(uid, models, call), has_code)
 
-            processed.append({
-                'id': c['id'],
-                'name': c['name'],
-                'create_date': c['create_date'],
-                'partner_code': partner_code,
-                'order_count': order_count,
-                # 'recent_quotation' can be removed if specific "Number of Orders" is preferred, 
-                # but keeping a reference is good. Let's keep the count mainly.
-            })
-            
-        return processed
+        # Count Quotations/Orders (Draft and Confirmed) for all customers at once
+        order_counts = count_by_partner(uid, models, 'sale.order', CUSTOMER_ORDER_DOMAIN,
+            [c['id'] for c in customers]
+        )
+        return customer_rows(customers, order_counts)
     except Exception as e:
         print(f"Fetch Customers Error: {e}")
-        return []
+        raise
+
+# Overshoot with Delta and Total/Customer metrics
+OVERSHOOT_DOMAIN = [['partner_id', '!=', False]]
+OVERSHOOT_AGGREGATES = {'amount_total': 'sum', 'create_date': 'max'}
+
+OVERSHOOT_PARTNER_FIELDS = ['id', 'name', 'credit_limit', 'current_balance']
+
+def overshoot_partner_ids(totals_by_partner):
+    # Delta is balance minus orders, and a negative balance overshoots even with no positive order total,
+    # so every partner with orders needs its balance read
+    return list(totals_by_partner)
+
+def overshoot_rows(totals_by_partner, partners):
+    data = []
+    for partner in partners:
+        pid = partner['id']
+        agg = totals_by_partner[pid]
+        available = partner.get('current_balance', 0) or 0
+        orders_total = agg['amount_total'] or 0
+        delta = available - orders_total
+        if delta >= 0:
+            continue
+        data.append({
+            'id': pid,
+            'partner_name': partner.get('name'),
+            'order_count': agg['count'],
+            'total_amount': orders_total,
+            'customer_limit': available,
+            'delta': delta,
+            'latest_date': agg.get('create_date')
+        })
+    data.sort(key=lambda d: d['latest_date'] or '', reverse=True)
+    return data
 
 def fetch_overshoot(uid, models):
-    # Overshoot with Delta and Total/Customer metrics
     try:
-        orders = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'sale.order', 'search_read',
-            [[['partner_id', '!=', False]]],
-            {
-                'fields': ['id', 'partner_id', 'amount_total', 'create_date'],
-                'limit': 10000,
-                'order': 'create_date desc'
-            }
-        )
-
-        totals_by_partner = {}
-        for o in orders:
-            pid = o['partner_id'][0]
-            if pid not in totals_by_partner:
-                totals_by_partner[pid] = {
-                    'partner_id': o['partner_id'],
-                    'order_count': 0,
-                    'orders_total': 0,
-                    'latest_date': o.get('create_date')
-                }
-            totals_by_partner[pid]['order_count'] += 1
-            totals_by_partner[pid]['orders_total'] += o.get('amount_total', 0) or 0
-            if o.get('create_date'):
-                totals_by_partner[pid]['latest_date'] = o['create_date']
-
-        partner_ids = list(totals_by_partner.keys())
-        partners = []
-        if partner_ids:
-            partners = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'res.partner', 'search_read',
-                [[['id', 'in', partner_ids]]],
-                {'fields': ['id', 'name', 'credit_limit', 'current_balance']}
-            )
-
-        partner_map = {p['id']: p for p in partners}
-        data = []
-        for pid, agg in totals_by_partner.items():
-            partner = partner_map.get(pid)
-            if not partner:
-                continue
-            available = partner.get('current_balance', 0) or 0
-            orders_total = agg['orders_total']
-            delta = available - orders_total
-            if delta >= 0:
-                continue
-            data.append({
-                'id': pid,
-                'partner_name': partner.get('name'),
-                'order_count': agg['order_count'],
-                'total_amount': orders_total,
-                'customer_limit': available,
-                'delta': delta,
-                'latest_date': agg.get('latest_date')
-            })
-        return data
+        totals_by_partner = aggregate_by_partner(uid, models, 'sale.order', OVERSHOOT_DOMAIN, OVERSHOOT_AGGREGATES)
+        partner_ids = overshoot_partner_ids(totals_by_partner)
+        partners = record_cache.cache.resolve(uid, models, 'res.partner', partner_ids, OVERSHOOT_PARTNER_FIELDS,
+                                              max_age=config.PARTNER_BALANCE_MAX_AGE) if partner_ids else []
+        return overshoot_rows(totals_by_partner, partners)
     except Exception as e:
         print(f"Fetch Overshoot Error: {e}")
-        return []
+        raise
+
+RECONCILIATION_CALL = Call('account.bank.statement.line', 'search_read',
+    [[['is_reconciled', '=', False]]],
+    {'fields': ['id', 'name', 'date', 'amount', 'partner_id'], 'limit': 15, 'order': 'date desc'}
+)
 
 def fetch_reconciliation(uid, models):
     try:
-        reconciles = models.execute_kw(ODOO_DB, uid, ODOO_PASSWORD, 'account.bank.statement.line', 'search_read',
-            [[['is_reconciled', '=', False]]],
-            {'fields': ['id', 'name', 'date', 'amount', 'partner_id'], 'limit': 15, 'order': 'date desc'}
-        )
-        return reconciles
-    except: return []
+        return execute_call(uid, models, RECONCILIATION_CALL)
+    except Exception as e:
+        print(f"Fetch Reconciliation Error: {e}")
+        raise
@@ -0,0 +1,251 @@
+import queue
+import threading
+import time
+import xmlrpc.client
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import metrics
+import odoo_transport
+
+AUTH_FAULT_MARKERS = ('AccessDenied', 'Access Denied', 'Session expired', 'SessionExpired')
+# Metric labels for a batched request, which can carry calls to several models
+BATCH_LABELS = {'model': '(batch)', 'method': 'execute_kw'}
+
+
+def is_auth_fault(error):
+    return isinstance(error, xmlrpc.client.Fault) and any(m in str(error.faultString) for m in AUTH_FAULT_MARKERS)
+
+
+def with_context(kwargs, context):
+    """``kwargs`` with ``context`` merged under the call's own context keys."""
+    if not context:
+        return kwargs or {}
+    kwargs = dict(kwargs or {})
+    kwargs['context'] = {**context, **(kwargs.get('context') or {})}
+    return kwargs
+
+
+@contextmanager
+def no_budget(tenant):
+    yield
+
+
+class PooledModels:
+    """Drop-in for the ``/xmlrpc/2/object`` ServerProxy that borrows a pooled proxy per call.
+
+    Fetchers keep calling ``models.execute_kw(db, uid, password, ...)`` with
+    their tenant's db and password, which are the pool's own; the uid they
+    pass is replaced by the pool's current one, so a call that hit an auth
+    fault can be retried after re-authenticating.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        return self.pool.execute_kw(model, method, args, kwargs)
+
+    def execute_many(self, calls, return_exceptions=False):
+        return self.pool.execute_many(calls, return_exceptions=return_exceptions)
+
+
+class OdooPool:
+    """Fixed set of keep-alive XML-RPC/JSON-RPC proxies sharing one cached login.
+
+    Each proxy owns its own ``Transport`` (and so its own persistent HTTP
+    connection) and is handed to one thread at a time, which makes the pool
+    safe to share between refresh workers.
+
+    ``context`` (e.g. ``allowed_company_ids``) is merged into every call, and
+    with a ``budget`` each request also holds one of its slots, charged to
+    ``tenant``, while on the wire.
+    """
+
+    def __init__(self, url, db, username, password, size=4, protocol='xmlrpc', batching=True, context=None,
+                 budget=None, tenant='default'):
+        self.url = url
+        self.db = db
+        self.username = username
+        self.password = password
+        self.size = size
+        self.protocol = protocol
+        self.batching = batching
+        self.context = context
+        self._budget_slot = budget.slot if budget is not None else no_budget
+        self.tenant = tenant
+        self._batch_labels = {**BATCH_LABELS, 'tenant': tenant}
+        # None until the first batch tells us whether the server accepts the envelope
+        self._batch_supported = None
+        self._fanout = ThreadPoolExecutor(max_workers=size, thread_name_prefix='odoo-fanout')
+        self.models = PooledModels(self)
+        self._uid = None
+        self._auth_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(self._new_proxy())
+        self._used = set()
+        self.stats_counters = {
+            'borrows': 0,
+            'reuses': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+            'calls': 0,
+            'errors': 0,
+            'authentications': 0,
+            'auth_faults': 0,
+            'batches': 0,
+            'batched_calls': 0,
+            'fanout_calls': 0,
+        }
+
+    def _new_proxy(self):
+        return odoo_transport.make_proxy(self.url, self.protocol)
+
+    def _bump(self, key, amount=1):
+        with self._stats_lock:
+            self.stats_counters[key] += amount
+
+    @property
+    def uid(self):
+        if self._uid is None:
+            self.authenticate()
+        return self._uid
+
+    def authenticate(self, stale_uid=None):
+        with self._auth_lock:
+            # Another thread may already have re-authenticated while we waited
+            if self._uid is not None and self._uid != stale_uid:
+                return self._uid
+            common = odoo_transport.make_common(self.url, self.protocol)
+            uid = common.authenticate(self.db, self.username, self.password, {})
+            self._bump('authentications')
+            if not uid:
+                self._uid = None
+                raise ConnectionError("Odoo authentication failed.")
+            self._uid = uid
+            return uid
+
+    def version(self):
+        return odoo_transport.make_common(self.url, self.protocol).version()
+
+    def invalidate(self):
+        with self._auth_lock:
+            self._uid = None
+
+    @contextmanager
+    def connection(self):
+        started = time.perf_counter()
+        proxy = self._idle.get()
+        waited = time.perf_counter() - started
+        metrics.LOCK_WAIT.observe(waited, lock='odoo_pool')
+        with self._stats_lock:
+            c = self.stats_counters
+            c['borrows'] += 1
+            c['wait_seconds_total'] += waited
+            c['wait_seconds_max'] = max(c['wait_seconds_max'], waited)
+            if id(proxy) in self._used:
+                c['reuses'] += 1
+            self._used.add(id(proxy))
+        try:
+            # The global slot is taken only once a proxy is in hand, so it is never held while queueing here
+            with self._budget_slot(self.tenant):
+                yield proxy
+        finally:
+            self._idle.put(proxy)
+
+    @contextmanager
+    def _metered(self, labels):
+        # Round trip time and response bytes of one HTTP request to Odoo
+        odoo_transport.take_received_bytes()
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            metrics.RPC_ERRORS.inc(**labels)
+            raise
+        finally:
+            metrics.RPC_SECONDS.observe(time.perf_counter() - started, **labels)
+            metrics.RPC_BYTES.inc(odoo_transport.take_received_bytes(), **labels)
+
+    def execute_kw(self, model, method, args, kwargs=None):
+        uid = self.uid
+        kwargs = with_context(kwargs, self.context)
+        for attempt in (1, 2):
+            try:
+                labels = {'model': model, 'method': method, 'tenant': self.tenant}
+                with self.connection() as proxy, self._metered(labels):
+                    self._bump('calls')
+                    result = proxy.execute_kw(self.db, uid, self.password, model, method, args, kwargs)
+                metrics.RPC_ROWS.inc(metrics.row_count(result), **labels)
+                return result
+            except Exception as e:
+                self._bump('errors')
+                if attempt == 1 and is_auth_fault(e):
+                    self._bump('auth_faults')
+                    uid = self.authenticate(stale_uid=uid)
+                    continue
+                raise
+
+    def execute_many(self, calls, return_exceptions=False):
+        """Run independent calls in one HTTP request, or concurrently on the pool if the server can't batch."""
+        calls = list(calls)
+        results = None
+        if self.batching and len(calls) > 1 and self._batch_supported is not False:
+            results = self._try_batch(calls)
+        if results is None and len(calls) == 1:
+            results = [self._call_safely(calls[0])]
+        elif results is None:
+            self._bump('fanout_calls', len(calls))
+            futures = [self._fanout.submit(self._call_safely, c) for c in calls]
+            results = [f.result() for f in futures]
+
+        if not return_exceptions:
+            for r in results:
+                if isinstance(r, Exception):
+                    raise r
+        return results
+
+    def _try_batch(self, calls):
+        uid = self.uid
+        try:
+            with self.connection() as proxy, self._metered(self._batch_labels):
+                self._bump('calls')
+                results = odoo_transport.batch_execute(proxy, self.db, uid, self.password,
+                                                       [c._replace(kwargs=with_context(c.kwargs, self.context))
+                                                        for c in calls])
+        except odoo_transport.BatchUnsupported as e:
+            if self._batch_supported is None:
+                print(f"Odoo {self.protocol} batching unavailable, running calls concurrently: {e}")
+            self._batch_supported = False
+            return None
+        self._batch_supported = True
+        self._bump('batches')
+        self._bump('batched_calls', len(calls))
+        # Calls that lost the session inside the batch are retried one by one after re-authenticating
+        for i, r in enumerate(results):
+            if is_auth_fault(r):
+                results[i] = self._call_safely(calls[i])
+            elif isinstance(r, Exception):
+                metrics.RPC_ERRORS.inc(model=calls[i].model, method=calls[i].method, tenant=self.tenant)
+            else:
+                metrics.RPC_ROWS.inc(metrics.row_count(r), model=calls[i].model, method=calls[i].method,
+                                     tenant=self.tenant)
+        return results
+
+    def _call_safely(self, call):
+        try:
+            return self.execute_kw(call.model, call.method, call.args, call.kwargs)
+        except Exception as e:
+            return e
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats_counters)
+        stats['size'] = self.size
+        stats['idle'] = self._idle.qsize()
+        stats['authenticated'] = self._uid is not None
+        stats['protocol'] = self.protocol
+        stats['batch_supported'] = self._batch_supported
+        return stats
@@ -0,0 +1,147 @@
+import threading
+import time
+import xmlrpc.client
+
+import config
+import odoo_transport
+from odoo_pool import is_auth_fault
+from odoo_transport import Call
+
+# Bank journals shown in the Unposted Journals panel (each may also carry an "(ETB)" suffix)
+BANK_JOURNAL_NAMES_RAW = [
+    'Awash Bank Kazanchis 01304108544700',
+    'Oromia International Bank Sal.798577',
+    'Oromia International Bank 2010301',
+    'OBI GOFA 1100477900005',
+    'Awash Bank 01320108544700',
+    'Commercial Bank of Ethiopia 1000178884787',
+    'Debub Global Bank',
+    'Commercial Bank of Ethiopia 1000155628077',
+    'Oromia International Bank 1070202/1',
+    'Cooperative Bank Oromia 24634028',
+    'Oromia International Bank 743829',
+    'Wegagen Bank-07614268',
+    'Nib International Bank 10468286',
+    'United Bank 16350315018',
+    'Cooperative Bank Oromia 1000081172947',
+    'Oromia International Bank 2010308'
+]
+BANK_JOURNAL_NAMES = set(BANK_JOURNAL_NAMES_RAW) | {f"{name} (ETB)" for name in BANK_JOURNAL_NAMES_RAW}
+
+PROBED_MODELS = ['account.invoice', 'account.move', 'bank.deposit']
+PROBED_FIELDS = {
+    'account.move': ['move_type', 'payment_state'],
+    'res.partner': ['partner_code', 'customer', 'customer_rank'],
+}
+
+
+class Schema:
+    """What the connected Odoo database supports, as seen by one probe."""
+
+    def __init__(self, version, models, fields, bank_journal_ids):
+        self.version = version
+        self.models = set(models)
+        self.fields = {model: set(names) for model, names in fields.items()}
+        self.bank_journal_ids = list(bank_journal_ids)
+        self.bank_journal_names = BANK_JOURNAL_NAMES
+        self.probed_at = time.time()
+
+    def has_model(self, model):
+        return model in self.models
+
+    def has_field(self, model, field):
+        return field in self.fields.get(model, ())
+
+    def as_dict(self):
+        return {
+            'version': self.version,
+            'models': sorted(self.models),
+            'fields': {model: sorted(names) for model, names in self.fields.items()},
+            'bank_journal_ids': self.bank_journal_ids,
+            'probed_at': self.probed_at,
+        }
+
+
+def probe_calls():
+    """Models, fields and bank journals: three small queries meant to go out as one batch."""
+    field_names = sorted({f for names in PROBED_FIELDS.values() for f in names})
+    return [
+        Call('ir.model', 'search_read', [[['model', 'in', PROBED_MODELS]]], {'fields': ['model']}),
+        Call('ir.model.fields', 'search_read',
+             [[['model', 'in', list(PROBED_FIELDS)], ['name', 'in', field_names]]], {'fields': ['model', 'name']}),
+        Call('account.journal', 'search_read',
+             [[['type', '=', 'bank'], ['name', 'in', sorted(BANK_JOURNAL_NAMES)]]], {'fields': ['id', 'name']}),
+    ]
+
+
+def schema_from(version, found_models, found_fields, journals):
+    """Build a ``Schema`` from the replies to ``probe_calls``."""
+    fields = {model: [] for model in PROBED_FIELDS}
+    for f in found_fields:
+        if f['name'] in PROBED_FIELDS.get(f['model'], ()):
+            fields[f['model']].append(f['name'])
+
+    return Schema(version, [m['model'] for m in found_models], fields, sorted(j['id'] for j in journals))
+
+
+def probe(uid, models, db, password, version=None):
+    """Resolve models, fields and bank journals in one batch of three small queries."""
+    return schema_from(version, *odoo_transport.execute_batch(models, db, uid, password, probe_calls()))
+
+
+def may_be_drift(error):
+    """Whether a fetch error can mean the schema moved: a server fault (unknown model or field) or a missing key.
+
+    Timeouts, dropped connections and auth faults say nothing about the schema, so they keep the cached probe.
+    """
+    if isinstance(error, xmlrpc.client.Fault):
+        return not is_auth_fault(error)
+    return isinstance(error, KeyError)
+
+
+class SchemaCache:
+    """One database's probed schema, re-probed every SCHEMA_REFRESH_SECONDS or after ``invalidate``."""
+
+    def __init__(self, db, password):
+        self.db = db
+        self.password = password
+        self._schema = None
+        self._lock = threading.Lock()
+
+    def _expired(self):
+        return self._schema is None or time.time() - self._schema.probed_at >= config.SCHEMA_REFRESH_SECONDS
+
+    def _remember(self, schema):
+        self._schema = schema
+        print(f"Probed Odoo {schema.version or '?'} schema: models={sorted(schema.models)}, "
+              f"{len(schema.bank_journal_ids)} bank journals")
+        return schema
+
+    def get(self, uid, models, version_func=None):
+        with self._lock:
+            if self._expired():
+                version = None
+                if version_func is not None:
+                    try:
+                        version = version_func().get('server_version')
+                    except Exception as e:
+                        print(f"Odoo version lookup error: {e}")
+                self._remember(probe(uid, models, self.db, self.password, version))
+            return self._schema
+
+    def fresh(self):
+        """The cached schema while it is still current, else ``None`` (for callers that probe themselves)."""
+        with self._lock:
+            return None if self._expired() else self._schema
+
+    def remember(self, schema):
+        """Cache a schema probed outside ``get``, e.g. by the asyncio fetchers."""
+        with self._lock:
+            return self._remember(schema)
+
+    def invalidate(self):
+        with self._lock:
+            self._schema = None
+
+    def current(self):
+        return self._schema
@@ -0,0 +1,237 @@
+import http.client
+import itertools
+import json
+import threading
+import urllib.parse
+import xmlrpc.client
+from collections import namedtuple
+
+
+class Call(namedtuple('Call', ['model', 'method', 'args', 'kwargs'])):
+    """One ``execute_kw`` that does not depend on the result of any other call in its batch."""
+
+    __slots__ = ()
+
+    def __new__(cls, model, method, args, kwargs=None):
+        return super().__new__(cls, model, method, args, kwargs or {})
+
+
+class BatchUnsupported(Exception):
+    """The server rejected the batch envelope itself (not one of the calls in it)."""
+
+
+# HTTP statuses a server or proxy in front of it answers when it will not take a batch request at all
+BATCH_REJECTED_STATUSES = frozenset({400, 404, 405, 413, 501})
+
+
+def rejected_batch(error):
+    """``BatchUnsupported`` for a batch request's ``ProtocolError`` that refuses batching, else ``error``."""
+    if error.errcode in BATCH_REJECTED_STATUSES:
+        return BatchUnsupported(f"HTTP {error.errcode} {error.errmsg}")
+    return error
+
+
+# Response body bytes read by each thread since it last asked, for the per-RPC metrics
+_received = threading.local()
+
+
+def _count_received(n):
+    _received.bytes = getattr(_received, 'bytes', 0) + n
+
+
+def take_received_bytes():
+    n = getattr(_received, 'bytes', 0)
+    _received.bytes = 0
+    return n
+
+
+class _CountingResponse:
+    """Wraps an ``HTTPResponse`` so ``Transport.parse_response`` reads through a byte counter."""
+
+    def __init__(self, response):
+        self._response = response
+
+    def read(self, amt=None):
+        data = self._response.read(amt)
+        _count_received(len(data))
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class MeteredTransport(xmlrpc.client.Transport):
+    def parse_response(self, response):
+        return super().parse_response(_CountingResponse(response))
+
+
+class MeteredSafeTransport(xmlrpc.client.SafeTransport):
+    def parse_response(self, response):
+        return super().parse_response(_CountingResponse(response))
+
+
+class JsonRpcProxy:
+    """Minimal keep-alive client for Odoo's ``/jsonrpc`` endpoint.
+
+    Exposes the same ``execute_kw`` signature as the XML-RPC object proxy and
+    raises ``xmlrpc.client.Fault`` for server errors, so callers (and auth
+    fault detection) cannot tell the two backends apart.
+    """
+
+    def __init__(self, url, timeout=60):
+        parts = urllib.parse.urlsplit(url)
+        self._https = parts.scheme == 'https'
+        self._host = parts.netloc
+        self._path = (parts.path.rstrip('/') or '') + '/jsonrpc'
+        self._timeout = timeout
+        self._conn = None
+        self._ids = itertools.count(1)
+
+    def _connection(self):
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            self._conn = cls(self._host, timeout=self._timeout)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _post(self, payload):
+        body = json.dumps(payload).encode('utf-8')
+        try:
+            conn = self._connection()
+            conn.request('POST', self._path, body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            data = response.read()
+            _count_received(len(data))
+        except Exception:
+            self.close()
+            raise
+        if response.status != 200:
+            raise xmlrpc.client.ProtocolError(self._host + self._path, response.status, response.reason, {})
+        return json.loads(data)
+
+    def _request(self, service, method, args):
+        return jsonrpc_request(next(self._ids), service, method, args)
+
+    def call(self, service, method, *args):
+        return unwrap_reply(self._post(self._request(service, method, list(args))))
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        return self.call('object', 'execute_kw', db, uid, password, model, method, args, kwargs or {})
+
+    def batch(self, db, uid, password, calls):
+        payload = [self._request('object', 'execute_kw', [db, uid, password, c.model, c.method, c.args, c.kwargs])
+                   for c in calls]
+        return jsonrpc_batch_results(payload, self._post(payload))
+
+
+class JsonRpcService:
+    """``ServerProxy``-style attribute access for one JSON-RPC service (e.g. ``common``)."""
+
+    def __init__(self, proxy, service):
+        self._proxy = proxy
+        self._service = service
+
+    def __getattr__(self, method):
+        return lambda *args: self._proxy.call(self._service, method, *args)
+
+
+def jsonrpc_request(request_id, service, method, args):
+    return {'jsonrpc': '2.0', 'method': 'call', 'id': request_id,
+            'params': {'service': service, 'method': method, 'args': args}}
+
+
+def jsonrpc_batch_results(payload, replies):
+    """Match a JSON-RPC batch reply to its requests; per-call errors come back as ``Fault`` values."""
+    if not isinstance(replies, list):
+        raise BatchUnsupported(error_text(replies.get('error')) if isinstance(replies, dict) else replies)
+    by_id = {r.get('id'): r for r in replies}
+    results = []
+    for req in payload:
+        reply = by_id.get(req['id'])
+        if reply is None:
+            raise BatchUnsupported(f"no reply for request {req['id']}")
+        try:
+            results.append(unwrap_reply(reply))
+        except xmlrpc.client.Fault as e:
+            results.append(e)
+    return results
+
+
+def error_text(error):
+    if not error:
+        return 'unknown error'
+    data = error.get('data') or {}
+    return f"{data.get('name', '')}: {data.get('message') or error.get('message', '')}".strip(': ')
+
+
+def unwrap_reply(reply):
+    if 'error' in reply:
+        error = reply['error']
+        raise xmlrpc.client.Fault(error.get('code', 0), error_text(error))
+    return reply.get('result')
+
+
+def make_proxy(url, protocol='xmlrpc'):
+    if protocol == 'jsonrpc':
+        return JsonRpcProxy(url)
+    transport = MeteredSafeTransport() if url.startswith('https') else MeteredTransport()
+    return xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/object", transport=transport, allow_none=True)
+
+
+def make_common(url, protocol='xmlrpc'):
+    if protocol == 'jsonrpc':
+        return JsonRpcService(JsonRpcProxy(url), 'common')
+    return xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/common")
+
+
+def batch_execute(proxy, db, uid, password, calls):
+    """Send ``calls`` in one HTTP request; per-call faults come back as ``Fault`` values."""
+    try:
+        if isinstance(proxy, JsonRpcProxy):
+            return proxy.batch(db, uid, password, calls)
+        replies = proxy.system.multicall(multicall_envelope(db, uid, password, calls))
+    except xmlrpc.client.Fault as e:
+        raise BatchUnsupported(e.faultString)
+    except xmlrpc.client.ProtocolError as e:
+        raise rejected_batch(e)
+    return multicall_results(replies)
+
+
+def multicall_envelope(db, uid, password, calls):
+    return [{'methodName': 'execute_kw', 'params': [db, uid, password, c.model, c.method, c.args, c.kwargs]}
+            for c in calls]
+
+
+def multicall_results(replies):
+    results = []
+    for reply in replies:
+        if isinstance(reply, dict):
+            results.append(xmlrpc.client.Fault(reply.get('faultCode'), reply.get('faultString')))
+        else:
+            results.append(reply[0])
+    return results
+
+
+def execute_batch(models, db, uid, password, calls, return_exceptions=False):
+    """Run independent calls together when ``models`` can batch, one by one otherwise.
+
+    Results come back in call order. With ``return_exceptions`` a failed call
+    yields its exception instead of aborting the rest.
+    """
+    calls = [c if isinstance(c, Call) else Call(*c) for c in calls]
+    if hasattr(type(models), 'execute_many'):
+        return models.execute_many(calls, return_exceptions=return_exceptions)
+
+    results = []
+    for c in calls:
+        try:
+            results.append(models.execute_kw(db, uid, password, c.model, c.method, c.args, c.kwargs))
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results.append(e)
+    return results
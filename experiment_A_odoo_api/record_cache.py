@@ -0,0 +1,196 @@
+import collections
+import threading
+import time
+
+import config
+import odoo_transport
+import tenants
+from odoo_transport import Call
+
+
+class _Entry:
+    __slots__ = ('record', 'fields', 'write_date', 'checked_at', 'read_at')
+
+    def __init__(self, record, fields, write_date, now):
+        self.record = record
+        self.fields = fields
+        self.write_date = write_date
+        self.checked_at = now
+        self.read_at = now
+
+
+class _Plan:
+    """What one ``resolve`` needs from Odoo: the reads of missing ids and the write_date checks of expired ones."""
+
+    def __init__(self, tenant, model, ids, fields):
+        self.tenant = tenant
+        self.model = model
+        self.ids = list(ids)
+        self.fields = sorted(set(fields) | {'id'})
+        self.found = {}
+        self.missing = []
+        self.expired = {}
+
+    def calls(self):
+        calls = []
+        if self.missing:
+            calls.append(read_call(self.model, self.missing, self.fields))
+        if self.expired:
+            # Ids only: an unchanged record costs a few bytes, not its fields
+            calls.append(Call(self.model, 'search_read', [[['id', 'in', sorted(self.expired)]]],
+                              {'fields': ['id', 'write_date']}))
+        return calls
+
+
+def read_call(model, ids, fields):
+    return Call(model, 'read', [list(ids)], {'fields': list(fields) + ['write_date']})
+
+
+class RecordCache:
+    """Process-wide cache of records read by id, keyed by (tenant, model, id).
+
+    Fetchers ask for a batch of ids with ``resolve``; cached records come
+    back without a round trip and every id not cached is fetched in one
+    ``read`` per model. An entry older than its model's TTL
+    (``RECORD_CACHE_TTLS``) is revalidated rather than re-read: one
+    id/write_date ``search_read`` rides in the same batch, and only records
+    whose ``write_date`` moved are read again. Callers whose fields change
+    without a write (computed balances) pass ``max_age`` to force a re-read.
+    At most ``max_entries`` records are kept, least recently used first out.
+    """
+
+    def __init__(self, max_entries=None, ttls=None, default_ttl=None):
+        self.max_entries = config.RECORD_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttls = dict(config.RECORD_CACHE_TTLS if ttls is None else ttls)
+        self.default_ttl = config.RECORD_CACHE_DEFAULT_TTL if default_ttl is None else default_ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'revalidated': 0, 'invalidated': 0, 'evictions': 0}
+
+    def _plan(self, model, ids, fields, max_age, revalidate=True):
+        tenant = tenants.current().name
+        plan = _Plan(tenant, model, ids, fields)
+        wanted = set(plan.fields)
+        ttl = self.ttls.get(model, self.default_ttl)
+        now = time.time()
+        with self._lock:
+            for i in dict.fromkeys(plan.ids):
+                entry = self._entries.get((tenant, model, i))
+                if (entry is None or not wanted <= entry.fields
+                        or (max_age is not None and now - entry.read_at >= max_age)):
+                    plan.missing.append(i)
+                    continue
+                if now - entry.checked_at >= ttl:
+                    if not revalidate:
+                        plan.missing.append(i)
+                        continue
+                    plan.expired[i] = entry.write_date
+                self._entries.move_to_end((tenant, model, i))
+                plan.found[i] = entry.record
+            self.counters['hits'] += len(plan.found)
+            self.counters['misses'] += len(plan.missing)
+        return plan
+
+    def _store(self, plan, rows):
+        now = time.time()
+        wanted = set(plan.fields)
+        with self._lock:
+            for row in rows:
+                write_date = row.pop('write_date', None)
+                key = (plan.tenant, plan.model, row['id'])
+                self._entries[key] = _Entry(row, wanted, write_date, now)
+                self._entries.move_to_end(key)
+                plan.found[row['id']] = row
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def _changed(self, plan, stamps):
+        """Ids among ``plan.expired`` whose write_date moved; the rest count as fresh again."""
+        now = time.time()
+        current = {s['id']: s.get('write_date') for s in stamps}
+        changed = []
+        with self._lock:
+            for i, write_date in plan.expired.items():
+                entry = self._entries.get((plan.tenant, plan.model, i))
+                if i not in current or current[i] != write_date:
+                    # Written or deleted since we read it
+                    self._entries.pop((plan.tenant, plan.model, i), None)
+                    plan.found.pop(i, None)
+                    if i in current:
+                        changed.append(i)
+                    self.counters['invalidated'] += 1
+                elif entry is not None:
+                    entry.checked_at = now
+                    self.counters['revalidated'] += 1
+        return changed
+
+    def _result(self, plan):
+        return [plan.found[i] for i in plan.ids if i in plan.found]
+
+    def resolve(self, uid, models, model, ids, fields, max_age=None):
+        """Records of ``ids`` in the order asked (ids Odoo no longer has are left out)."""
+        plan = self._plan(model, ids, fields, max_age)
+        calls = plan.calls()
+        if calls:
+            tenant = tenants.current()
+            results = odoo_transport.execute_batch(models, tenant.db, uid, tenant.password, calls)
+            self._apply(plan, results)
+            changed = self._changed(plan, results[-1]) if plan.expired else []
+            if changed:
+                call = read_call(model, changed, plan.fields)
+                self._store(plan, models.execute_kw(tenant.db, uid, tenant.password, call.model, call.method,
+                                                    call.args, call.kwargs))
+        return self._result(plan)
+
+    async def aresolve(self, uid, models, model, ids, fields, max_age=None):
+        """``resolve`` over ``odoo_async`` models."""
+        plan = self._plan(model, ids, fields, max_age)
+        calls = plan.calls()
+        if calls:
+            tenant = tenants.current()
+            results = await models.execute_many(calls)
+            self._apply(plan, results)
+            changed = self._changed(plan, results[-1]) if plan.expired else []
+            if changed:
+                call = read_call(model, changed, plan.fields)
+                self._store(plan, await models.execute_kw(tenant.db, uid, tenant.password, call.model, call.method,
+                                                          call.args, call.kwargs))
+        return self._result(plan)
+
+    def _apply(self, plan, results):
+        if plan.missing:
+            self._store(plan, results[0])
+
+    def lookup(self, model, ids, fields):
+        """Cached records of ``ids`` without asking Odoo: ``(found, missing)``, for callers with their own query.
+
+        Entries past their TTL count as missing, since there is no write_date to revalidate them by.
+        """
+        plan = self._plan(model, ids, fields, None, revalidate=False)
+        return plan.found, plan.missing
+
+    def put(self, model, rows, fields):
+        """Cache rows a caller fetched itself (``fields`` is what each row holds)."""
+        plan = _Plan(tenants.current().name, model, (), fields)
+        self._store(plan, rows)
+
+    def invalidate(self, model=None, ids=None):
+        tenant = tenants.current().name
+        with self._lock:
+            keys = [k for k in self._entries
+                    if k[0] == tenant and (model is None or k[1] == model) and (ids is None or k[2] in ids)]
+            for key in keys:
+                del self._entries[key]
+            self.counters['invalidated'] += len(keys)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+            stats['by_model'] = dict(collections.Counter(f"{t}:{m}" for t, m, _ in self._entries))
+        stats['max_entries'] = self.max_entries
+        return stats
+
+
+cache = RecordCache()
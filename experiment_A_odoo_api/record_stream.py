@@ -0,0 +1,125 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import tenants
+from odoo_transport import Call
+
+# Runs the read-ahead page requests of threaded streams
+_prefetch = None
+_prefetch_lock = threading.Lock()
+
+
+def page_call(model, domain, fields, last_id, page_size):
+    """One keyset page: the next ``page_size`` rows with ``id > last_id``, in id order."""
+    return Call(model, 'search_read', [domain + [['id', '>', last_id]]],
+                {'fields': fields, 'order': 'id asc', 'limit': page_size})
+
+
+def run_stages(rows, stages):
+    """Pass each row through ``stages`` in turn; a stage returning ``None`` drops the row."""
+    if not stages:
+        return rows
+    out = []
+    for row in rows:
+        for stage in stages:
+            row = stage(row)
+            if row is None:
+                break
+        else:
+            out.append(row)
+    return out
+
+
+def _prefetcher():
+    global _prefetch
+    with _prefetch_lock:
+        if _prefetch is None:
+            _prefetch = ThreadPoolExecutor(max_workers=config.ODOO_POOL_SIZE, thread_name_prefix='odoo-prefetch')
+        return _prefetch
+
+
+class RecordStream:
+    """A ``search_read`` read in id-keyset pages instead of one response holding every row.
+
+    Each page is one bounded request (``WHERE id > last_seen ORDER BY id
+    LIMIT page_size``), so no response, and no parsed copy of it, is larger
+    than a page whatever the result size, and rows are not skipped or
+    repeated when records are written between pages the way ``offset``
+    paging can. ``stages`` (``row -> row or None``) normalize and filter each
+    page as it arrives, before the next one is requested; with ``prefetch``
+    the next page is already on the wire while the caller works on this one.
+
+    ``first_page`` lets a caller that sent page one inside a batch of its own
+    (see ``delta_sync``) hand the reply over; the stream continues from it.
+    Iterate with ``pages()`` (threaded ``models``) or ``apages()``
+    (``odoo_async`` models), or over the stream for single rows.
+    """
+
+    def __init__(self, uid, models, model, domain, fields, stages=(), page_size=None, prefetch=None,
+                 first_page=None):
+        self.uid = uid
+        self.models = models
+        # Captured here: read-ahead pages run on executor threads outside the caller's tenant context
+        self.tenant = tenants.current()
+        self.model = model
+        self.domain = domain
+        self.fields = fields
+        self.stages = list(stages)
+        self.page_size = page_size or config.ODOO_PAGE_SIZE
+        self.prefetch = config.ODOO_PREFETCH if prefetch is None else prefetch
+        self.first_page = first_page
+        self.rows_read = 0
+        self.page_count = 0
+
+    def first_call(self):
+        return page_call(self.model, self.domain, self.fields, 0, self.page_size)
+
+    def _next_call(self, page):
+        # A short page is the last one
+        if len(page) < self.page_size:
+            return None
+        return page_call(self.model, self.domain, self.fields, page[-1]['id'], self.page_size)
+
+    def _execute(self, call):
+        return self.models.execute_kw(self.tenant.db, self.uid, self.tenant.password, call.model, call.method,
+                                      call.args, call.kwargs)
+
+    def _staged(self, page):
+        self.page_count += 1
+        self.rows_read += len(page)
+        return run_stages(page, self.stages)
+
+    def pages(self):
+        page = self.first_page if self.first_page is not None else self._execute(self.first_call())
+        while True:
+            call = self._next_call(page)
+            ahead = _prefetcher().submit(self._execute, call) if call and self.prefetch else None
+            yield self._staged(page)
+            if call is None:
+                return
+            page = ahead.result() if ahead is not None else self._execute(call)
+
+    def __iter__(self):
+        for page in self.pages():
+            yield from page
+
+    async def apages(self):
+        page = self.first_page if self.first_page is not None else await self._aexecute(self.first_call())
+        while True:
+            call = self._next_call(page)
+            ahead = asyncio.ensure_future(self._aexecute(call)) if call and self.prefetch else None
+            try:
+                yield self._staged(page)
+            except BaseException:
+                if ahead is not None:
+                    ahead.cancel()
+                raise
+            if call is None:
+                return
+            page = await ahead if ahead is not None else await self._aexecute(call)
+
+    async def _aexecute(self, call):
+        return await self.models.execute_kw(self.tenant.db, self.uid, self.tenant.password, call.model,
+                                            call.method, call.args, call.kwargs)
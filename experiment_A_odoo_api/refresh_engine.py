@@ -0,0 +1,331 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import async_fetchers
+import config
+import metrics
+import odoo_api
+import odoo_async
+import odoo_schema
+import tenants
+from columnar_store import ColumnarSnapshot
+
+# Section name -> fetcher. Order only matters for submission; sections publish
+# independently as soon as their own fetch completes.
+SECTIONS = [
+    ('invoices', odoo_api.fetch_invoices),
+    ('journals', odoo_api.fetch_journals),
+    ('quotations', odoo_api.fetch_quotations),
+    ('customers', odoo_api.fetch_customers),
+    ('overshoot', odoo_api.fetch_overshoot),
+    ('reconciliation', odoo_api.fetch_reconciliation),
+]
+
+
+class SectionState:
+    """Timing and failure bookkeeping for a single cached section."""
+
+    def __init__(self, name):
+        self.name = name
+        self.last_updated = None
+        self.last_duration = None
+        self.last_error = None
+        self.last_error_at = None
+        self.consecutive_failures = 0
+        self.refresh_count = 0
+        self.row_count = 0
+        # Where the current data came from: 'odoo', 'shared' (refresher process) or 'disk' (warm start)
+        self.source = None
+
+    def record_success(self, duration, row_count, updated_at=None, source='odoo'):
+        self.last_updated = updated_at or time.time()
+        self.source = source
+        self.last_duration = duration
+        self.consecutive_failures = 0
+        self.refresh_count += 1
+        self.row_count = row_count
+
+    def record_failure(self, duration, error):
+        self.last_duration = duration
+        self.last_error = str(error)
+        self.last_error_at = time.time()
+        self.consecutive_failures += 1
+
+    def as_dict(self):
+        return {
+            'last_updated': self.last_updated,
+            'last_duration': self.last_duration,
+            'last_error': self.last_error,
+            'last_error_at': self.last_error_at,
+            'consecutive_failures': self.consecutive_failures,
+            'refresh_count': self.refresh_count,
+            'row_count': self.row_count,
+            'source': self.source,
+        }
+
+
+class RefreshEngine:
+    """Runs the section fetchers concurrently on a bounded worker pool.
+
+    Each section is published into ``cache`` under ``lock`` the moment its
+    fetcher returns, so quick panels never wait on slow ones. A section that
+    is already being refreshed is not submitted twice; callers get the
+    in-flight future instead.
+
+    With a ``shared`` cache only the elected refresher process runs the
+    fetchers; in every other process a "refresh" loads the refresher's latest
+    snapshot from the shared directory and publishes it locally.
+
+    With ``snapshots`` (a ``SnapshotStore``) every section fetched from Odoo
+    is also saved to disk. After a restart the first request for a section
+    gets the saved copy straight away, marked stale, while the real fetch runs
+    in the background.
+
+    With ``use_async`` (``ODOO_ASYNC``) every section's fetch runs as a
+    coroutine of ``async_fetchers`` on a single event-loop thread, so many
+    RPCs are in flight without a thread each; the worker pool then only does
+    the CPU-bound publish step. Engines of all tenants share that loop.
+
+    Fetches run for ``tenant`` (``tenants.Tenant``, default: the default
+    tenant): its connections, schema and sync stores.
+    """
+
+    def __init__(self, cache, lock, sections=None, max_workers=4, columnar=None, shared=None, snapshots=None,
+                 use_async=None, tenant=None):
+        self.tenant = tenant or tenants.default()
+        self.cache = cache
+        self.columnar = config.COLUMNAR_CACHE if columnar is None else columnar
+        self.shared = shared
+        self.snapshots = snapshots
+        self._shared_versions = {}
+        self.lock = lock
+        self.sections = dict(sections or SECTIONS)
+        self.state = {name: SectionState(name) for name in self.sections}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix=f'refresh-{self.tenant.name}')
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._publish_locks = {name: threading.Lock() for name in self.sections}
+        self._listeners = []
+        self._result_listeners = []
+        self.event_loop = None
+        if config.ODOO_ASYNC if use_async is None else use_async:
+            self.async_sections = dict(async_fetchers.SECTIONS)
+            self.event_loop = odoo_async.shared_loop()
+
+    def add_listener(self, listener):
+        """Call ``listener(name, data)`` on the worker thread each time a section is published."""
+        self._listeners.append(listener)
+
+    def add_result_listener(self, listener):
+        """Call ``listener(name, ok)`` after every Odoo fetch of a section, successful or not."""
+        self._result_listeners.append(listener)
+
+    def _notify_result(self, name, ok):
+        for listener in self._result_listeners:
+            try:
+                listener(name, ok)
+            except Exception as e:
+                print(f"✗ {name} result listener error: {e}")
+
+    def submit(self, name, uid=None):
+        with self._inflight_lock:
+            future = self._inflight.get(name)
+            if future is not None and not future.done():
+                return future
+            if self.event_loop is not None:
+                future = self.event_loop.submit(self._run_async(name))
+            else:
+                future = self._executor.submit(self._run, name, uid)
+            self._inflight[name] = future
+            return future
+
+    def is_refresher(self):
+        return self.shared is None or self.shared.elect()
+
+    def refresh_all(self):
+        uid = None
+        # The asyncio client logs in on its own loop, on first use
+        if self.is_refresher() and self.event_loop is None:
+            with tenants.use(self.tenant):
+                uid, _ = odoo_api.get_connection()
+            if not uid:
+                print("Failed to connect to Odoo.")
+                return False
+        futures = [self.submit(name, uid) for name in self.sections]
+        wait(futures)
+        with self.lock:
+            self.cache['last_updated'] = time.time()
+        return all(f.result() for f in futures)
+
+    def get_snapshot(self, name, max_age):
+        """Return ``(data, age)`` for a section without waiting on Odoo.
+
+        Stale data is served as-is and a single background revalidation is
+        started for it; so is a snapshot saved by the previous run. Only a
+        section that has never been loaded and has nothing on disk blocks the
+        caller, and then only on its own fetch.
+        """
+        state = self.state[name]
+        if state.last_updated is None and not self._warm_start(name):
+            self.submit(name).result()
+        elif state.source == 'disk' or time.time() - state.last_updated >= max_age:
+            self.submit(name)
+
+        with metrics.timed_lock(self.lock, 'cache'):
+            data = self.cache.get(name, [])
+        age = time.time() - state.last_updated if state.last_updated else None
+        return data, age
+
+    def is_stale(self, name, max_age):
+        state = self.state[name]
+        return (state.last_updated is None or state.source == 'disk'
+                or time.time() - state.last_updated >= max_age)
+
+    def revalidate_stale(self, max_age):
+        """Start background refreshes for every stale or never-loaded section, without waiting.
+
+        ``max_age`` is a number of seconds or a ``max_age(name)`` callable.
+        """
+        for name in self.state:
+            if self.is_stale(name, max_age(name) if callable(max_age) else max_age):
+                self.submit(name)
+
+    def is_refreshing(self, name):
+        with self._inflight_lock:
+            future = self._inflight.get(name)
+            return future is not None and not future.done()
+
+    def status(self):
+        return {name: state.as_dict() for name, state in self.state.items()}
+
+    def memory(self):
+        """Per-section footprint of the cached snapshots (columnar sections only)."""
+        with self.lock:
+            snapshots = {name: self.cache.get(name) for name in self.sections}
+        return {name: data.memory() for name, data in snapshots.items() if isinstance(data, ColumnarSnapshot)}
+
+    def _run(self, name, uid):
+        if not self.is_refresher():
+            return self._follow(name)
+        started = time.perf_counter()
+        try:
+            with tenants.use(self.tenant):
+                if uid is None:
+                    uid, _ = odoo_api.get_connection()
+                    if not uid:
+                        raise ConnectionError("Failed to connect to Odoo.")
+                result = self.sections[name](uid, odoo_api.get_models_proxy())
+        except Exception as e:
+            return self._fail(name, started, e)
+        return self._complete(name, started, result)
+
+    async def _run_async(self, name):
+        if not self.is_refresher():
+            return await asyncio.to_thread(self._follow, name)
+        started = time.perf_counter()
+        try:
+            with tenants.use(self.tenant):
+                uid, models = await async_fetchers.get_connection()
+                result = await self.async_sections[name](uid, models)
+        except Exception as e:
+            return self._fail(name, started, e)
+        # Columnarizing, encoding and indexing are CPU work: publish from the pool, off the event loop
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._complete, name, started, result)
+
+    def _fail(self, name, started, error):
+        state = self.state[name]
+        if odoo_schema.may_be_drift(error):
+            # Re-probe models/fields/journals on the next fetch in case the schema moved
+            self.tenant.schema.invalidate()
+        state.record_failure(time.perf_counter() - started, error)
+        metrics.REFRESH_SECONDS.observe(state.last_duration, section=name, result='error',
+                                        tenant=self.tenant.name)
+        print(f"✗ {name} refresh error: {error}")
+        self._notify_result(name, False)
+        return False
+
+    def _complete(self, name, started, result):
+        state = self.state[name]
+        with metrics.timed_lock(self._publish_locks[name], 'publish'):
+            result = self._publish(name, result)
+            state.record_success(time.perf_counter() - started, len(result))
+        metrics.REFRESH_SECONDS.observe(state.last_duration, section=name, result='ok', tenant=self.tenant.name)
+        print(f"✓ {name}: {len(result)} rows in {state.last_duration:.2f}s")
+        if self.snapshots is not None:
+            try:
+                self.snapshots.save_section(name, result, state.last_updated)
+            except OSError as e:
+                print(f"✗ {name} snapshot save error: {e}")
+        self._notify_result(name, True)
+        return True
+
+    def _warm_start(self, name):
+        """Publish the section saved by a previous run, if any; the caller then refreshes it."""
+        if self.snapshots is None or not self.is_refresher():
+            return False
+        loaded = self.snapshots.load_section(name)
+        if loaded is None:
+            return False
+        snapshot, updated_at = loaded
+        state = self.state[name]
+        with metrics.timed_lock(self._publish_locks[name], 'publish'):
+            # A real fetch may have landed while we were reading the file
+            if state.last_updated is not None:
+                return True
+            self._publish(name, snapshot)
+            state.record_success(0, len(snapshot), updated_at=updated_at, source='disk')
+        print(f"↺ {name}: {len(snapshot)} rows from disk snapshot")
+        return True
+
+    def _follow(self, name):
+        """Publish the shared refresher's snapshot of ``name`` if it changed since we last loaded it."""
+        state = self.state[name]
+        started = time.perf_counter()
+        wait = config.SHARED_CACHE_WAIT_SECONDS if state.last_updated is None else 0
+        section = self.shared.wait(name, wait)
+        if section is None:
+            state.record_failure(time.perf_counter() - started, "no shared snapshot published yet")
+            return False
+        seen = self._shared_versions.get(name)
+        if seen == section.version:
+            return True
+        if seen is not None and seen[0] == section.digest:
+            # Re-published without changes: only the age moves
+            self._shared_versions[name] = section.version
+            state.last_updated = section.updated_at
+            return True
+        try:
+            # Mapped read-only from the refresher's columns file: no parse and no per-worker copy
+            result = section.rows()
+        except (OSError, ValueError) as e:
+            # The refresher replaced this generation mid-read; the next poll picks up the new one
+            state.record_failure(time.perf_counter() - started, e)
+            return False
+        with metrics.timed_lock(self._publish_locks[name], 'publish'):
+            self._publish(name, result)
+            self._shared_versions[name] = section.version
+            state.record_success(time.perf_counter() - started, len(result), updated_at=section.updated_at,
+                                 source='shared')
+        return True
+
+    def _publish(self, name, result):
+        if isinstance(result, ColumnarSnapshot):
+            if not self.columnar:
+                result = result.to_list()
+        elif self.columnar:
+            # Listeners still iterate the fetched rows; only the columns outlive the publish
+            result = ColumnarSnapshot(result)
+        with metrics.timed_lock(self.lock, 'cache'):
+            self.cache[name] = result
+        metrics.SECTION_ROWS.set(len(result), section=name, tenant=self.tenant.name)
+        for listener in self._listeners:
+            try:
+                listener(name, result)
+            except Exception as e:
+                print(f"✗ {name} publish listener error: {e}")
+        if self.columnar:
+            result.release()
+        return result
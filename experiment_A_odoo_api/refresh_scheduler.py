@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+
+import config
+
+# Weight of the latest refresh in a section's change rate (exponentially weighted)
+CHANGE_RATE_ALPHA = 0.3
+
+
+class SectionSchedule:
+    """When one section is next due, and why.
+
+    The interval slides between the section's bounds with its recent change
+    rate: a section whose data changed on every refresh runs at
+    ``min_interval``, one that never changes drifts to ``max_interval``. It is
+    never shorter than ``REFRESH_COST_FACTOR`` times the last fetch duration,
+    so a slow fetch cannot keep Odoo busy more than that share of the time. Errors
+    push the next attempt out with jittered exponential backoff instead.
+    """
+
+    def __init__(self, name, min_interval, max_interval):
+        self.name = name
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        # Assume volatile until refreshes show otherwise
+        self.change_rate = 1.0
+        self.fingerprint = None
+        self.failures = 0
+        self.next_due = 0.0
+        self.last_requested = None
+        self.paused = False
+        self.skipped_idle = 0
+
+    def record_success(self, duration, fingerprint, now):
+        changed = fingerprint is None or fingerprint != self.fingerprint
+        self.fingerprint = fingerprint
+        self.failures = 0
+        self.change_rate = CHANGE_RATE_ALPHA * changed + (1 - CHANGE_RATE_ALPHA) * self.change_rate
+        interval = self.min_interval + (self.max_interval - self.min_interval) * (1 - self.change_rate)
+        interval = max(interval, (duration or 0) * config.REFRESH_COST_FACTOR)
+        self.interval = min(interval, self.max_interval)
+        self.next_due = now + self.interval
+
+    def record_failure(self, now):
+        self.failures += 1
+        backoff = min(config.REFRESH_BACKOFF_MAX_SECONDS,
+                      config.REFRESH_BACKOFF_BASE_SECONDS * 2 ** (self.failures - 1))
+        # Jitter so sections (and worker processes) that failed together do not retry together
+        self.next_due = now + random.uniform(backoff / 2, backoff)
+
+    def is_idle(self, now, last_requested=None):
+        if config.REFRESH_IDLE_SECONDS <= 0:
+            return False
+        last = max(filter(None, (self.last_requested, last_requested)), default=None)
+        return last is None or now - last > config.REFRESH_IDLE_SECONDS
+
+    def as_dict(self, now):
+        return {
+            'interval': round(self.interval, 1),
+            'change_rate': round(self.change_rate, 3),
+            'failures': self.failures,
+            'next_due_in': round(max(self.next_due - now, 0), 1),
+            'paused': self.paused,
+            'skipped_idle': self.skipped_idle,
+        }
+
+
+class AdaptiveScheduler:
+    """Decides which sections the refresh engine should fetch, and when.
+
+    ``run_pending()`` is called on a short tick and submits every section
+    that is due, unless nobody has asked for it within
+    ``REFRESH_IDLE_SECONDS``. Requests for a skipped section still get the
+    cached data at once and start a refresh through the engine. The engine
+    reports every fetch outcome back through a result listener, including
+    fetches triggered by requests, so all of them feed the same schedule.
+
+    ``fingerprint(name)`` identifies the published content, e.g. the encoded
+    digest, and is how a refresh that changed nothing is recognised. Passing
+    ``shared`` (a ``SharedCache``) counts requests served by other worker
+    processes as demand too.
+    """
+
+    def __init__(self, engine, intervals=None, fingerprint=None, shared=None):
+        self.engine = engine
+        self.fingerprint = fingerprint
+        self.shared = shared
+        intervals = intervals or config.SECTION_REFRESH_INTERVALS
+        default = (config.REFRESH_MIN_SECONDS, config.REFRESH_MAX_SECONDS)
+        self.schedules = {name: SectionSchedule(name, *intervals.get(name, default)) for name in engine.sections}
+        self._lock = threading.Lock()
+        engine.add_result_listener(self.record_result)
+
+    def record_result(self, name, ok):
+        schedule = self.schedules.get(name)
+        if schedule is None:
+            return
+        now = time.time()
+        with self._lock:
+            if ok:
+                fingerprint = self.fingerprint(name) if self.fingerprint else None
+                schedule.record_success(self.engine.state[name].last_duration, fingerprint, now)
+            else:
+                schedule.record_failure(now)
+
+    def touch(self, *names):
+        """Note that a client asked for these sections (all of them when none are given)."""
+        now = time.time()
+        for name in names or self.schedules:
+            schedule = self.schedules.get(name)
+            if schedule is not None:
+                schedule.last_requested = now
+                if self.shared is not None:
+                    self.shared.mark_wanted(name)
+
+    def max_age(self, name):
+        """Age at which the cached copy counts as stale: whenever the section is next due."""
+        schedule = self.schedules[name]
+        last_updated = self.engine.state[name].last_updated
+        if not schedule.next_due or last_updated is None:
+            return schedule.min_interval
+        return max(schedule.next_due - last_updated, 0)
+
+    def run_pending(self):
+        now = time.time()
+        for name, schedule in self.schedules.items():
+            if now < schedule.next_due or self.engine.is_refreshing(name):
+                continue
+            wanted = self.shared.last_wanted(name) if self.shared is not None else None
+            if schedule.is_idle(now, wanted):
+                if not schedule.paused:
+                    schedule.paused = True
+                    schedule.skipped_idle += 1
+                continue
+            schedule.paused = False
+            self.engine.submit(name)
+
+    def status(self, name):
+        return self.schedules[name].as_dict(time.time())
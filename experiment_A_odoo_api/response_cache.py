@@ -0,0 +1,85 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def accepted_encodings(accept_encoding):
+    return {part.split(';')[0].strip().lower() for part in (accept_encoding or '').split(',')}
+
+
+class TaggedSnapshot:
+    """ETag handling shared by every pre-encoded representation of a section; needs ``digest``."""
+
+    digest = None
+
+    def etag(self, encoding=None):
+        # Each representation gets its own strong tag; the digest part identifies the content
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def matches(self, if_none_match):
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*':
+                return True
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag.strip('"').split('-')[0] == self.digest:
+                return True
+        return False
+
+
+class EncodedSnapshot(TaggedSnapshot):
+    """One section payload serialized and compressed once, at publish time."""
+
+    def __init__(self, payload):
+        started = time.perf_counter()
+        self.body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        self.digest = hashlib.blake2b(self.body, digest_size=12).hexdigest()
+        self.gzip = gzip.compress(self.body, compresslevel=GZIP_LEVEL)
+        self.brotli = brotli.compress(self.body, quality=BROTLI_QUALITY) if brotli else None
+        self.encode_seconds = time.perf_counter() - started
+
+    def select(self, accept_encoding):
+        """Pick ``(encoding, bytes)`` for an Accept-Encoding header, preferring brotli, then gzip."""
+        accepted = accepted_encodings(accept_encoding)
+        if self.brotli is not None and 'br' in accepted:
+            return 'br', self.brotli
+        if 'gzip' in accepted:
+            return 'gzip', self.gzip
+        return None, self.body
+
+    def sizes(self):
+        return {'identity': len(self.body), 'gzip': len(self.gzip),
+                'br': len(self.brotli) if self.brotli is not None else None}
+
+
+class EncodedCache:
+    """Latest ``EncodedSnapshot`` per section, swapped atomically on publish."""
+
+    def __init__(self):
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def put(self, name, payload):
+        return self.set(name, EncodedSnapshot(payload))
+
+    def set(self, name, snapshot):
+        with self._lock:
+            self._snapshots[name] = snapshot
+        return snapshot
+
+    def get(self, name):
+        with self._lock:
+            return self._snapshots.get(name)
@@ -0,0 +1,129 @@
+import asyncio
+import collections
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import metrics
+
+
+class FairBudget:
+    """Global cap on Odoo requests in flight, shared fairly between tenants.
+
+    Below ``limit`` a request goes straight through. At the limit it queues
+    under its tenant, and each slot that frees up goes to the waiting tenant
+    with the fewest requests in flight (ties: the one that waited longest).
+    A large database with hundreds of queued page reads therefore gets every
+    other slot at most while a small one has work waiting, instead of
+    starving it. ``slot()`` serves the threaded pool and ``aslot()`` the
+    asyncio one; both draw from the same budget. ``limit <= 0`` disables it.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.active = collections.Counter()
+        self.granted = collections.Counter()
+        self._waiting = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _take(self, tenant, waiter):
+        # Under _lock: take a free slot now, or queue ``waiter`` under its tenant
+        if self.in_flight < self.limit and not self._waiting:
+            self.in_flight += 1
+            self._grant_to(tenant)
+            return True
+        self._waiting.setdefault(tenant, collections.deque()).append(waiter)
+        return False
+
+    def _grant_to(self, tenant):
+        self.active[tenant] += 1
+        self.granted[tenant] += 1
+
+    def _release(self, tenant):
+        # Under _lock: hand the freed slot to the next tenant in line, returning its waiter
+        self.active[tenant] -= 1
+        if not self._waiting:
+            self.in_flight -= 1
+            return None
+        nxt = min(self._waiting, key=lambda t: self.active[t])
+        queue = self._waiting.pop(nxt)
+        waiter = queue.popleft()
+        if queue:
+            # Back of the line among tenants with the same share
+            self._waiting[nxt] = queue
+        self._grant_to(nxt)
+        return waiter
+
+    def _wake(self, waiter):
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+
+    @contextmanager
+    def slot(self, tenant):
+        if self.limit <= 0:
+            yield
+            return
+        started = time.perf_counter()
+        waiter = threading.Event()
+        with self._lock:
+            granted = self._take(tenant, waiter)
+        if not granted:
+            waiter.wait()
+        metrics.LOCK_WAIT.observe(time.perf_counter() - started, lock='rpc_budget')
+        try:
+            yield
+        finally:
+            self._give_back(tenant)
+
+    @asynccontextmanager
+    async def aslot(self, tenant):
+        if self.limit <= 0:
+            yield
+            return
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        with self._lock:
+            granted = self._take(tenant, waiter)
+        if not granted:
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    queue = self._waiting.get(tenant)
+                    if queue is not None and waiter in queue:
+                        queue.remove(waiter)
+                        if not queue:
+                            del self._waiting[tenant]
+                        raise
+                # Granted just as we were cancelled: pass the slot on
+                self._give_back(tenant)
+                raise
+        metrics.LOCK_WAIT.observe(time.perf_counter() - started, lock='rpc_budget')
+        try:
+            yield
+        finally:
+            self._give_back(tenant)
+
+    def _give_back(self, tenant):
+        with self._lock:
+            waiter = self._release(tenant)
+        if waiter is not None:
+            self._wake(waiter)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'active': {t: n for t, n in self.active.items() if n},
+                'waiting': {t: len(q) for t, q in self._waiting.items()},
+                'granted': dict(self.granted),
+            }
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
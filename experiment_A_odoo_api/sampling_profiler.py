@@ -0,0 +1,91 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+# Innermost frames of a pool thread parked waiting for its next task; such samples are skipped
+IDLE_LEAVES = {'thread.py:_worker'}
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler for the refresh threads.
+
+    A background thread snapshots the stacks of the selected threads every
+    ``interval`` seconds via ``sys._current_frames()``; nothing is hooked into
+    the profiled code, so it is cheap enough to run over a full refresh cycle
+    against a real Odoo. Waits (on RPC sockets, locks, futures) show up as
+    samples too, which is the point: the report is where the time went.
+
+    ``collapsed()`` returns ``root;caller;callee count`` lines, the format
+    flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, interval=0.005, thread_prefixes=('refresh', 'odoo-fanout', 'odoo-async'), include_current=True):
+        self.interval = interval
+        self.thread_prefixes = tuple(thread_prefixes or ())
+        self.thread_ids = {threading.get_ident()} if include_current else set()
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.seconds = time.perf_counter() - self._started
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _wanted(self, ident, name):
+        if ident in self.thread_ids:
+            return True
+        return not self.thread_prefixes or name.startswith(self.thread_prefixes)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, '?')
+                if ident == own or not self._wanted(ident, name):
+                    continue
+                if _frame_label(frame) in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                # Group worker threads of one pool under a single root
+                stack.append(name.rstrip('0123456789_-'))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + '\n'
+
+    def top(self, limit=20):
+        """``(function, samples)`` for the leaf frames seen most often."""
+        leaves = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
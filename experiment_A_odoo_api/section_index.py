@@ -0,0 +1,166 @@
+import bisect
+import re
+import threading
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Per-section searchable text, facet and sortable fields; sections not listed get DEFAULT_INDEX_FIELDS
+SECTION_INDEX_FIELDS = {
+    'invoices': {'text': ['name', 'ref', 'partner_id'], 'facets': [],
+                 'sort': ['id', 'name', 'partner_id', 'date_invoice', 'amount_total', 'state', 'issue']},
+    'quotations': {'text': ['name', 'partner_id'], 'facets': ['warehouse_id'],
+                   'sort': ['id', 'name', 'partner_id', 'date_order', 'amount_total', 'warehouse_id']},
+    'journals': {'text': ['name', 'partner'], 'facets': ['journal_id', 'source'],
+                 'sort': ['id', 'name', 'partner', 'date', 'amount', 'journal_id', 'source', 'state']},
+    'customers': {'text': ['name', 'partner_code'], 'facets': [],
+                  'sort': ['id', 'name', 'partner_code', 'create_date', 'order_count']},
+    'overshoot': {'text': ['partner_name'], 'facets': [],
+                  'sort': ['partner_name', 'latest_date', 'total_amount', 'customer_limit', 'delta', 'order_count']},
+    'reconciliation': {'text': ['name', 'partner_id'], 'facets': [],
+                       'sort': ['id', 'name', 'partner_id', 'date', 'amount']},
+}
+DEFAULT_INDEX_FIELDS = {'text': ['name', 'partner_name', 'partner_id', 'partner'], 'facets': [], 'sort': ['id', 'name']}
+
+
+def index_fields(name):
+    return SECTION_INDEX_FIELDS.get(name, DEFAULT_INDEX_FIELDS)
+
+
+def _display(value):
+    # Many2one values arrive as [id, display_name]
+    if isinstance(value, (list, tuple)):
+        return value[1] if len(value) > 1 else ''
+    return value if isinstance(value, str) else ''
+
+
+def _facet_keys(value):
+    if isinstance(value, (list, tuple)) and value:
+        return value[0], str(value[1]).lower() if len(value) > 1 else ''
+    if value in (None, False):
+        return None, ''
+    return value, str(value).lower()
+
+
+def _sort_key(value):
+    if isinstance(value, (list, tuple)):
+        value = value[1] if len(value) > 1 else None
+    if value is None or value is False:
+        return (0, '', 0)
+    # Mixed columns (integer deposit ids next to 'move_N' ids) group by type instead of failing to compare
+    return (1, 'number' if isinstance(value, (int, float)) else type(value).__name__, value)
+
+
+class SectionIndex:
+    """Lookup structures over one published section, built once at publish time.
+
+    ``facets`` maps field -> {key: [positions]} where the key is the raw value
+    (or many2one id); ``facet_names`` keeps the lowercase display name per key
+    so text filters like ``warehouse=top 1`` only scan the handful of distinct
+    values. ``tokens`` is a sorted vocabulary of lowercase words from the text
+    fields with a posting set per word, so prefix search is a bisect.
+    """
+
+    def __init__(self, rows, text_fields, facet_fields):
+        self.rows = rows
+        self.facets = {field: {} for field in facet_fields}
+        self.facet_names = {field: {} for field in facet_fields}
+        postings = {}
+        for pos, row in enumerate(rows):
+            for field in facet_fields:
+                key, name = _facet_keys(row.get(field))
+                if key is None:
+                    continue
+                self.facets[field].setdefault(key, []).append(pos)
+                self.facet_names[field][key] = name
+            text = ' '.join(_display(row.get(field)) for field in text_fields).lower()
+            for token in set(TOKEN_RE.findall(text)):
+                postings.setdefault(token, set()).add(pos)
+        self.vocabulary = sorted(postings)
+        self.postings = postings
+
+    def _match_tokens(self, q):
+        result = None
+        for term in TOKEN_RE.findall(q.lower()):
+            start = bisect.bisect_left(self.vocabulary, term)
+            matched = set()
+            for token in self.vocabulary[start:]:
+                if not token.startswith(term):
+                    break
+                matched |= self.postings[token]
+            result = matched if result is None else result & matched
+            if not result:
+                return set()
+        return result
+
+    def _match_facet(self, field, wanted):
+        """Positions whose ``field`` equals any wanted id, or whose name contains any wanted text."""
+        if field not in self.facets:
+            return None
+        positions = set()
+        for want in wanted:
+            want_key = int(want) if str(want).isdigit() else None
+            for key, name in self.facet_names[field].items():
+                if key == want_key if want_key is not None else str(want).lower() in name:
+                    positions.update(self.facets[field][key])
+        return positions
+
+    def query(self, q=None, filters=None, sort=None, offset=0, limit=None):
+        """Return ``(total, rows)`` for the filtered, sorted page."""
+        selected = None
+        if q and q.strip():
+            selected = self._match_tokens(q)
+        for field, wanted in (filters or {}).items():
+            if not wanted:
+                continue
+            matched = self._match_facet(field, wanted)
+            if matched is None:
+                continue
+            selected = matched if selected is None else selected & matched
+
+        positions = range(len(self.rows)) if selected is None else sorted(selected)
+        if sort:
+            field = sort.lstrip('-')
+            # Columnar snapshots hand out one field without building every row
+            values = self.rows.column(field) if hasattr(self.rows, 'column') else [r.get(field) for r in self.rows]
+            positions = sorted(positions, key=lambda p: _sort_key(values[p]), reverse=sort.startswith('-'))
+        total = len(positions)
+        end = None if limit is None else offset + limit
+        return total, [self.rows[p] for p in positions[offset:end]]
+
+
+class IndexCache:
+    """Latest ``SectionIndex`` per section, rebuilt by a refresh-engine publish listener.
+
+    A ``lazy`` put only keeps the rows; the index is built by the first
+    ``get`` for that section.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build(name, rows):
+        fields = index_fields(name)
+        return SectionIndex(rows, fields['text'], fields['facets'])
+
+    def put(self, name, rows, lazy=False):
+        if lazy:
+            with self._lock:
+                self._indexes.pop(name, None)
+                self._pending[name] = rows
+            return None
+        index = self._build(name, rows)
+        with self._lock:
+            self._indexes[name] = index
+            self._pending.pop(name, None)
+        return index
+
+    def get(self, name):
+        with self._lock:
+            index = self._indexes.get(name)
+            if index is None and name in self._pending:
+                # Built under the lock so concurrent first queries do not each build it
+                index = self._indexes[name] = self._build(name, self._pending.pop(name))
+            return index
@@ -0,0 +1,235 @@
+import json
+import mmap
+import os
+import threading
+import time
+
+from columnar_store import ColumnarSnapshot
+from response_cache import TaggedSnapshot, accepted_encodings
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): every process refreshes on its own, as before
+    fcntl = None
+
+LOCK_FILE = 'refresher.lock'
+# Demand markers are touched at most this often per section
+WANTED_TOUCH_SECONDS = 1.0
+# Encoding -> file suffix of each representation written per section generation
+SUFFIXES = {None: 'json', 'gzip': 'json.gz', 'br': 'json.br'}
+SIZE_KEYS = {None: 'identity', 'gzip': 'gzip', 'br': 'br'}
+# Suffix of the rows as ``ColumnarSnapshot.dumps_mapped()``, which followers map instead of parsing the JSON
+COLUMNS_SUFFIX = 'cols'
+
+
+def write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class SharedSection(TaggedSnapshot):
+    """A section as written by the refresher process.
+
+    Only the small metadata record is held in memory; the encoded bodies stay
+    in files that workers stream straight from the page cache, so N workers
+    share one copy of every representation.
+    """
+
+    def __init__(self, directory, name, meta):
+        self.name = name
+        self.digest = meta['digest']
+        self.updated_at = meta['updated_at']
+        self.row_count = meta['rows']
+        self.data_key = meta.get('data_key')
+        self._sizes = meta['sizes']
+        self.paths = {encoding: os.path.join(directory, f"{name}.{self.digest}.{suffix}")
+                      for encoding, suffix in SUFFIXES.items() if self._sizes.get(SIZE_KEYS[encoding]) is not None}
+        self.columns_path = None
+        if meta.get('columns'):
+            self.columns_path = os.path.join(directory, f"{name}.{self.digest}.{COLUMNS_SUFFIX}")
+
+    @property
+    def version(self):
+        return self.digest, self.updated_at
+
+    def select(self, accept_encoding):
+        """Pick ``(encoding, path)`` for an Accept-Encoding header, preferring brotli, then gzip."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.paths and encoding in accepted:
+                return encoding, self.paths[encoding]
+        return None, self.paths[None]
+
+    def size(self, encoding=None):
+        return self._sizes[SIZE_KEYS[encoding]]
+
+    def sizes(self):
+        return dict(self._sizes)
+
+    def rows(self):
+        """The section's rows: the refresher's columns mapped read-only, else the identity body parsed."""
+        if self.columns_path is not None:
+            with open(self.columns_path, 'rb') as f:
+                # The map outlives the file: a generation removed later stays readable to whoever holds it
+                snapshot, _ = ColumnarSnapshot.mapped(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            return snapshot
+        with open(self.paths[None], 'rb') as f:
+            payload = json.loads(f.read())
+        return payload[self.data_key] if self.data_key else payload
+
+
+class SharedCache:
+    """Pre-encoded section snapshots in a directory shared by every worker process.
+
+    One process wins a non-blocking ``flock`` on ``refresher.lock`` and keeps it
+    for its lifetime: it is the only one that talks to Odoo and writes here.
+    The others read. If the refresher dies the kernel drops the lock and the
+    next worker to call ``elect()`` takes over.
+
+    Each publish writes ``<section>.<digest>.json`` (plus ``.gz``/``.br``, and
+    the rows as mappable columns in ``.cols``) and then atomically replaces
+    ``<section>.meta``, so readers never see a half-written generation. The previous generation is kept for requests
+    still streaming it; older ones are removed.
+
+    With ``leader`` (another tenant's ``SharedCache``) this cache takes no
+    lock of its own and follows the leader's election, so the one refresher
+    process polls every tenant and the RPC budget it enforces stays global.
+    """
+
+    def __init__(self, directory, leader=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.leader = leader
+        self.is_refresher = False
+        self._pid = os.getpid()
+        self._lock_file = None
+        self._sections = {}
+        self._wanted_touched = {}
+        self._lock = threading.Lock()
+        self._elect_lock = threading.Lock()
+
+    def elect(self):
+        """Try to become the single refresher; returns whether this process is it."""
+        # flock is per open file: two threads racing here would lock each other out
+        if self.leader is not None:
+            self.is_refresher = self.leader.elect()
+            return self.is_refresher
+        with self._elect_lock:
+            return self._elect()
+
+    def _elect(self):
+        if self._pid != os.getpid():
+            # Forked after electing (e.g. a preloading server): the child is not the refresher
+            self._pid = os.getpid()
+            self.is_refresher = False
+            self._lock_file = None
+        if self.is_refresher:
+            return True
+        if fcntl is None:
+            self.is_refresher = True
+            return True
+        f = open(os.path.join(self.directory, LOCK_FILE), 'a+')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._lock_file = f
+        self.is_refresher = True
+        print(f"Shared cache: process {os.getpid()} is the refresher")
+        return True
+
+    def _meta_path(self, name):
+        return os.path.join(self.directory, f"{name}.meta")
+
+    def write(self, name, snapshot, row_count, data_key=None, columns=None):
+        """Publish an ``EncodedSnapshot`` for every worker to serve.
+
+        ``columns`` is the same rows as a ``ColumnarSnapshot``, saved for the
+        followers to map instead of each parsing and re-columnizing the JSON.
+        """
+        bodies = {None: snapshot.body, 'gzip': snapshot.gzip, 'br': snapshot.brotli}
+        sizes = {}
+        for encoding, body in bodies.items():
+            sizes[SIZE_KEYS[encoding]] = len(body) if body is not None else None
+            if body is not None:
+                path = os.path.join(self.directory, f"{name}.{snapshot.digest}.{SUFFIXES[encoding]}")
+                if not os.path.exists(path):
+                    write_atomic(path, body)
+        if columns is not None:
+            # Never rewritten once there, so a follower's map of it always sees complete columns
+            path = os.path.join(self.directory, f"{name}.{snapshot.digest}.{COLUMNS_SUFFIX}")
+            if not os.path.exists(path):
+                write_atomic(path, columns.dumps_mapped())
+        meta = {'digest': snapshot.digest, 'updated_at': time.time(), 'rows': row_count,
+                'data_key': data_key, 'sizes': sizes, 'columns': columns is not None, 'pid': os.getpid()}
+        previous = self.read(name)
+        write_atomic(self._meta_path(name), json.dumps(meta).encode('utf-8'))
+        keep = {snapshot.digest, previous.digest if previous else None}
+        self._remove_generations(name, keep)
+
+    def _remove_generations(self, name, keep):
+        prefix = f"{name}."
+        for entry in os.listdir(self.directory):
+            if not entry.startswith(prefix) or entry.endswith(('.meta', '.wanted', '.tmp')):
+                continue
+            if entry[len(prefix):].split('.')[0] not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, entry))
+                except OSError:
+                    pass
+
+    def read(self, name):
+        """Latest ``SharedSection`` for a section, or ``None`` before the first publish."""
+        try:
+            stat = os.stat(self._meta_path(name))
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._sections.get(name)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+        try:
+            with open(self._meta_path(name), 'rb') as f:
+                meta = json.loads(f.read())
+        except (OSError, ValueError):
+            return cached[1] if cached else None
+        section = SharedSection(self.directory, name, meta)
+        with self._lock:
+            self._sections[name] = (key, section)
+        return section
+
+    def mark_wanted(self, name):
+        """Record that a client of this process asked for ``name``, for the refresher's idle check."""
+        now = time.time()
+        if now - self._wanted_touched.get(name, 0) < WANTED_TOUCH_SECONDS:
+            return
+        self._wanted_touched[name] = now
+        path = os.path.join(self.directory, f"{name}.wanted")
+        try:
+            with open(path, 'a'):
+                os.utime(path, None)
+        except OSError:
+            pass
+
+    def last_wanted(self, name):
+        try:
+            return os.stat(os.path.join(self.directory, f"{name}.wanted")).st_mtime
+        except OSError:
+            return None
+
+    def wait(self, name, timeout, interval=0.1):
+        """Block until the refresher has published ``name`` at least once (or ``timeout`` passes)."""
+        deadline = time.time() + timeout
+        section = self.read(name)
+        while section is None and time.time() < deadline:
+            time.sleep(interval)
+            section = self.read(name)
+        return section
@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+
+from columnar_store import ColumnarSnapshot
+from shared_cache import write_atomic
+
+
+def _normalized(value):
+    # Domains and field lists come back from JSON as lists; compare them the same way
+    return json.loads(json.dumps(value))
+
+
+class SnapshotStore:
+    """Published sections and delta-sync record stores saved to disk for warm starts.
+
+    Every file is a ``ColumnarSnapshot.dumps()`` blob whose meta carries what
+    is needed to trust it again after a restart: the section's publish time,
+    or a record store's query and write_date watermark. Files are replaced
+    atomically, so a crash mid-write leaves the previous snapshot intact.
+    Sections and stores that have not changed since their last save are not
+    written again.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._saved_versions = {}
+        self._saved_digests = {}
+        self._lock = threading.Lock()
+
+    def _path(self, kind, name):
+        return os.path.join(self.directory, f"{kind}-{name}.snap")
+
+    def _load(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return ColumnarSnapshot.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable snapshot {path}: {e}")
+            return None
+
+    def save_section(self, name, rows, updated_at):
+        """Persist a published section unless its rows match the last ones saved."""
+        snapshot = rows if isinstance(rows, ColumnarSnapshot) else ColumnarSnapshot(rows)
+        digest = snapshot.digest()
+        with self._lock:
+            if self._saved_digests.get(name) == digest:
+                return
+        write_atomic(self._path('section', name), snapshot.dumps({'section': name, 'updated_at': updated_at}))
+        # Only after the write: a failed one is retried on the next save
+        with self._lock:
+            self._saved_digests[name] = digest
+
+    def load_section(self, name):
+        """``(snapshot, updated_at)`` from the last run, or ``None``."""
+        loaded = self._load(self._path('section', name))
+        if loaded is None:
+            return None
+        snapshot, meta = loaded
+        with self._lock:
+            self._saved_digests[name] = snapshot.digest()
+        return snapshot, meta.get('updated_at')
+
+    def save_store(self, key, store):
+        """Persist a ``delta_sync.RecordStore`` unless it has not changed since the last save."""
+        version = store.version
+        with self._lock:
+            if self._saved_versions.get(key) == version:
+                return
+        rows = [store.records[i] for i in store.window_ids if i in store.records]
+        meta = {'model': store.model, 'domain': store.domain, 'fields': store.fields, 'order': store.order,
+                'limit': store.limit, 'watermark': store.watermark}
+        write_atomic(self._path('sync', key), ColumnarSnapshot(rows).dumps(meta))
+        with self._lock:
+            self._saved_versions[key] = version
+
+    def load_store(self, key, store):
+        """Restore ``store`` from disk if the saved one ran the same query; returns whether it did."""
+        loaded = self._load(self._path('sync', key))
+        if loaded is None:
+            return False
+        snapshot, meta = loaded
+        saved = [meta['model'], meta['domain'], meta['fields'], meta['order'], meta['limit']]
+        if saved != _normalized([store.model, store.domain, store.fields, store.order, store.limit]):
+            return False
+        rows = snapshot.to_list()
+        store.records = {r['id']: r for r in rows}
+        store.window_ids = [r['id'] for r in rows]
+        store.watermark = meta['watermark']
+        with self._lock:
+            self._saved_versions[key] = store.version
+        return True
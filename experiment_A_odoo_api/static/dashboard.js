@@ -9,12 +9,15 @@ window.addEventListener('DOMContentLoaded', () => {
 });
 
 const REFRESH_INTERVAL_MS = 10000; // 10 seconds for near real-time updates
+// "/api" for the default database, "/api/<tenant>" when the page is served under /<tenant>/
+const API_BASE = window.API_BASE || '/api';
 let refreshTimer = null;
 
 const initDashboard = () => {
-    fetchDashboardData();
-    startAutoRefresh();
-    registerVisibilityRefresh();
+    // Prefer pushed updates; fall back to polling when EventSource is unavailable
+    if (!startStream()) {
+        startPolling();
+    }
 
     // Set Global Date
     const globalDateEl = document.getElementById('current-date-display');
@@ -37,6 +40,8 @@ const initDashboard = () => {
         });
     });
 
+    registerPagedScroll();
+
     // Expand logic
     document.querySelectorAll('.expand-trigger').forEach(trigger => {
         trigger.addEventListener('click', () => {
@@ -88,23 +93,25 @@ const toggleExpand = (panelId, isExpand) => {
 };
 
 const fetchDashboardData = () => {
-    fetchSection("/api/invoices", 'list-incomplete-invoice', renderInvoiceCard, 'count-invoice');
-    fetchSection("/api/journals", 'list-unposted-journal', renderJournalCard, 'count-journal');
-    fetchSection("/api/quotations/pending", 'list-active-quotation', renderQuotationCard, 'count-quotation', 'data');
-    fetchSection("/api/customers", 'list-new-customers', renderCustomerCard, 'count-new-customers');
-    fetchSection("/api/overshoot", 'list-balance-overshoot', renderOvershootCard, 'count-overshoot');
-    fetchSection("/api/reconciliation", 'list-reconciliation', renderReconciliationCard, 'count-reconciliation');
+    Object.keys(PAGED_PANELS).forEach(containerId => reloadPagedPanel(containerId));
+    fetchSection(`${API_BASE}/customers`, 'list-new-customers', renderCustomerCard, 'count-new-customers');
+    fetchSection(`${API_BASE}/overshoot`, 'list-balance-overshoot', renderOvershootCard, 'count-overshoot');
+    fetchSection(`${API_BASE}/reconciliation`, 'list-reconciliation', renderReconciliationCard, 'count-reconciliation');
 };
 
 const fetchSection = (url, containerId, renderFunc, countId, dataKey = null) => {
-    const requestUrl = appendCacheBuster(url);
-    fetch(requestUrl, { cache: 'no-store', headers: { 'Cache-Control': 'no-cache' } })
-        .then(r => r.json())
-        .then(data => {
+    // 'no-cache' revalidates with If-None-Match, so an unchanged section is a 304 served from the HTTP cache
+    fetch(url, { cache: 'no-cache' })
+        .then(r => r.json().then(data => ({ data, etag: r.headers.get('ETag') })))
+        .then(({ data, etag }) => {
             const items = dataKey ? data[dataKey] : data;
             const container = document.getElementById(containerId);
             if (!container) return;
 
+            // Same snapshot as the one already on screen: nothing to re-render
+            if (etag && container.dataEtag === etag) return;
+            container.dataEtag = etag;
+
             container.dataItems = items;
             // Update the total count initially
             const countEl = document.getElementById(countId);
@@ -115,6 +122,164 @@ const fetchSection = (url, containerId, renderFunc, countId, dataKey = null) =>
         .catch(err => console.error(`Error fetching ${url}:`, err));
 };
 
+const startPolling = () => {
+    fetchDashboardData();
+    startAutoRefresh();
+    registerVisibilityRefresh();
+};
+
+// Section name (as published by the server) -> panel it renders into
+const SECTION_CONTAINERS = {
+    invoices: 'list-incomplete-invoice',
+    journals: 'list-unposted-journal',
+    quotations: 'list-active-quotation',
+    customers: 'list-new-customers',
+    overshoot: 'list-balance-overshoot',
+    reconciliation: 'list-reconciliation'
+};
+
+const startStream = () => {
+    if (!window.EventSource) return false;
+
+    // Paged panels query the server themselves; the stream only tells them when to re-query
+    const paged = Object.values(PAGED_PANELS).map(cfg => cfg.section).join(',');
+    const source = new EventSource(`${API_BASE}/stream?paged=${paged}`);
+    source.addEventListener('snapshot', (e) => {
+        const { sections } = JSON.parse(e.data);
+        Object.keys(sections).forEach(name => applySection(name, sections[name]));
+        Object.keys(PAGED_PANELS).forEach(containerId => reloadPagedPanel(containerId));
+    });
+    source.addEventListener('changed', (e) => {
+        const msg = JSON.parse(e.data);
+        reloadPagedPanel(SECTION_CONTAINERS[msg.section]);
+    });
+    source.addEventListener('section', (e) => {
+        const msg = JSON.parse(e.data);
+        applySection(msg.section, msg.rows);
+    });
+    source.addEventListener('patch', (e) => applyPatch(JSON.parse(e.data)));
+    source.addEventListener('error', () => {
+        // EventSource reconnects on its own; only give up if the browser closed it for good
+        if (source.readyState === EventSource.CLOSED) {
+            startPolling();
+        }
+    });
+    return true;
+};
+
+const applySection = (name, rows) => {
+    const container = document.getElementById(SECTION_CONTAINERS[name]);
+    if (!container) return;
+    container.dataItems = rows;
+    filterList(container.id);
+};
+
+const applyPatch = (patch) => {
+    const container = document.getElementById(SECTION_CONTAINERS[patch.section]);
+    if (!container || !container.dataItems) return;
+
+    const byId = new Map(container.dataItems.map(item => [item.id, item]));
+    (patch.remove || []).forEach(id => byId.delete(id));
+    (patch.upsert || []).forEach(item => byId.set(item.id, item));
+
+    const order = patch.order || container.dataItems.map(item => item.id);
+    container.dataItems = order.filter(id => byId.has(id)).map(id => byId.get(id));
+    filterList(container.id);
+};
+
+// Panels whose rows are searched, filtered and paged server-side instead of shipped whole
+const PAGED_PANELS = {
+    'list-incomplete-invoice': { url: `${API_BASE}/invoices`, section: 'invoices' },
+    'list-active-quotation': { url: `${API_BASE}/quotations/pending`, section: 'quotations', facet: 'warehouse', attr: 'data-warehouse' },
+    'list-unposted-journal': { url: `${API_BASE}/journals`, section: 'journals', facet: 'source', attr: 'data-source' }
+};
+const PAGE_SIZE = 200;
+const SEARCH_DEBOUNCE_MS = 250;
+
+const pagedQuery = (containerId, offset, limit) => {
+    const cfg = PAGED_PANELS[containerId];
+    const panel = document.getElementById(containerId).closest('.panel');
+    const searchInput = document.querySelector(`.search-input[onkeyup*="${containerId}"]`);
+    const params = new URLSearchParams({ offset, limit });
+    if (searchInput && searchInput.value.trim()) params.set('q', searchInput.value.trim());
+    if (cfg.facet) panel.querySelectorAll('.tab-btn.active').forEach(tab => {
+        const val = tab.getAttribute(cfg.attr);
+        if (val && val !== 'all') params.append(cfg.facet, val.toLowerCase());
+    });
+    return `${cfg.url}?${params}`;
+};
+
+const loadPagedPanel = (containerId, append = false) => {
+    const container = document.getElementById(containerId);
+    if (!container) return;
+    const loaded = container.dataItems || [];
+    const offset = append ? loaded.length : 0;
+    // A reload keeps however many rows the user has already scrolled through
+    const limit = append ? PAGE_SIZE : Math.max(PAGE_SIZE, loaded.length);
+    const url = pagedQuery(containerId, offset, limit);
+    const seq = (container.pageSeq || 0) + 1;
+    container.pageSeq = seq;
+    container.pageLoading = true;
+
+    fetch(url, { cache: 'no-cache' })
+        .then(r => r.json())
+        .then(page => {
+            // A newer query (more typing, another tab) has superseded this one
+            if (container.pageSeq !== seq) return;
+            container.dataItems = append ? loaded.concat(page.data) : page.data;
+            container.pageTotal = page.total;
+            renderWithGrouping(container, container.dataItems, pagedRenderer(containerId));
+            updateCount(container, page.count, page.total);
+        })
+        .catch(err => console.error(`Error fetching ${url}:`, err))
+        .finally(() => {
+            if (container.pageSeq === seq) container.pageLoading = false;
+        });
+};
+
+const reloadPagedPanel = (containerId) => loadPagedPanel(containerId, false);
+
+const pagedRenderer = (containerId) => ({
+    'list-incomplete-invoice': renderInvoiceCard,
+    'list-active-quotation': renderQuotationCard,
+    'list-unposted-journal': renderJournalCard
+})[containerId];
+
+const schedulePagedQuery = (containerId) => {
+    const container = document.getElementById(containerId);
+    if (!container) return;
+    clearTimeout(container.searchTimer);
+    container.searchTimer = setTimeout(() => {
+        // New search or filter: start again from the first page
+        container.dataItems = [];
+        loadPagedPanel(containerId);
+    }, SEARCH_DEBOUNCE_MS);
+};
+
+const registerPagedScroll = () => {
+    Object.keys(PAGED_PANELS).forEach(containerId => {
+        const container = document.getElementById(containerId);
+        if (!container) return;
+        container.addEventListener('scroll', () => {
+            const nearBottom = container.scrollTop + container.clientHeight >= container.scrollHeight - 200;
+            const loaded = (container.dataItems || []).length;
+            if (nearBottom && !container.pageLoading && loaded < (container.pageTotal || 0)) {
+                loadPagedPanel(containerId, true);
+            }
+        });
+    });
+};
+
+const updateCount = (container, total, visible) => {
+    const countSpan = container.closest('.panel').querySelector('.panel-title span[id^="count-"]');
+    if (!countSpan) return;
+    if (total === visible) {
+        countSpan.innerHTML = `${total} <span style="font-size: 10px;">items</span>`;
+    } else {
+        countSpan.innerHTML = `${total} <span style="font-size: 10px;">of</span> ${visible} <span style="font-size: 10px;">items</span>`;
+    }
+};
+
 const startAutoRefresh = () => {
     if (refreshTimer) clearInterval(refreshTimer);
     refreshTimer = setInterval(() => {
@@ -132,12 +297,11 @@ const registerVisibilityRefresh = () => {
     });
 };
 
-const appendCacheBuster = (url) => {
-    const suffix = `_=${Date.now()}`;
-    return url.includes('?') ? `${url}&${suffix}` : `${url}?${suffix}`;
-};
-
 const filterList = (containerId, text = null) => {
+    if (PAGED_PANELS[containerId]) {
+        schedulePagedQuery(containerId);
+        return;
+    }
     const container = document.getElementById(containerId);
     if (!container || !container.dataItems) return;
 
@@ -208,17 +372,7 @@ const filterList = (containerId, text = null) => {
     renderWithGrouping(container, filteredItems, renderFunc);
 
     // Update visible count with format (Total/Filtered) only if filtered
-    const panelRef = container.closest('.panel');
-    const countSpan = panelRef.querySelector('.panel-title span[id^="count-"]');
-    if (countSpan) {
-        const total = container.dataItems.length;
-        const visible = filteredItems.length;
-        if (total === visible) {
-            countSpan.innerHTML = `${total} <span style="font-size: 10px;">items</span>`;
-        } else {
-            countSpan.innerHTML = `${total} <span style="font-size: 10px;">of</span> ${visible} <span style="font-size: 10px;">items</span>`;
-        }
-    }
+    updateCount(container, container.dataItems.length, filteredItems.length);
 };
 
 const renderWithGrouping = (container, items, renderFunc) => {
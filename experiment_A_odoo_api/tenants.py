@@ -0,0 +1,115 @@
+import contextvars
+import json
+import os
+import re
+from contextlib import contextmanager
+
+import config
+import odoo_async
+import odoo_pool
+import odoo_schema
+from rpc_budget import FairBudget
+
+TENANT_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+# First path segments of app.py's fixed routes: a tenant named like one would be shadowed by it
+# (``/api/history/<section>`` wins over ``/api/<tenant>/...`` for a tenant called ``history``)
+RESERVED_NAMES = frozenset({
+    'api', 'assets', 'static', 'metrics',
+    'invoices', 'journals', 'quotations', 'customers', 'overshoot', 'reconciliation',
+    'stream', 'refresh', 'history', 'cache', 'connection', 'schema', 'tenants', 'profile',
+})
+
+# Every tenant's pools draw from this one budget of in-flight Odoo requests
+budget = FairBudget(config.ODOO_RPC_BUDGET)
+
+
+class Tenant:
+    """One Odoo database, optionally narrowed to some of its companies.
+
+    Owns everything that used to be module state for the single database:
+    the threaded and asyncio connection pools (with their cached login) and
+    the probed schema. ``company_ids`` is sent as ``allowed_company_ids`` in
+    the context of every call.
+    """
+
+    def __init__(self, name, url, db, username, password, company_ids=None, default=False):
+        if not TENANT_NAME.match(name):
+            raise ValueError(f"invalid tenant name {name!r}")
+        if name.lower() in RESERVED_NAMES:
+            raise ValueError(f"tenant name {name!r} is reserved by a dashboard route")
+        self.name = name
+        self.url = url
+        self.db = db
+        self.password = password
+        self.company_ids = list(company_ids or [])
+        self.default = default
+        context = {'allowed_company_ids': self.company_ids} if self.company_ids else None
+        self.pool = odoo_pool.OdooPool(url, db, username, password, size=config.ODOO_POOL_SIZE,
+                                       protocol=config.ODOO_PROTOCOL, batching=config.ODOO_BATCH_CALLS,
+                                       context=context, budget=budget, tenant=name)
+        self.async_pool = odoo_async.AsyncOdooPool(url, db, username, password, size=config.ODOO_ASYNC_CONNECTIONS,
+                                                   protocol=config.ODOO_PROTOCOL, batching=config.ODOO_BATCH_CALLS,
+                                                   context=context, budget=budget, tenant=name)
+        self.schema = odoo_schema.SchemaCache(db, password)
+
+    def qualify(self, key):
+        """Per-tenant name for a cache or sync key; the default tenant keeps the single-database names."""
+        return key if self.default else f"{self.name}.{key}"
+
+    def directory(self, base):
+        """Per-tenant subdirectory of a cache directory (the base itself for the default tenant)."""
+        return base if self.default else os.path.join(base, self.name)
+
+
+def _load_definitions():
+    raw = config.ODOO_TENANTS.strip()
+    if not raw:
+        return {}
+    if not raw.startswith('{'):
+        with open(raw) as f:
+            raw = f.read()
+    return json.loads(raw)
+
+
+def _build():
+    definitions = _load_definitions()
+    if not definitions:
+        return {'default': Tenant('default', config.ODOO_URL, config.ODOO_DB, config.ODOO_USERNAME,
+                                  config.ODOO_PASSWORD, default=True)}
+    default_name = config.DEFAULT_TENANT or next(iter(definitions))
+    built = {}
+    for name, spec in definitions.items():
+        built[name] = Tenant(name, spec.get('url', config.ODOO_URL), spec.get('db', config.ODOO_DB),
+                             spec.get('username', config.ODOO_USERNAME), spec.get('password', config.ODOO_PASSWORD),
+                             company_ids=spec.get('company_ids'), default=name == default_name)
+    if default_name not in built:
+        raise ValueError(f"DEFAULT_TENANT {default_name!r} is not one of ODOO_TENANTS")
+    return built
+
+
+tenants = _build()
+_default = next(t for t in tenants.values() if t.default)
+_current = contextvars.ContextVar('tenant', default=None)
+
+
+def default():
+    return _default
+
+
+def get(name):
+    return tenants.get(name)
+
+
+def current():
+    """The tenant the running fetch belongs to (the default one outside any ``use``)."""
+    tenant = _current.get()
+    return tenant if tenant is not None else _default
+
+
+@contextmanager
+def use(tenant):
+    token = _current.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current.reset(token)
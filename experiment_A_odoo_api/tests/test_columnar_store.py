@@ -0,0 +1,64 @@
+import mmap
+
+import pytest
+
+from columnar_store import ColumnarSnapshot
+
+SECTIONS = {
+    'mixed': [{'id': 1, 'ref': 'A1', 'amount': 2.5}, {'id': 2, 'ref': 7, 'amount': 3},
+              {'id': 3, 'ref': ['x', 1], 'amount': -1.25}],
+    'many2one': [{'id': 1, 'partner_id': [10, 'Acme']}, {'id': 2, 'partner_id': [11, 'Globex']},
+                 {'id': 3, 'partner_id': False}, {'id': 4, 'partner_id': [10, 'Acme']}],
+    'nulls': [{'id': 1, 'name': False, 'paid': True, 'total': None},
+              {'id': 2, 'name': 'B', 'paid': False, 'total': 0.0},
+              {'id': 3, 'name': None, 'paid': None, 'total': False},
+              {'id': 4}],
+    'all_false': [{'id': 1, 'note': False}, {'id': 2, 'note': False}],
+    'empty': [],
+}
+
+
+def _mapped(tmp_path, data):
+    path = tmp_path / 'section.cols'
+    path.write_bytes(data)
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@pytest.mark.parametrize('name', SECTIONS)
+def test_dumps_round_trip(name):
+    rows = SECTIONS[name]
+    snapshot = ColumnarSnapshot(rows)
+    snapshot.release()
+    assert snapshot.to_list() == rows
+    loaded, meta = ColumnarSnapshot.loads(snapshot.dumps({'section': name}))
+    assert loaded.to_list() == rows and meta == {'section': name}
+    assert loaded.digest() == snapshot.digest()
+
+
+@pytest.mark.parametrize('name', SECTIONS)
+def test_dumps_mapped_round_trip(name, tmp_path):
+    rows = SECTIONS[name]
+    snapshot = ColumnarSnapshot(rows)
+    loaded, meta = ColumnarSnapshot.mapped(_mapped(tmp_path, snapshot.dumps_mapped({'section': name})))
+    assert loaded.to_list() == rows and meta == {'section': name}
+    assert len(loaded) == len(rows)
+    assert loaded.column('id') == [row.get('id') for row in rows]
+    assert loaded.digest() == snapshot.digest()
+
+
+def test_digest_follows_the_rows():
+    rows = SECTIONS['many2one']
+    assert ColumnarSnapshot(rows).digest() == ColumnarSnapshot([dict(r) for r in rows]).digest()
+    changed = [dict(rows[0], partner_id=[11, 'Globex'])] + rows[1:]
+    assert ColumnarSnapshot(changed).digest() != ColumnarSnapshot(rows).digest()
+
+
+def test_foreign_and_truncated_data_are_rejected(tmp_path):
+    data = ColumnarSnapshot(SECTIONS['mixed']).dumps_mapped()
+    with pytest.raises(ValueError):
+        ColumnarSnapshot.loads(data)
+    with pytest.raises(ValueError):
+        ColumnarSnapshot.mapped(ColumnarSnapshot(SECTIONS['mixed']).dumps())
+    with pytest.raises(ValueError, match="truncated"):
+        ColumnarSnapshot.mapped(data[:-3])
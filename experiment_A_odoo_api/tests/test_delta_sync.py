@@ -0,0 +1,107 @@
+import datetime
+import random
+
+import pytest
+
+import config
+import delta_sync
+from mock_odoo import UID, MockOdoo
+
+MODEL = 'sale.order'
+DOMAIN = [['state', 'in', ['draft', 'sent', 'sale', 'done']]]
+FIELDS = ['id', 'name', 'state', 'amount_total', 'date_order']
+ORDER = 'date_order desc'
+
+
+@pytest.fixture
+def mock(monkeypatch):
+    # Small pages so the first load spans several of them
+    monkeypatch.setattr(config, 'ODOO_PAGE_SIZE', 40)
+    return MockOdoo(orders=300, partners=30, moves=10, deposits=1, statement_lines=1)
+
+
+def expected(mock, limit=None):
+    """What a plain ``search_read`` of the window returns right now."""
+    return mock.execute_kw('db', UID, 'pw', MODEL, 'search_read', [DOMAIN],
+                           {'fields': FIELDS, 'order': ORDER, 'limit': limit})
+
+
+def sync(store, mock):
+    rows, _ = store.sync(UID, mock)
+    return rows
+
+
+def write(mock, record_id, written_at=None, **values):
+    """Change one order the way Odoo would, stamped one second after the newest write (or ``written_at``)."""
+    rec = mock.tables[MODEL][record_id]
+    if written_at is None:
+        newest = max(r['write_date'] for r in mock.tables[MODEL].values())
+        written_at = (datetime.datetime.fromisoformat(newest) + datetime.timedelta(seconds=1)).isoformat(' ')
+    rec.update(values, write_date=written_at)
+
+
+def window_order(mock, state='sale'):
+    return next(r['id'] for r in expected(mock) if r['state'] == state)
+
+
+@pytest.mark.parametrize('limit', [None, 50])
+def test_full_then_incremental_matches_search_read(mock, limit):
+    store = delta_sync.RecordStore(MODEL, DOMAIN, FIELDS, ORDER, limit)
+    assert sync(store, mock) == expected(mock, limit)
+
+    mock.touch(MODEL, 25, random.Random(1))
+    mock.reset_counters()
+    rows = sync(store, mock)
+    # One membership search and one delta search_read; touched rows never need a separate read
+    assert mock.rpc_by_method == {f'{MODEL}.search': 1, f'{MODEL}.search_read': 1}
+    assert rows == expected(mock, limit)
+
+
+def test_rows_leave_and_enter_the_window(mock):
+    store = delta_sync.RecordStore(MODEL, DOMAIN, FIELDS, ORDER)
+    sync(store, mock)
+    leaving = window_order(mock)
+    write(mock, leaving, state='cancel')
+    entering = next(r['id'] for r in mock.tables[MODEL].values() if r['state'] == 'cancel' and r['id'] != leaving)
+    # Re-enters without a new write_date, so only the membership search can notice it
+    mock.tables[MODEL][entering]['state'] = 'sale'
+
+    rows = sync(store, mock)
+    ids = [r['id'] for r in rows]
+    assert leaving not in ids and entering in ids
+    assert rows == expected(mock)
+
+
+def test_deleted_rows_drop_out(mock):
+    store = delta_sync.RecordStore(MODEL, DOMAIN, FIELDS, ORDER)
+    sync(store, mock)
+    deleted = window_order(mock)
+    del mock.tables[MODEL][deleted]
+    rows = sync(store, mock)
+    assert deleted not in [r['id'] for r in rows]
+    assert rows == expected(mock)
+
+
+@pytest.mark.parametrize('lag, picked_up', [(60, True), (0, False)])
+def test_late_commit_behind_the_watermark(mock, monkeypatch, lag, picked_up):
+    monkeypatch.setattr(config, 'SYNC_WATERMARK_LAG_SECONDS', lag)
+    store = delta_sync.RecordStore(MODEL, DOMAIN, FIELDS, ORDER)
+    sync(store, mock)
+    late = window_order(mock)
+    # Committed after the last sync, but stamped when its transaction began, 10 s before the watermark
+    stamped = (datetime.datetime.fromisoformat(store.watermark) - datetime.timedelta(seconds=10)).isoformat(' ')
+    write(mock, late, written_at=stamped, amount_total=123456.0)
+
+    amounts = {r['id']: r['amount_total'] for r in sync(store, mock)}
+    assert (amounts[late] == 123456.0) is picked_up
+
+
+def test_overlap_rereads_do_not_count_as_changes(mock):
+    store = delta_sync.RecordStore(MODEL, DOMAIN, FIELDS, ORDER)
+    sync(store, mock)
+    mock.touch(MODEL, 5, random.Random(2))
+    sync(store, mock)
+    version = store.version
+    # The touched rows are still inside the lag window and come back again, unchanged
+    assert sync(store, mock) == expected(mock)
+    assert store.version == version
@@ -0,0 +1,46 @@
+import json
+
+import event_stream
+from event_stream import EventBroker
+
+ROWS = [{'id': 1, 'name': 'A', 'amount': 1.0}, {'id': 2, 'name': 'B', 'amount': 2.0}]
+
+
+def decode(event):
+    kind, data = event.decode().strip().split('\n')
+    return kind.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+
+def test_patch_for_row_subscribers():
+    broker = EventBroker()
+    broker.publish_section('invoices', ROWS)
+    subscriber, snapshot = broker.subscribe()
+    assert decode(snapshot) == ('snapshot', {'sections': {'invoices': ROWS}})
+    broker.publish_section('invoices', [ROWS[0], dict(ROWS[1], amount=3.0)])
+    assert decode(subscriber.next(0)) == ('patch', {'section': 'invoices', 'upsert': [dict(ROWS[1], amount=3.0)]})
+
+
+def test_paged_subscribers_skip_the_diff(monkeypatch):
+    broker = EventBroker()
+    broker.publish_section('invoices', ROWS)
+    subscriber, snapshot = broker.subscribe(paged=['invoices'])
+    assert decode(snapshot) == ('snapshot', {'sections': {}})
+
+    def no_diff(old_rows, new_rows):
+        raise AssertionError("diffed a section nobody receives rows for")
+
+    monkeypatch.setattr(event_stream, 'diff_rows', no_diff)
+    broker.publish_section('invoices', ROWS[:1])
+    assert decode(subscriber.next(0)) == ('changed', {'section': 'invoices', 'count': 1})
+
+
+def test_unchanged_fingerprint_sends_nothing():
+    digests = {'invoices': 'a'}
+    broker = EventBroker(fingerprint=digests.get)
+    broker.publish_section('invoices', ROWS)
+    subscriber, _ = broker.subscribe(paged=['invoices'])
+    broker.publish_section('invoices', list(ROWS))
+    assert subscriber.next(0) is None
+    digests['invoices'] = 'b'
+    broker.publish_section('invoices', ROWS[:1])
+    assert decode(subscriber.next(0))[0] == 'changed'
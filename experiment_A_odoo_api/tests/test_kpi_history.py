@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import kpi_history
+from kpi_history import KpiHistory, RingSeries
+
+# Capacity of the 10 s tier
+CAPACITY = dict((name, capacity) for name, _, capacity in kpi_history.TIERS)['10s']
+
+
+def _fill(series, buckets, start=1_000_000.0):
+    for k in range(buckets):
+        series.record(k, 10.0 * k, at=start + 10 * k)
+
+
+def test_ring_wraps_around_keeping_the_newest_buckets_in_order():
+    series = RingSeries()
+    _fill(series, CAPACITY + 25)
+    points = series.points('10s')
+    assert len(points) == CAPACITY
+    assert [p[3] for p in points] == list(range(25, CAPACITY + 25))
+    starts = [p[0] for p in points]
+    assert starts == sorted(starts) and starts[-1] - starts[0] == 10 * (CAPACITY - 1)
+    assert [p[3] for p in series.points('10s', limit=3)] == [CAPACITY + 22, CAPACITY + 23, CAPACITY + 24]
+
+
+def test_samples_in_one_bucket_are_folded():
+    series = RingSeries()
+    for rows in (2, 4, 9):
+        series.record(rows, 1.0, at=600.0)
+    series.record(1, 3.0, at=590.0)
+    (point,) = series.points('1m')
+    assert point == (600.0, 5.0, 1.0, 9, 1.0)
+
+
+def test_reader_never_creates_the_ring(tmp_path):
+    path = str(tmp_path / 'invoices.ring')
+    reader = RingSeries(path, writable=False)
+    assert reader.buf is None and reader.points('10s') == []
+    assert not os.path.exists(path)
+    assert KpiHistory(str(tmp_path)).query('invoices')['t'] == []
+    assert not os.path.exists(path)
+
+
+def test_reader_sees_the_writers_samples(tmp_path):
+    writer = KpiHistory(str(tmp_path))
+    reader = KpiHistory(str(tmp_path))
+    assert reader.query('invoices', '10s')['t'] == []
+    writer.record('invoices', [{'amount_total': 5.0}, {'amount_total': False}], at=100.0)
+    history = reader.query('invoices', '10s')
+    assert history['latest'] == {'rows': 2, 'amount': 5.0}
+    writer.record('invoices', [{'amount_total': 1.0}], at=110.0)
+    assert reader.query('invoices', '10s')['change'] == {'rows': -1, 'amount': -4.0}
+
+
+def test_writer_repairs_a_damaged_ring_in_place(tmp_path):
+    path = tmp_path / 'invoices.ring'
+    path.write_bytes(b'garbage')
+    assert RingSeries(str(path), writable=False).buf is None
+    inode = os.stat(path).st_ino
+    writer = RingSeries(str(path))
+    writer.record(3, 0.0, at=100.0)
+    assert os.stat(path).st_ino == inode and os.path.getsize(path) == kpi_history.FILE_SIZE
+    assert RingSeries(str(path), writable=False).points('10s')[0][3] == 3
+
+
+@pytest.mark.parametrize('tier, limit', [('5m', None), ('10s', 0), ('1h', -4)])
+def test_bad_ranges_are_rejected(tmp_path, tier, limit):
+    series = RingSeries()
+    _fill(series, 3)
+    with pytest.raises(ValueError):
+        series.points(tier, limit)
+    with pytest.raises(ValueError):
+        KpiHistory(str(tmp_path)).query('invoices', tier, limit)
@@ -0,0 +1,71 @@
+import asyncio
+import xmlrpc.client
+
+import pytest
+
+import odoo_async
+import odoo_transport
+from mock_odoo import MockOdoo, serve
+from odoo_pool import OdooPool
+from odoo_transport import Call
+
+CALLS = [
+    Call('res.partner', 'search_count', [[]]),
+    Call('account.journal', 'search', [[['type', '=', 'bank']]]),
+]
+
+
+@pytest.fixture
+def odoo(request):
+    mock = MockOdoo(orders=20, partners=10, moves=10, deposits=1, statement_lines=1, multicall=True,
+                    batch_http_status=request.param)
+    server = serve(mock)
+    yield mock, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def expected(mock):
+    return [mock.execute_kw('db', 2, 'pw', c.model, c.method, c.args, c.kwargs) for c in CALLS]
+
+
+@pytest.mark.parametrize('status', [400, 404, 405, 413, 501])
+def test_rejected_statuses_become_batch_unsupported(status):
+    error = xmlrpc.client.ProtocolError('host/xmlrpc/2/object', status, 'Refused', {})
+    assert isinstance(odoo_transport.rejected_batch(error), odoo_transport.BatchUnsupported)
+
+
+def test_other_statuses_are_left_alone():
+    error = xmlrpc.client.ProtocolError('host/xmlrpc/2/object', 502, 'Bad Gateway', {})
+    assert odoo_transport.rejected_batch(error) is error
+
+
+@pytest.mark.parametrize('odoo', [405], indirect=True)
+@pytest.mark.parametrize('protocol', ['xmlrpc', 'jsonrpc'])
+def test_pool_falls_back_when_the_batch_is_refused_over_http(odoo, protocol):
+    mock, url = odoo
+    pool = OdooPool(url, 'db', 'admin', 'pw', size=2, protocol=protocol)
+    assert pool.execute_many(CALLS) == expected(mock)
+    assert pool.stats()['batch_supported'] is False
+    # The verdict is cached: the next batch goes straight to the per-call fallback
+    mock.reset_counters()
+    results = pool.execute_many(CALLS)
+    assert mock.http_count == len(CALLS)
+    assert results == expected(mock)
+
+
+@pytest.mark.parametrize('odoo', [502], indirect=True)
+def test_pool_raises_other_http_errors(odoo):
+    _, url = odoo
+    pool = OdooPool(url, 'db', 'admin', 'pw', size=2)
+    with pytest.raises(xmlrpc.client.ProtocolError):
+        pool.execute_many(CALLS)
+    assert pool.stats()['batch_supported'] is None
+
+
+@pytest.mark.parametrize('odoo', [405], indirect=True)
+@pytest.mark.parametrize('protocol', ['xmlrpc', 'jsonrpc'])
+def test_async_pool_falls_back_when_the_batch_is_refused_over_http(odoo, protocol):
+    mock, url = odoo
+    pool = odoo_async.AsyncOdooPool(url, 'db', 'admin', 'pw', size=2, protocol=protocol)
+    assert asyncio.run(pool.execute_many(CALLS)) == expected(mock)
+    assert pool.stats()['batch_supported'] is False
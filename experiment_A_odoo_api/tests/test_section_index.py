@@ -0,0 +1,49 @@
+import pytest
+
+from section_index import SECTION_INDEX_FIELDS, IndexCache, SectionIndex, index_fields
+
+# Journal rows mix integer bank.deposit ids with 'move_N' ids and empty many2ones
+JOURNALS = [
+    {'id': 7, 'name': 'DEP/7', 'partner': [3, 'Beta'], 'amount': 10.0, 'source': 'deposit'},
+    {'id': 'move_2', 'name': 'MISC/2', 'partner': False, 'amount': 0, 'source': 'journal'},
+    {'id': 'move_10', 'name': 'MISC/10', 'partner': [1, 'Alpha'], 'amount': 5.5, 'source': 'journal'},
+    {'id': 3, 'name': 'DEP/3', 'partner': [2, 'alpha two'], 'amount': 2, 'source': 'deposit'},
+]
+
+
+def journal_index():
+    fields = index_fields('journals')
+    return SectionIndex(JOURNALS, fields['text'], fields['facets'])
+
+
+@pytest.mark.parametrize('sort, ids', [
+    ('id', [3, 7, 'move_10', 'move_2']),
+    ('-id', ['move_2', 'move_10', 7, 3]),
+    ('amount', ['move_2', 3, 'move_10', 7]),
+    ('partner', ['move_2', 'move_10', 7, 3]),
+])
+def test_sort_tolerates_mixed_types(sort, ids):
+    total, rows = journal_index().query(sort=sort)
+    assert total == 4
+    assert [r['id'] for r in rows] == ids
+
+
+def test_search_facets_and_paging():
+    index = journal_index()
+    total, rows = index.query(q='alp', filters={'source': ['deposit']})
+    assert total == 1 and rows[0]['id'] == 3
+    total, rows = index.query(sort='id', offset=1, limit=2)
+    assert total == 4 and [r['id'] for r in rows] == [7, 'move_10']
+
+
+def test_every_section_whitelists_its_sort_fields():
+    for name, fields in SECTION_INDEX_FIELDS.items():
+        assert fields['sort'], name
+    assert index_fields('unknown')['sort']
+
+
+def test_lazy_put_builds_on_first_get():
+    cache = IndexCache()
+    assert cache.put('journals', JOURNALS, lazy=True) is None
+    index = cache.get('journals')
+    assert isinstance(index, SectionIndex) and cache.get('journals') is index
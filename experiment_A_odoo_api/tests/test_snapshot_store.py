@@ -0,0 +1,71 @@
+import pytest
+
+import delta_sync
+import snapshot_store
+from snapshot_store import SnapshotStore
+
+ROWS = [{'id': 1, 'name': 'A', 'amount': 1.5}, {'id': 2, 'name': 'B', 'amount': False}]
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Paths written through ``write_atomic``; set ``fail`` to make the next write raise."""
+    log = {'paths': [], 'fail': False}
+    real = snapshot_store.write_atomic
+
+    def write_atomic(path, data):
+        if log['fail']:
+            log['fail'] = False
+            raise OSError("disk full")
+        log['paths'].append(path)
+        real(path, data)
+
+    monkeypatch.setattr(snapshot_store, 'write_atomic', write_atomic)
+    return log
+
+
+def test_unchanged_section_is_not_rewritten(tmp_path, writes):
+    store = SnapshotStore(str(tmp_path))
+    store.save_section('invoices', ROWS, 1.0)
+    store.save_section('invoices', [dict(r) for r in ROWS], 2.0)
+    assert len(writes['paths']) == 1
+    store.save_section('invoices', ROWS[:1], 3.0)
+    assert len(writes['paths']) == 2
+    snapshot, updated_at = store.load_section('invoices')
+    assert snapshot.to_list() == ROWS[:1] and updated_at == 3.0
+
+
+def test_loaded_section_counts_as_saved(tmp_path, writes):
+    SnapshotStore(str(tmp_path)).save_section('invoices', ROWS, 1.0)
+    restarted = SnapshotStore(str(tmp_path))
+    snapshot, _ = restarted.load_section('invoices')
+    restarted.save_section('invoices', snapshot, 2.0)
+    assert len(writes['paths']) == 1
+
+
+def test_failed_section_write_is_retried(tmp_path, writes):
+    store = SnapshotStore(str(tmp_path))
+    writes['fail'] = True
+    with pytest.raises(OSError):
+        store.save_section('invoices', ROWS, 1.0)
+    store.save_section('invoices', ROWS, 1.0)
+    assert store.load_section('invoices')[0].to_list() == ROWS
+
+
+def test_failed_store_write_is_retried(tmp_path, writes):
+    saved = SnapshotStore(str(tmp_path))
+    store = delta_sync.RecordStore('sale.order', [], ['id', 'name'])
+    store.records = {1: {'id': 1, 'name': 'A'}}
+    store.window_ids = [1]
+    store.watermark = '2024-01-01 00:00:00'
+    store.version = 1
+    writes['fail'] = True
+    with pytest.raises(OSError):
+        saved.save_store('orders', store)
+    saved.save_store('orders', store)
+    saved.save_store('orders', store)
+    assert len(writes['paths']) == 1
+
+    restored = delta_sync.RecordStore('sale.order', [], ['id', 'name'])
+    assert SnapshotStore(str(tmp_path)).load_store('orders', restored)
+    assert restored.records == store.records and restored.watermark == store.watermark
@@ -0,0 +1,154 @@
+import itertools
+
+import pytest
+
+import verdict_rules
+
+
+def baseline_issue(o, inv_map):
+    """The if-chain the rule table replaced: ``None`` for a hidden order, else its issue label."""
+    if o['state'] == 'cancel':
+        return None
+    q_state = 'D/C' if o['state'] in ['draft', 'sent'] else 'SO'
+    taxable = o.get('amount_tax', 0) > 0
+    has_ref = bool(o.get('client_order_ref'))
+    ids = o.get('invoice_ids', [])
+    inv_count = len(ids)
+    inv_state = '-'
+    paid_count = canceled_count = 0
+    refund_draft = False
+    for iid in ids:
+        inv = inv_map.get(iid)
+        if not inv:
+            continue
+        if inv.get('state') == 'paid':
+            paid_count += 1
+        if inv.get('state') == 'cancel':
+            canceled_count += 1
+        if inv.get('type') == 'out_refund' and inv.get('state') == 'draft':
+            refund_draft = True
+    if inv_count == 1 and ids[0] in inv_map:
+        inv_state = inv_map[ids[0]]['state']
+
+    valid = False
+    if q_state == 'D/C':
+        if inv_count == 0:
+            valid = False
+        elif not taxable:
+            valid = True
+        elif paid_count >= 1:
+            valid = True
+    if q_state == 'SO':
+        if taxable:
+            if has_ref and inv_count == 1 and inv_state == 'paid':
+                valid = True
+            elif has_ref and inv_count > 1 and paid_count == 1 and canceled_count == inv_count - 1:
+                valid = True
+        elif inv_count == 0:
+            valid = True
+        elif paid_count >= 1 and not refund_draft:
+            valid = True
+    if valid:
+        return None
+
+    issue = 'Action Required'
+    if q_state == 'D/C':
+        if inv_count == 0:
+            issue = 'Not Invoiced'
+        elif taxable and has_ref:
+            issue = 'Draft with Reference'
+        else:
+            issue = 'Open Invoice'
+    elif taxable:
+        if not has_ref:
+            issue = 'No Ref'
+        elif inv_count > 1:
+            issue = 'Multiple Invoices'
+        elif inv_count == 0:
+            issue = 'Not Invoiced'
+        elif inv_state != 'draft':
+            issue = 'Invoice Not Paid'
+    elif inv_count == 0:
+        issue = 'Not Invoiced'
+    else:
+        issue = 'Invoice Issue'
+    return issue
+
+
+INVOICES = {
+    1: {'state': 'paid', 'type': 'out_invoice'},
+    2: {'state': 'open', 'type': 'out_invoice'},
+    3: {'state': 'draft', 'type': 'out_invoice'},
+    4: {'state': 'cancel', 'type': 'out_invoice'},
+    5: {'state': 'draft', 'type': 'out_refund'},
+    6: {'state': 'paid', 'type': 'out_refund'},
+}
+
+
+def order(state, tax=0.0, ref=False, invoices=(), order_id=1):
+    return {'id': order_id, 'name': f"S{order_id:05d}", 'partner_id': [7, 'Partner'], 'date_order': '2024-01-01 10:00:00',
+            'state': state, 'amount_tax': tax, 'client_order_ref': ref, 'invoice_ids': list(invoices),
+            'amount_total': 100.0 + tax}
+
+
+# (order, expected issue or None when the order is complete and hidden)
+CASES = [
+    (order('draft'), 'Not Invoiced'),
+    (order('sent', tax=10, ref='PO-1'), 'Not Invoiced'),
+    (order('draft', invoices=[2]), None),
+    (order('draft', tax=10, invoices=[1]), None),
+    (order('draft', tax=10, ref='PO-1', invoices=[2]), 'Draft with Reference'),
+    (order('sent', tax=10, invoices=[3]), 'Open Invoice'),
+    (order('sale', tax=10, ref='PO-1', invoices=[1]), None),
+    (order('done', tax=10, ref='PO-1', invoices=[1, 4, 4]), None),
+    (order('sale', tax=10, ref='PO-1', invoices=[1, 1]), 'Multiple Invoices'),
+    (order('sale', tax=10, invoices=[1]), 'No Ref'),
+    (order('sale', tax=10, ref='PO-1'), 'Not Invoiced'),
+    (order('sale', tax=10, ref='PO-1', invoices=[2]), 'Invoice Not Paid'),
+    (order('sale', tax=10, ref='PO-1', invoices=[3]), 'Action Required'),
+    (order('sale', tax=10, ref='PO-1', invoices=[99]), 'Invoice Not Paid'),
+    (order('sale'), None),
+    (order('done', invoices=[1]), None),
+    (order('sale', invoices=[1, 5]), 'Invoice Issue'),
+    (order('sale', invoices=[1, 6]), None),
+    (order('sale', invoices=[2]), 'Invoice Issue'),
+    (order('cancel', tax=10, ref='PO-1'), None),
+]
+
+
+@pytest.fixture(params=['numpy', 'lists'])
+def backend(request, monkeypatch):
+    if request.param == 'lists':
+        monkeypatch.setattr(verdict_rules, 'np', None)
+    elif verdict_rules.np is None:
+        pytest.skip("numpy not installed")
+    return request.param
+
+
+def issues_by_id(orders):
+    return {row['id']: row['issue'] for row in verdict_rules.incomplete_orders(orders, INVOICES)}
+
+
+@pytest.mark.parametrize('o, expected', CASES)
+def test_rule_table_case(backend, o, expected):
+    assert baseline_issue(o, INVOICES) == expected
+    assert issues_by_id([o]).get(o['id']) == expected
+
+
+def test_rule_table_matches_baseline_on_every_combination(backend):
+    invoice_sets = [()] + [(i,) for i in INVOICES] + list(itertools.combinations(INVOICES, 2)) + [(1, 4, 4), (99,)]
+    orders = []
+    for state, tax, ref, invoices in itertools.product(['draft', 'sent', 'sale', 'done', 'cancel'], [0.0, 5.0],
+                                                       [False, 'PO-1'], invoice_sets):
+        orders.append(order(state, tax, ref, invoices, order_id=len(orders) + 1))
+    expected = {o['id']: baseline_issue(o, INVOICES) for o in orders}
+    expected = {order_id: issue for order_id, issue in expected.items() if issue is not None}
+    assert issues_by_id(orders) == expected
+
+
+def test_rows_keep_the_dashboard_shape():
+    o = order('sale', tax=10, invoices=[1], order_id=42)
+    assert verdict_rules.incomplete_orders([o], INVOICES) == [{
+        'id': 42, 'name': 'S00042', 'ref': False, 'partner_id': [7, 'Partner'], 'date_invoice': '2024-01-01 10:00:00',
+        'amount_total': 110.0, 'state': 'sale', 'issue': 'No Ref',
+    }]
@@ -0,0 +1,188 @@
+import operator
+
+try:
+    import numpy as np
+except ImportError:  # optional: the same rules run over plain lists
+    np = None
+
+# sale.order state -> the "quotation state" column of the rule table; cancelled orders are never shown
+ORDER_STATE_GROUPS = {'draft': 'D/C', 'sent': 'D/C', 'sale': 'SO', 'done': 'SO'}
+
+# The verdict table. Each rule is (name, {column: predicate}); a predicate is a
+# value to compare for equality or an (operator, value) pair. An order matching
+# any VALID_RULES row is complete and hidden; everything else is "Invalid".
+VALID_RULES = [
+    # D/C with invoices: non-taxable orders are ignored, taxable ones once an invoice is paid
+    ('dc_untaxed_invoiced', {'q_state': 'D/C', 'inv_count': ('>', 0), 'taxable': False}),
+    ('dc_taxed_paid', {'q_state': 'D/C', 'inv_count': ('>', 0), 'taxable': True, 'paid_count': ('>=', 1)}),
+    # SO, taxable, with reference: one paid invoice, or one paid and the rest cancelled
+    ('so_taxed_single_paid', {'q_state': 'SO', 'taxable': True, 'has_ref': True, 'inv_count': 1,
+                              'inv_state': 'paid'}),
+    ('so_taxed_one_paid_rest_cancelled', {'q_state': 'SO', 'taxable': True, 'has_ref': True,
+                                          'inv_count': ('>', 1), 'paid_count': 1, 'rest_cancelled': True}),
+    # SO, non-taxable: nothing needed, or a paid invoice and no draft refund
+    ('so_untaxed_uninvoiced', {'q_state': 'SO', 'taxable': False, 'inv_count': 0}),
+    ('so_untaxed_paid', {'q_state': 'SO', 'taxable': False, 'inv_count': ('>', 0), 'paid_count': ('>=', 1),
+                         'refund_draft': False}),
+]
+
+# Issue label for the orders left "Invalid"; the first matching rule wins
+ISSUE_RULES = [
+    ('Not Invoiced', {'q_state': 'D/C', 'inv_count': 0}),
+    ('Draft with Reference', {'q_state': 'D/C', 'taxable': True, 'has_ref': True}),
+    ('Open Invoice', {'q_state': 'D/C'}),
+    ('No Ref', {'q_state': 'SO', 'taxable': True, 'has_ref': False}),
+    ('Multiple Invoices', {'q_state': 'SO', 'taxable': True, 'inv_count': ('>', 1)}),
+    ('Not Invoiced', {'q_state': 'SO', 'inv_count': 0}),
+    ('Invoice Not Paid', {'q_state': 'SO', 'taxable': True, 'inv_state': ('!=', 'draft')}),
+    ('Invoice Issue', {'q_state': 'SO', 'taxable': False}),
+]
+DEFAULT_ISSUE = 'Action Required'
+
+OPS = {'==': operator.eq, '!=': operator.ne, '>': operator.gt, '>=': operator.ge,
+       '<': operator.lt, '<=': operator.le}
+
+
+def _column(values, dtype=None):
+    if np is None:
+        return list(values)
+    return np.asarray(values, dtype=dtype)
+
+
+def _compare(column, predicate):
+    op, value = predicate if isinstance(predicate, tuple) else ('==', predicate)
+    fn = OPS[op]
+    if np is not None:
+        return fn(column, value)
+    return [fn(v, value) for v in column]
+
+
+def _all(n):
+    return np.ones(n, dtype=bool) if np is not None else [True] * n
+
+
+def _and(a, b):
+    return a & b if np is not None else [x and y for x, y in zip(a, b)]
+
+
+def _or(a, b):
+    return a | b if np is not None else [x or y for x, y in zip(a, b)]
+
+
+def _not(a):
+    return ~a if np is not None else [not x for x in a]
+
+
+def _and_not(a, b):
+    return a & ~b if np is not None else [x and not y for x, y in zip(a, b)]
+
+
+def match(columns, conditions, n):
+    """Boolean mask of rows satisfying every ``{column: predicate}`` condition."""
+    mask = _all(n)
+    for field, predicate in conditions.items():
+        mask = _and(mask, _compare(columns[field], predicate))
+    return mask
+
+
+def any_match(columns, rules, n):
+    """Mask of rows matching at least one rule."""
+    mask = _not(_all(n))
+    for _, conditions in rules:
+        mask = _or(mask, match(columns, conditions, n))
+    return mask
+
+
+def first_match(columns, rules, n, default=None, where=None):
+    """Label of the first rule each row matches (``default`` if none), evaluated rule by rule over whole columns."""
+    undecided = _all(n) if where is None else where
+    labels = np.full(n, default, dtype=object) if np is not None else [default] * n
+    for label, conditions in rules:
+        hit = _and(undecided, match(columns, conditions, n))
+        if np is not None:
+            labels[hit] = label
+        else:
+            labels = [label if h else current for h, current in zip(hit, labels)]
+        undecided = _and_not(undecided, hit)
+    return labels
+
+
+def order_features(orders, invoices):
+    """Rule-table columns for ``orders`` (none cancelled) joined with ``invoices``.
+
+    ``invoices`` maps invoice id -> ``{'state', 'type'}``. The order/invoice
+    relation is flattened once into parallel (owner row, invoice) lists and
+    the per-order counts are accumulated from it, instead of looping over
+    each order's invoices inside the rules.
+    """
+    n = len(orders)
+    invoice_ids = [o.get('invoice_ids') or [] for o in orders]
+    inv_count = [len(ids) for ids in invoice_ids]
+
+    owners, states, types = [], [], []
+    for row, ids in enumerate(invoice_ids):
+        for iid in ids:
+            inv = invoices.get(iid)
+            if inv is not None:
+                owners.append(row)
+                states.append(inv.get('state'))
+                types.append(inv.get('type'))
+
+    if np is not None and owners:
+        owners_a = np.asarray(owners)
+        states_a = np.asarray(states, dtype=object)
+        paid_count = np.bincount(owners_a, weights=(states_a == 'paid'), minlength=n).astype(int)
+        canceled_count = np.bincount(owners_a, weights=(states_a == 'cancel'), minlength=n).astype(int)
+        refund_draft = np.bincount(owners_a, weights=((np.asarray(types, dtype=object) == 'out_refund')
+                                                      & (states_a == 'draft')), minlength=n) > 0
+    else:
+        paid_count, canceled_count, refund_draft = [0] * n, [0] * n, [False] * n
+        for row, state, kind in zip(owners, states, types):
+            if state == 'paid':
+                paid_count[row] += 1
+            elif state == 'cancel':
+                canceled_count[row] += 1
+            if kind == 'out_refund' and state == 'draft':
+                refund_draft[row] = True
+
+    inv_state = ['-'] * n
+    for row, ids in enumerate(invoice_ids):
+        if len(ids) == 1 and ids[0] in invoices:
+            inv_state[row] = invoices[ids[0]]['state']
+
+    columns = {
+        'q_state': _column([ORDER_STATE_GROUPS[o['state']] for o in orders], dtype=object),
+        'taxable': _column([(o.get('amount_tax') or 0) > 0 for o in orders], dtype=bool),
+        'has_ref': _column([bool(o.get('client_order_ref')) for o in orders], dtype=bool),
+        'inv_count': _column(inv_count, dtype=int),
+        'inv_state': _column(inv_state, dtype=object),
+        'paid_count': _column(paid_count, dtype=int),
+        'refund_draft': _column(refund_draft, dtype=bool),
+    }
+    columns['rest_cancelled'] = _column([c == i - 1 for c, i in zip(canceled_count, inv_count)], dtype=bool)
+    return columns
+
+
+def classify(orders, invoices):
+    """``(valid, issues)`` per order: the verdict mask and the issue label for invalid ones."""
+    n = len(orders)
+    columns = order_features(orders, invoices)
+    valid = any_match(columns, VALID_RULES, n)
+    issues = first_match(columns, ISSUE_RULES, n, DEFAULT_ISSUE, where=_not(valid))
+    return list(valid), list(issues)
+
+
+def incomplete_orders(orders, invoices):
+    """Dashboard rows for every open order the rule table does not consider complete."""
+    orders = [o for o in orders if o['state'] in ORDER_STATE_GROUPS]
+    valid, issues = classify(orders, invoices)
+    return [{
+        'id': o['id'],
+        'name': o['name'],
+        'ref': o.get('client_order_ref', 'N/A'),
+        'partner_id': o['partner_id'],
+        'date_invoice': o['date_order'],
+        'amount_total': o['amount_total'],
+        'state': o['state'],
+        'issue': issue,
+    } for o, ok, issue in zip(orders, valid, issues) if not ok]